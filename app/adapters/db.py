@@ -1,5 +1,6 @@
 import ssl
 import os
+import time
 from typing import Optional, AsyncIterator, AsyncGenerator
 
 from contextlib import asynccontextmanager
@@ -10,7 +11,10 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.adapters.memory_db import MemorySession, get_memory_store
+from app.services.observability.metrics import metrics
 from app.settings import get_settings
 
 metadata = MetaData()
@@ -31,12 +35,27 @@ def _ssl_context() -> ssl.SSLContext | bool:
     return True
 
 
+class _TimedPool(AsyncAdaptedQueuePool):
+    """Records how long each checkout waited for a connection as `db_pool_wait_ms`.
+
+    The wait includes opening a new connection when the pool grows.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db_pool_wait_ms", (time.perf_counter() - started) * 1000)
+
+
 def get_engine() -> AsyncEngine:
     global _engine, _sessionmaker
     if _engine is None:
         _engine = create_async_engine(
             _settings.database_url,
             pool_pre_ping=True,
+            poolclass=_TimedPool,
             connect_args={
                 "ssl": _ssl_context(),
             },
@@ -47,8 +66,36 @@ def get_engine() -> AsyncEngine:
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     global _sessionmaker
+    if _settings.repo_backend == "memory":
+        async with _memory_session() as session:
+            yield session
+        return
     if _sessionmaker is None:
         get_engine()
     assert _sessionmaker is not None
     async with _sessionmaker() as session:
         yield session
+
+
+@asynccontextmanager
+async def db_session_scope() -> AsyncIterator[AsyncSession]:
+    """Opens a session outside of a request, e.g. for background tasks."""
+    global _sessionmaker
+    if _settings.repo_backend == "memory":
+        async with _memory_session() as session:
+            yield session
+        return
+    if _sessionmaker is None:
+        get_engine()
+    assert _sessionmaker is not None
+    async with _sessionmaker() as session:
+        yield session
+
+
+@asynccontextmanager
+async def _memory_session() -> AsyncIterator[MemorySession]:
+    session = get_memory_store().session()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,147 @@
+import asyncio
+import importlib.util
+import time
+from typing import Dict, Iterable, Optional
+
+import httpx
+
+from app.services.observability.logging import log_event
+from app.services.reliability.rate_limit import observe_response, tag_request_model
+from app.settings import Settings, get_settings
+
+_client: Optional[httpx.AsyncClient] = None
+_counters: Dict[str, int] = {"requests": 0, "in_flight": 0}
+
+
+def http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class _CountingClient(httpx.AsyncClient):
+    """Counts requests, and those still waiting for their response headers.
+
+    Counting around `send` rather than in event hooks also covers requests that
+    fail or are cancelled before a response arrives.
+    """
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        _counters["requests"] += 1
+        _counters["in_flight"] += 1
+        try:
+            return await super().send(request, **kwargs)
+        finally:
+            _counters["in_flight"] -= 1
+
+
+def _http2_enabled(settings: Settings) -> bool:
+    return settings.llm_http2 and http2_available()
+
+
+def build_http_client(settings: Settings) -> httpx.AsyncClient:
+    return _CountingClient(
+        http2=_http2_enabled(settings),
+        limits=httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+            keepalive_expiry=settings.llm_http_keepalive_expiry_seconds,
+        ),
+        timeout=httpx.Timeout(
+            settings.llm_timeout_seconds,
+            connect=settings.llm_http_connect_timeout_seconds,
+        ),
+        event_hooks={
+            "request": [tag_request_model],
+            "response": [observe_response],
+        },
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the process-wide HTTP client shared by all LLM calls."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client(get_settings())
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def warmup(base_urls: Iterable[str], connections: int) -> None:
+    """Opens `connections` connections to each base URL ahead of the first turns.
+
+    Each connection pays its DNS lookup and TLS handshake here instead of on a
+    user's turn. The responses (usually 401 without credentials) are ignored; only
+    the kept-alive connections matter.
+
+    With HTTP/2 enabled, concurrent requests to an https URL are multiplexed over
+    a single connection, so only one is opened to each of those.
+    """
+    client = get_http_client()
+    http2 = _http2_enabled(get_settings())
+
+    async def touch(url: str) -> None:
+        try:
+            await client.get(url)
+        except httpx.HTTPError as e:
+            log_event("http_pool_warmup_failed", url=url, error=type(e).__name__)
+
+    def connections_to(url: str) -> int:
+        return 1 if http2 and httpx.URL(url).scheme == "https" else connections
+
+    started = time.perf_counter()
+    urls = list(dict.fromkeys(base_urls))
+    await asyncio.gather(
+        *(touch(url) for url in urls for _ in range(connections_to(url)))
+    )
+    log_event(
+        "http_pool_warmup",
+        urls=urls,
+        connections_per_url={url: connections_to(url) for url in urls},
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        **pool_stats(),
+    )
+
+
+def pool_stats() -> dict:
+    """Returns connection pool usage of the shared client.
+
+    The connection counts come from httpcore internals, which httpx does not
+    expose publicly. If they change shape, only the request counters are returned
+    and `pool_details` is False.
+    """
+    stats = {
+        "in_flight_requests": _counters["in_flight"],
+        "total_requests": _counters["requests"],
+        "pool_details": False,
+    }
+    if _client is None:
+        return stats
+    try:
+        details = _pool_details(_client._transport._pool)
+    except (AttributeError, TypeError) as e:
+        log_event("http_pool_stats_unavailable", error=f"{type(e).__name__}: {e}")
+        return stats
+    return {**stats, **details, "pool_details": True}
+
+
+def _pool_details(pool) -> dict:
+    connections = list(pool.connections)
+    idle = sum(1 for c in connections if c.is_idle())
+    return {
+        "http2_enabled": bool(pool._http2),
+        "connections": len(connections),
+        "idle_connections": idle,
+        "active_connections": len(connections) - idle,
+        "http2_connections": sum(
+            1
+            for c in connections
+            if "HTTP2" in type(getattr(c, "_connection", c)).__name__
+        ),
+        "queued_requests": sum(1 for r in pool._requests if r.is_queued()),
+    }
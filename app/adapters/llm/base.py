@@ -1,24 +1,57 @@
-from typing import Protocol
+import json
+import time
+from typing import AsyncIterator, Optional, Protocol
 
-from app.adapters.llm.types import LLMResult, PromptPayload
+from app.adapters.llm.types import (
+    LLMResult,
+    LLMStreamEvent,
+    LLMTiming,
+    PromptPayload,
+)
+from app.domains.usage import TokenUsage
 
 
 class LLMClient(Protocol):
+    """The interface every LLM backend, and every layer wrapping one, implements."""
+
     def name(self) -> str: ...
     def model(self) -> str: ...
+    def retry_after(self, model: Optional[str] = None) -> int: ...
+    def base_urls(self) -> list[str]: ...
 
     async def generate(
         self,
-        *,
         prompt_payload: PromptPayload,
+        tools: list[dict] = None,
+        output_schema: dict = None,
         temperature: float = 0.7,
         max_tokens: int = 512,
-        json_mode: bool = False,
-        timeout_s: int = 30,
+        model: Optional[str] = None,
     ) -> LLMResult: ...
 
+    def stream(
+        self,
+        prompt_payload: PromptPayload,
+        tools: list[dict] = None,
+        output_schema: dict = None,
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[LLMStreamEvent]: ...
+
+
+NOOP_NARRATION = (
+    "The corridor smells of damp stone and old secrets. Footsteps echo ahead."
+)
+
 
 class NoOpLLM:
+    """Offline stand-in that answers instantly with canned narration.
+
+    When a DM response schema is requested it returns schema-valid DM JSON, so a
+    full turn can run against it.
+    """
+
     def __init__(self, model: str = "noop"):
         self._model = model
 
@@ -28,17 +61,56 @@ class NoOpLLM:
     def model(self) -> str:
         return self._model
 
+    def retry_after(self, model: Optional[str] = None) -> int:
+        return 0
+
+    def base_urls(self) -> list[str]:
+        return []
+
     async def generate(
         self,
-        *,
         prompt_payload: PromptPayload,
+        tools: list[dict] = None,
+        output_schema: dict = None,
         temperature: float = 0.7,
         max_tokens: int = 512,
-        json_mode: bool = False,
-        timeout_s: int = 30,
+        model: Optional[str] = None,
     ) -> LLMResult:
+        started = time.perf_counter()
+        text = NOOP_NARRATION
+        if output_schema:
+            text = json.dumps(
+                {
+                    "message_to_user": NOOP_NARRATION,
+                    "update_adventure_status": {
+                        "summary": "The adventure continues.",
+                        "location": "Unknown",
+                        "combat_state": False,
+                    },
+                    "add_items_to_inventory": None,
+                    "remove_items_from_inventory": None,
+                }
+            )
         return LLMResult(
-            text="The corridor smells of damp stone and old secrets. Footsteps echo ahead.",
+            text=text,
             finish_reason="stop",
+            model=model or self._model,
+            usage=TokenUsage(llm_calls=1),
+            timing=LLMTiming(latency_ms=(time.perf_counter() - started) * 1000),
             raw={"provider": "noop"},
         )
+
+    async def stream(
+        self,
+        prompt_payload: PromptPayload,
+        tools: list[dict] = None,
+        output_schema: dict = None,
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        result = await self.generate(
+            prompt_payload, tools, output_schema, temperature, max_tokens, model
+        )
+        yield LLMStreamEvent(type="text_delta", delta=result.text)
+        yield LLMStreamEvent(type="completed", result=result)
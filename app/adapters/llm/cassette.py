@@ -0,0 +1,248 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+from collections import defaultdict, deque
+from typing import IO, AsyncIterator, Deque, Dict, List, Optional
+
+from app.adapters.llm.base import LLMClient
+from app.adapters.llm.types import (
+    FunctionCall,
+    FunctionCallOutput,
+    LLMResult,
+    LLMStreamEvent,
+    LLMTiming,
+    PromptPayload,
+)
+
+_STREAM_CHUNK_CHARS = 16
+
+
+class CassetteMissError(Exception):
+    """No recorded exchange matches the prompt being replayed."""
+
+
+def prompt_key(
+    prompt_payload: PromptPayload,
+    tools: Optional[list[dict]],
+    output_schema: Optional[dict],
+    model: Optional[str],
+) -> str:
+    """Hashes a call after normalizing what changes from run to run.
+
+    Whitespace is collapsed, tool call arguments are re-serialized with sorted
+    keys, call ids are numbered in order of appearance, and the response chain id
+    and prompt cache key are left out.
+    """
+    call_ids: Dict[str, int] = {}
+    messages = []
+    for message in prompt_payload.messages:
+        if isinstance(message, FunctionCall):
+            messages.append(
+                {
+                    "call": call_ids.setdefault(message.call_id, len(call_ids)),
+                    "name": message.name,
+                    "arguments": _canonical_json(message.arguments),
+                }
+            )
+        elif isinstance(message, FunctionCallOutput):
+            messages.append(
+                {
+                    "output_of": call_ids.setdefault(message.call_id, len(call_ids)),
+                    "output": _collapse(message.output),
+                }
+            )
+        else:
+            messages.append(
+                {"role": message.role, "content": _collapse(message.content)}
+            )
+    normalized = {
+        "signature": call_signature(tools, output_schema, model),
+        "chained": bool(prompt_payload.previous_response_id),
+        "messages": messages,
+    }
+    encoded = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:24]
+
+
+def call_signature(
+    tools: Optional[list[dict]], output_schema: Optional[dict], model: Optional[str]
+) -> str:
+    """Identifies the kind of call (model, tools, output schema) without its prompt."""
+    tool_names = ",".join(sorted(t.get("name", "") for t in tools or []))
+    schema_name = (output_schema or {}).get("format", {}).get("name", "")
+    return f"{model or ''}|{tool_names}|{schema_name}"
+
+
+class CassetteLLM:
+    """Records LLM exchanges to a cassette file and replays them offline.
+
+    In record mode every call goes to `inner` and its result, including the
+    latency and time to first token it took, is appended to the cassette as one
+    JSON line (gzipped when the path ends in `.gz`).
+
+    In replay mode calls are answered from the cassette by `prompt_key`.
+    Recordings of the same prompt are replayed in the order they were made. The
+    recorded latency is reproduced, multiplied by `latency_scale` (0 answers
+    instantly). A prompt that was never recorded raises `CassetteMissError`, or
+    with `fallback` gets the next recording of the same kind of call, so that a
+    changed prompt can still be benchmarked against realistic responses.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        inner: Optional[LLMClient] = None,
+        latency_scale: float = 1.0,
+        fallback: bool = False,
+    ):
+        self.path = path
+        self.inner = inner
+        self.latency_scale = latency_scale
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = 0
+        self._by_key: Dict[str, Deque[dict]] = defaultdict(deque)
+        self._by_signature: Dict[str, Deque[dict]] = defaultdict(deque)
+        self._model = inner.model() if inner else "cassette"
+        if inner is None:
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.inner is not None
+
+    def name(self) -> str:
+        return "cassette"
+
+    def model(self) -> str:
+        return self._model
+
+    def retry_after(self, model: Optional[str] = None) -> int:
+        return self.inner.retry_after(model) if self.inner else 0
+
+    def base_urls(self) -> list[str]:
+        return self.inner.base_urls() if self.inner else []
+
+    async def generate(
+        self,
+        prompt_payload: PromptPayload,
+        tools: list[dict] = None,
+        output_schema: dict = None,
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+    ) -> LLMResult:
+        key = prompt_key(prompt_payload, tools, output_schema, model)
+        signature = call_signature(tools, output_schema, model)
+        if self.recording:
+            result = await self.inner.generate(
+                prompt_payload, tools, output_schema, temperature, max_tokens, model
+            )
+            self._record(key, signature, result)
+            return result
+
+        result = self._replay(key, signature)
+        await self._sleep(result.timing.latency_ms)
+        return result
+
+    async def stream(
+        self,
+        prompt_payload: PromptPayload,
+        tools: list[dict] = None,
+        output_schema: dict = None,
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        key = prompt_key(prompt_payload, tools, output_schema, model)
+        signature = call_signature(tools, output_schema, model)
+        if self.recording:
+            async for event in self.inner.stream(
+                prompt_payload, tools, output_schema, temperature, max_tokens, model
+            ):
+                if event.type == "completed":
+                    self._record(key, signature, event.result)
+                yield event
+            return
+
+        result = self._replay(key, signature)
+        timing = result.timing
+        ttft_ms = timing.ttft_ms if timing.ttft_ms is not None else timing.latency_ms
+        chunks = [
+            result.text[i : i + _STREAM_CHUNK_CHARS]
+            for i in range(0, len(result.text), _STREAM_CHUNK_CHARS)
+        ]
+        await self._sleep(ttft_ms)
+        gap_ms = max(0.0, timing.latency_ms - ttft_ms) / max(1, len(chunks))
+        for i, chunk in enumerate(chunks):
+            if i:
+                await self._sleep(gap_ms)
+            yield LLMStreamEvent(type="text_delta", delta=chunk)
+        for _ in result.tool_calls:
+            yield LLMStreamEvent(type="tool_call_started")
+        yield LLMStreamEvent(type="completed", result=result)
+
+    def _record(self, key: str, signature: str, result: LLMResult) -> None:
+        entry = {
+            "key": key,
+            "signature": signature,
+            "result": result.model_dump(mode="json", exclude={"raw"}),
+        }
+        with _open(self.path, "at") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _replay(self, key: str, signature: str) -> LLMResult:
+        recordings = self._by_key.get(key)
+        if recordings:
+            self.hits += 1
+        else:
+            self.misses += 1
+            recordings = self._by_signature.get(signature) if self.fallback else None
+            if not recordings:
+                raise CassetteMissError(f"No recording for {key} ({signature})")
+        entry = recordings[0]
+        recordings.rotate(-1)
+        result = LLMResult.model_validate(entry["result"])
+        result.timing = LLMTiming(
+            latency_ms=result.timing.latency_ms * self.latency_scale,
+            ttft_ms=(
+                result.timing.ttft_ms * self.latency_scale
+                if result.timing.ttft_ms is not None
+                else None
+            ),
+        )
+        return result
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette {self.path} does not exist")
+        with _open(self.path, "rt") as f:
+            entries: List[dict] = [json.loads(line) for line in f if line.strip()]
+        for entry in entries:
+            self._by_key[entry["key"]].append(entry)
+            self._by_signature[entry["signature"]].append(entry)
+        if entries:
+            self._model = entries[0]["result"].get("model") or self._model
+
+    async def _sleep(self, ms: float) -> None:
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _collapse(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _canonical_json(text: str) -> str:
+    try:
+        return json.dumps(json.loads(text), sort_keys=True)
+    except ValueError:
+        return _collapse(text)
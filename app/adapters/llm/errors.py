@@ -0,0 +1,44 @@
+import openai
+
+
+class ResponseChainExpired(Exception):
+    """The stored `previous_response_id` is missing or expired on the provider."""
+
+
+class LLMUnavailableError(Exception):
+    """The LLM circuit is open; calls are rejected without reaching the provider."""
+
+    def __init__(self, model: str, retry_after: int):
+        super().__init__(f"LLM {model} is unavailable, retry after {retry_after}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class LLMRateLimitedError(Exception):
+    """The provider's rate limits are exhausted for longer than a call may wait."""
+
+    def __init__(self, model: str, retry_after: int):
+        super().__init__(f"LLM {model} is rate limited, retry after {retry_after}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+def is_provider_failure(e: Exception) -> bool:
+    """Whether an error means the provider is unhealthy (timeout, connection error,
+    5xx, open circuit) rather than that the request itself was rejected.
+
+    Anything else, including a bug in our own code, says nothing about the
+    provider's health.
+    """
+    if isinstance(e, (LLMUnavailableError, openai.APIConnectionError)):
+        # APITimeoutError is an APIConnectionError.
+        return True
+    return isinstance(e, openai.APIStatusError) and e.status_code >= 500
+
+
+def should_fail_over(e: Exception) -> bool:
+    """Whether another deployment could serve a call that failed with `e`: the
+    provider failed, or this deployment's rate limits are exhausted."""
+    if isinstance(e, LLMRateLimitedError) or getattr(e, "status_code", None) == 429:
+        return True
+    return is_provider_failure(e)
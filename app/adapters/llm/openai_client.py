@@ -1,15 +1,100 @@
-import json
-from openai import AsyncOpenAI
+import math
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from openai import AsyncOpenAI, BadRequestError, NotFoundError
 from openai.types.responses import Response
 from pydantic import BaseModel
 
-from app.adapters.llm.types import PromptPayload
+from app.adapters.llm.errors import (
+    LLMRateLimitedError,
+    LLMUnavailableError,
+    ResponseChainExpired,
+    is_provider_failure,
+)
+from app.adapters.llm.types import (
+    InputMessage,
+    LLMResult,
+    LLMStreamEvent,
+    LLMTiming,
+    PromptPayload,
+    ToolCall,
+)
+from app.domains.usage import TokenUsage
+from app.services.observability.logging import log_event
+from app.services.reliability.circuit_breaker import CircuitBreaker
+from app.services.orchestration.token_budget import estimate_tokens
+from app.services.reliability.hedging import HedgePolicy, LatencyTracker, hedged
+from app.services.reliability.rate_limit import (
+    BACKEND_HEADER,
+    MODEL_HEADER,
+    RateLimitGovernor,
+)
+from app.services.reliability.retries import retry_after_seconds, with_retries
+
+T = TypeVar("T")
+
+# The Responses API has no "tool" message role; stored tool messages are sent as user input.
+_INPUT_ROLES = {
+    "system": "system",
+    "user": "user",
+    "assistant": "assistant",
+    "tool": "user",
+}
 
 
 class OpenAILLM:
-    def __init__(self, api_key: str, model: str):
+    """LLM adapter for the OpenAI Responses API.
+
+    Retries are handled here with `with_retries` rather than by the SDK, so they
+    compose with hedging: with a `hedge_policy`, a `generate` call that is slower
+    than the policy's percentile of recent latency for the model fires a second
+    identical request, and the first to finish wins.
+
+    Each model has a circuit breaker. Once a model keeps failing, calls to it raise
+    `LLMUnavailableError` straight away instead of waiting out timeouts, until a
+    half-open probe succeeds.
+
+    With a `rate_limiter`, every attempt first reserves a request and the
+    estimated tokens (prompt plus `max_tokens`) with the governor, so calls queue
+    locally instead of running into the provider's 429s. Requests then carry the
+    model in `MODEL_HEADER`, for the shared HTTP client's rate limit hooks. A
+    client serving one of several routed backends names it in `backend`, so its
+    limits are kept apart from other deployments of the same model.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_retries: int = 2,
+        retry_backoff_ms: int = 250,
+        hedge_policy: Optional[HedgePolicy] = None,
+        circuit_open_threshold: int = 5,
+        circuit_reset_seconds: int = 60,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[RateLimitGovernor] = None,
+        backend: Optional[str] = None,
+    ):
         self._model = model
-        self._client = AsyncOpenAI(api_key=api_key)
+        self._client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            http_client=http_client,
+        )
+        self._max_retries = max_retries
+        self._retry_backoff_ms = retry_backoff_ms
+        self._hedge_policy = hedge_policy
+        self._latency = LatencyTracker()
+        self._circuit_open_threshold = circuit_open_threshold
+        self._circuit_reset_seconds = circuit_reset_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._rate_limiter = rate_limiter
+        self._backend = backend
 
     def name(self) -> str:
         return "openai"
@@ -17,7 +102,13 @@ class OpenAILLM:
     def model(self) -> str:
         return self._model
 
-    # TODO: Return custom LLMResult type instead of Response
+    def base_urls(self) -> list[str]:
+        return [str(self._client.base_url)]
+
+    def retry_after(self, model: Optional[str] = None) -> int:
+        """Seconds until the model's circuit lets calls through again, 0 if it does."""
+        return self._breaker(model or self._model).retry_after()
+
     async def generate(
         self,
         prompt_payload: PromptPayload,
@@ -25,27 +116,303 @@ class OpenAILLM:
         output_schema: dict = None,
         temperature: float = 0.7,
         max_tokens: int = 512,
-    ) -> Response:
-        input_payload = prompt_payload.model_dump_json()
+        model: Optional[str] = None,
+    ) -> LLMResult:
+        params = self._build_params(
+            prompt_payload, tools, output_schema, temperature, max_tokens, model
+        )
+        tokens = estimate_tokens(prompt_payload) + max_tokens
+
+        started = time.perf_counter()
+        try:
+            resp = await self._guarded(
+                params["model"], lambda: self._create(params, tokens)
+            )
+            print("Response: ", resp.output_text)
+        except Exception as e:
+            print(e)
+            _raise_if_chain_expired(e, prompt_payload)
+            _raise_if_rate_limited(e, params["model"])
+            raise
+        self._log_usage(resp)
+        return to_llm_result(resp, LLMTiming(latency_ms=_elapsed_ms(started)))
+
+    async def stream(
+        self,
+        prompt_payload: PromptPayload,
+        tools: list[dict] = None,
+        output_schema: dict = None,
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        """Streams the output text as it is generated, then the final result.
+
+        A `tool_call_started` event marks the first output item of each function
+        call.
+        """
+        params = self._build_params(
+            prompt_payload, tools, output_schema, temperature, max_tokens, model
+        )
+        tokens = estimate_tokens(prompt_payload) + max_tokens
+        started = time.perf_counter()
+        ttft_ms = None
+
+        async def attempt():
+            await self._reserve(params["model"], tokens)
+            return await self._client.responses.create(**params, stream=True)
+
+        try:
+            events = await self._guarded(
+                params["model"],
+                lambda: with_retries(
+                    attempt,
+                    max_retries=self._max_retries,
+                    backoff_ms=self._retry_backoff_ms,
+                    on_retry=self._log_retry,
+                ),
+            )
+        except Exception as e:
+            _raise_if_chain_expired(e, prompt_payload)
+            _raise_if_rate_limited(e, params["model"])
+            raise
+        async for event in events:
+            if event.type == "response.output_text.delta":
+                if ttft_ms is None:
+                    ttft_ms = _elapsed_ms(started)
+                yield LLMStreamEvent(type="text_delta", delta=event.delta)
+            elif (
+                event.type == "response.output_item.added"
+                and event.item.type == "function_call"
+            ):
+                yield LLMStreamEvent(type="tool_call_started")
+            elif event.type in ("response.completed", "response.incomplete"):
+                self._log_usage(event.response)
+                timing = LLMTiming(latency_ms=_elapsed_ms(started), ttft_ms=ttft_ms)
+                yield LLMStreamEvent(
+                    type="completed", result=to_llm_result(event.response, timing)
+                )
+
+    def _breaker(self, model: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                self._circuit_open_threshold, self._circuit_reset_seconds
+            )
+            self._breakers[model] = breaker
+        return breaker
+
+    async def _guarded(self, model: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Runs a call through the model's circuit breaker.
+
+        Only provider-side failures (timeouts, connection errors, 5xx) count against
+        the breaker; a 4xx means the provider is up.
+        """
+        breaker = self._breaker(model)
+        if not breaker.allow_request():
+            raise LLMUnavailableError(model, retry_after=breaker.retry_after())
+        try:
+            result = await call()
+        except LLMRateLimitedError:
+            # Shed locally before reaching the provider; says nothing about its health.
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            if is_provider_failure(e):
+                breaker.record_failure()
+                if breaker.is_open():
+                    log_event("llm_circuit_open", model=model)
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
+
+    async def _create(self, params: dict, tokens: int) -> Response:
+        """Calls `responses.create` with retries, hedging slow attempts if enabled.
+
+        The rate limit reservation is made before the attempt is timed, so time
+        spent queued for the limits neither counts as provider latency nor
+        triggers a hedge.
+        """
+        model = params["model"]
+
+        async def attempt() -> Response:
+            await self._reserve(model, tokens)
+            sent = 0
+
+            async def call() -> Response:
+                nonlocal sent
+                sent += 1
+                if sent > 1:
+                    # A hedge is a request of its own and reserves its own share.
+                    await self._reserve(model, tokens)
+                return await self._client.responses.create(**params)
+
+            started = time.perf_counter()
+            if self._hedge_policy is None:
+                resp = await call()
+            else:
+                resp = await hedged(
+                    call,
+                    delay_s=self._hedge_policy.hedge_delay(self._latency, model),
+                    policy=self._hedge_policy,
+                    on_hedge=lambda: log_event("llm_hedge", model=model),
+                )
+            self._latency.record(model, time.perf_counter() - started)
+            return resp
+
+        return await with_retries(
+            attempt,
+            max_retries=self._max_retries,
+            backoff_ms=self._retry_backoff_ms,
+            on_retry=self._log_retry,
+        )
+
+    async def _reserve(self, model: str, tokens: int) -> None:
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire(model, tokens, backend=self._backend)
+
+    def _log_retry(self, attempt: int, e: Exception) -> None:
+        log_event(
+            "llm_retry", model=self._model, attempt=attempt, error=type(e).__name__
+        )
+
+    def _log_usage(self, resp: Response) -> None:
+        """Reports token usage, including prompt-cache hits, for a response."""
+        if resp.usage is None:
+            return
+        usage = token_usage(resp)
+        log_event(
+            "llm_usage",
+            model=resp.model,
+            response_id=resp.id,
+            input_tokens=usage.input_tokens,
+            cached_tokens=usage.cached_tokens,
+            output_tokens=usage.output_tokens,
+        )
+
+    def _build_params(
+        self,
+        prompt_payload: PromptPayload,
+        tools: list[dict] | None,
+        output_schema: dict | None,
+        temperature: float,
+        max_tokens: int,
+        model: Optional[str] = None,
+    ) -> dict:
         params = {
-            "model": self._model,
-            "input": input_payload,
-            "temperature": temperature,
+            "model": model or self._model,
+            "input": to_input_items(prompt_payload),
             "max_output_tokens": max_tokens,
         }
+        if not _is_reasoning_model(params["model"]):
+            # Reasoning models reject a temperature.
+            params["temperature"] = temperature
+        if prompt_payload.previous_response_id:
+            params["previous_response_id"] = prompt_payload.previous_response_id
+            params["truncation"] = "auto"
+        if prompt_payload.prompt_cache_key:
+            params["prompt_cache_key"] = prompt_payload.prompt_cache_key
         if tools:
             params["tools"] = tools
         if output_schema:
             params["text"] = output_schema
-        print("Input: ", json.loads(input_payload))
+        if self._rate_limiter is not None:
+            # Lets the response hook feed this model's rate limits to the governor.
+            params["extra_headers"] = {MODEL_HEADER: params["model"]}
+            if self._backend:
+                params["extra_headers"][BACKEND_HEADER] = self._backend
+        print("Input: ", params["input"])
+        return params
 
-        try:
-            resp = await self._client.responses.create(**params)
-            print("Response: ", resp.output_text)
-        except Exception as e:
-            print(e)
-            raise
-        return resp
+
+def _is_reasoning_model(model: str) -> bool:
+    m = model.lower()
+    return m.startswith(("o1", "o3", "o4")) or "reasoning" in m
+
+
+def to_llm_result(resp: Response, timing: LLMTiming) -> LLMResult:
+    """Converts a Responses API response into an `LLMResult`."""
+    tool_calls = [
+        ToolCall(call_id=item.call_id, name=item.name, arguments=item.arguments)
+        for item in resp.output
+        if item.type == "function_call"
+    ]
+    if tool_calls:
+        finish_reason = "tool_calls"
+    elif resp.status == "incomplete" and resp.incomplete_details:
+        finish_reason = resp.incomplete_details.reason
+    else:
+        finish_reason = "stop"
+    return LLMResult(
+        text=resp.output_text,
+        finish_reason=finish_reason,
+        response_id=resp.id,
+        model=resp.model,
+        tool_calls=tool_calls,
+        usage=token_usage(resp),
+        timing=timing,
+        raw={"id": resp.id, "status": resp.status},
+    )
+
+
+def token_usage(resp: Response) -> TokenUsage:
+    """Returns the token usage of a response, counted as one LLM call."""
+    usage = resp.usage
+    if usage is None:
+        return TokenUsage(llm_calls=1)
+    details = usage.input_tokens_details
+    return TokenUsage(
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cached_tokens=(details.cached_tokens or 0) if details else 0,
+        llm_calls=1,
+    )
+
+
+def _raise_if_rate_limited(e: Exception, model: str) -> None:
+    """Re-raises a provider 429 that outlasted the retries as `LLMRateLimitedError`."""
+    if getattr(e, "status_code", None) == 429:
+        retry_after = max(1, math.ceil(retry_after_seconds(e)))
+        raise LLMRateLimitedError(model, retry_after=retry_after) from e
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+def to_input_items(prompt_payload: PromptPayload) -> list[dict]:
+    """Maps the prompt messages to native Responses API input items.
+
+    Messages become role-typed input messages, and function calls and their
+    outputs become `function_call` / `function_call_output` items, so the model
+    sees a real conversation rather than one JSON-encoded user blob.
+    """
+    items = []
+    for message in prompt_payload.messages:
+        if isinstance(message, InputMessage):
+            items.append(
+                {"role": _INPUT_ROLES[message.role], "content": message.content}
+            )
+        else:
+            items.append(message.model_dump())
+    return items
+
+
+def _raise_if_chain_expired(e: Exception, prompt_payload: PromptPayload) -> None:
+    """Maps a rejected `previous_response_id` to `ResponseChainExpired`."""
+    if not prompt_payload.previous_response_id:
+        return
+    if not isinstance(e, (BadRequestError, NotFoundError)):
+        return
+    if getattr(e, "param", None) == "previous_response_id" or (
+        "previous response" in str(e).lower()
+    ):
+        raise ResponseChainExpired(str(e)) from e
 
 
 def _base_model_to_json_schema(base_model: BaseModel) -> dict:
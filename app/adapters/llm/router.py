@@ -0,0 +1,209 @@
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, List, Optional
+
+from app.adapters.llm.errors import ResponseChainExpired, should_fail_over
+from app.adapters.llm.types import PromptPayload
+from app.services.observability.logging import log_event
+
+
+@dataclass
+class RoutedBackend:
+    """One LLM deployment the router can send calls to."""
+
+    name: str
+    client: Any
+    weight: float = 1.0
+
+
+class BackendStats:
+    """Moving window of a backend's time to first token, total latency and errors."""
+
+    def __init__(self, window: int = 50):
+        self.ttft: Deque[float] = deque(maxlen=window)
+        self.latency: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+
+    def record_success(self, latency_s: float, ttft_s: Optional[float] = None) -> None:
+        self.latency.append(latency_s)
+        self.ttft.append(latency_s if ttft_s is None else ttft_s)
+        self.outcomes.append(True)
+
+    def record_failure(self) -> None:
+        self.outcomes.append(False)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        return sum(self.latency) / len(self.latency) if self.latency else None
+
+    @property
+    def mean_ttft(self) -> Optional[float]:
+        return sum(self.ttft) / len(self.ttft) if self.ttft else None
+
+
+class RoutingLLM:
+    """Routes each LLM call to the fastest healthy backend, failing over to the next.
+
+    Backends are ranked by their mean latency over a moving window (time to first
+    token for streams), divided by their weight. Backends that have not been
+    measured yet rank first so they get measured. A backend is skipped while its
+    circuit is open or its error rate is above `max_error_rate`. A small share of
+    calls (`explore_ratio`) goes to another backend whose circuit is closed, so a
+    deployment that was slow or failing for a while is not shunned forever.
+
+    Calls that fail on the provider side or hit a backend's rate limits are
+    retried on the next backend. Other client errors (4xx, an expired response
+    chain) are raised straight away, since another backend would reject the same
+    request.
+
+    A response id is only valid on the backend that issued it, so a call chained
+    from `previous_response_backend` only goes to that backend. If it is
+    unavailable or fails, `ResponseChainExpired` is raised without trying another
+    backend, and the caller rebuilds the full prompt. Results carry the name of
+    the backend that served them in `backend`.
+    """
+
+    def __init__(
+        self,
+        backends: List[RoutedBackend],
+        window: int = 50,
+        max_error_rate: float = 0.5,
+        explore_ratio: float = 0.05,
+        rng: Optional[random.Random] = None,
+    ):
+        if not backends:
+            raise ValueError("RoutingLLM needs at least one backend")
+        self.backends = backends
+        self.max_error_rate = max_error_rate
+        self.explore_ratio = explore_ratio
+        self.stats = {b.name: BackendStats(window) for b in backends}
+        self._rng = rng or random.Random()
+
+    def name(self) -> str:
+        return "router"
+
+    def model(self) -> str:
+        return self.ranked()[0].client.model()
+
+    def base_urls(self) -> List[str]:
+        return [url for b in self.backends for url in b.client.base_urls()]
+
+    def retry_after(self, model: Optional[str] = None) -> int:
+        return min(b.client.retry_after(model) for b in self.backends)
+
+    def ranked(
+        self, streaming: bool = False, model: Optional[str] = None
+    ) -> List[RoutedBackend]:
+        """Orders the backends for a call: healthy ones first, fastest first."""
+
+        def score(backend: RoutedBackend) -> float:
+            stats = self.stats[backend.name]
+            observed = stats.mean_ttft if streaming else stats.mean_latency
+            return (observed or 0.0) / max(backend.weight, 1e-6)
+
+        candidates = sorted(self.backends, key=score)
+        available = [b for b in candidates if not b.client.retry_after(model)]
+        healthy = [
+            b
+            for b in available
+            if self.stats[b.name].error_rate <= self.max_error_rate
+        ]
+        ranked = healthy + [b for b in candidates if b not in healthy]
+
+        if len(available) > 1 and self._rng.random() < self.explore_ratio:
+            explored = self._rng.choice([b for b in available if b is not ranked[0]])
+            ranked.remove(explored)
+            ranked.insert(0, explored)
+        return ranked
+
+    def _candidates(
+        self, prompt_payload: PromptPayload, streaming: bool, model: Optional[str]
+    ) -> List[RoutedBackend]:
+        ranked = self.ranked(streaming, model)
+        if not prompt_payload.previous_response_id:
+            return ranked
+        candidates = [
+            b
+            for b in ranked
+            if b.name == prompt_payload.previous_response_backend
+            and not b.client.retry_after(model)
+        ]
+        if not candidates:
+            raise ResponseChainExpired(
+                f"{prompt_payload.previous_response_id} was issued by backend "
+                f"{prompt_payload.previous_response_backend}, which is unavailable"
+            )
+        return candidates
+
+    def _chain_broken(self, prompt_payload: PromptPayload, e: Exception) -> Exception:
+        """The error to raise once every candidate failed with `e`."""
+        if prompt_payload.previous_response_id:
+            return ResponseChainExpired(
+                f"{prompt_payload.previous_response_id} failed on backend "
+                f"{prompt_payload.previous_response_backend}: {type(e).__name__}"
+            )
+        return e
+
+    async def generate(self, prompt_payload: PromptPayload, **kwargs):
+        last_error: Optional[Exception] = None
+        for backend in self._candidates(prompt_payload, False, kwargs.get("model")):
+            started = time.perf_counter()
+            try:
+                result = await backend.client.generate(
+                    prompt_payload=prompt_payload, **kwargs
+                )
+            except Exception as e:
+                if not should_fail_over(e):
+                    raise
+                self._record_failure(backend, e)
+                last_error = e
+                continue
+            self.stats[backend.name].record_success(time.perf_counter() - started)
+            result.backend = backend.name
+            return result
+        raise self._chain_broken(prompt_payload, last_error) from last_error
+
+    async def stream(
+        self, prompt_payload: PromptPayload, **kwargs
+    ) -> AsyncIterator[Any]:
+        """Streams from the best backend. Failover only happens before the first
+        event, since events already yielded cannot be taken back."""
+        last_error: Optional[Exception] = None
+        for backend in self._candidates(prompt_payload, True, kwargs.get("model")):
+            started = time.perf_counter()
+            ttft = None
+            try:
+                async for event in backend.client.stream(
+                    prompt_payload=prompt_payload, **kwargs
+                ):
+                    if ttft is None:
+                        ttft = time.perf_counter() - started
+                    if event.type == "completed":
+                        event.result.backend = backend.name
+                    yield event
+            except Exception as e:
+                if ttft is not None or not should_fail_over(e):
+                    if ttft is not None:
+                        self.stats[backend.name].record_failure()
+                    raise
+                self._record_failure(backend, e)
+                last_error = e
+                continue
+            self.stats[backend.name].record_success(
+                time.perf_counter() - started, ttft
+            )
+            return
+        raise self._chain_broken(prompt_payload, last_error) from last_error
+
+    def _record_failure(self, backend: RoutedBackend, e: Exception) -> None:
+        self.stats[backend.name].record_failure()
+        log_event("llm_failover", backend=backend.name, error=type(e).__name__)
+
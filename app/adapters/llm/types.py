@@ -1,6 +1,8 @@
 from typing import Optional, Dict, Literal
 from pydantic import BaseModel, Field
 
+from app.domains.usage import TokenUsage
+
 
 class InputMessage(BaseModel):
     role: Literal["system", "user", "assistant", "tool"]
@@ -22,9 +24,42 @@ class FunctionCallOutput(BaseModel):
 
 class PromptPayload(BaseModel):
     messages: list[InputMessage | FunctionCall | FunctionCallOutput]
+    previous_response_id: Optional[str] = None
+    # The routed backend that issued previous_response_id, when there is one.
+    previous_response_backend: Optional[str] = None
+    prompt_cache_key: Optional[str] = None
+
+
+class ToolCall(BaseModel):
+    """A function call requested by the model."""
+
+    call_id: str
+    name: str
+    arguments: str
+
+
+class LLMTiming(BaseModel):
+    latency_ms: float = 0.0
+    ttft_ms: Optional[float] = None
 
 
 class LLMResult(BaseModel):
     text: str
     finish_reason: Optional[str] = None
+    response_id: Optional[str] = None
+    model: Optional[str] = None
+    # The routed backend that served the call, set by RoutingLLM.
+    backend: Optional[str] = None
+    tool_calls: list[ToolCall] = Field(default_factory=list)
+    usage: TokenUsage = Field(default_factory=TokenUsage)
+    timing: LLMTiming = Field(default_factory=LLMTiming)
     raw: Dict = Field(default_factory=dict)
+
+
+class LLMStreamEvent(BaseModel):
+    """A streamed narration delta, the start of a tool call, or the final result
+    once the call completes."""
+
+    type: Literal["text_delta", "tool_call_started", "completed"]
+    delta: str = ""
+    result: Optional[LLMResult] = None
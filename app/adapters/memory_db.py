@@ -0,0 +1,126 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.settings import get_settings
+
+SEED_TABLES = ("adventures", "races", "classes", "backgrounds", "characters")
+
+
+def to_jsonb(value: Any) -> Any:
+    """Round-trips a value through JSON, as a JSONB column would store it."""
+    return json.loads(json.dumps(value))
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class MemoryStore:
+    """The tables of the in-memory repository backend.
+
+    Rows are plain dicts keyed like the SQL columns, so the SQL repos' row
+    mappers can turn them into domain objects. Messages are kept per session in
+    `message_id` order; ids come from one store-wide counter that, like a
+    Postgres sequence, is not rolled back.
+    """
+
+    def __init__(self):
+        self.adventures: List[dict] = []
+        self.races: Dict[str, dict] = {}
+        self.classes: Dict[str, dict] = {}
+        self.backgrounds: Dict[str, dict] = {}
+        self.characters: Dict[str, dict] = {}
+        self.sessions: Dict[str, dict] = {}
+        self.messages: Dict[str, List[dict]] = {}
+        self.session_usage: Dict[str, dict] = {}
+        self.user_usage: Dict[str, dict] = {}
+        self._last_message_id = 0
+
+    def next_message_id(self) -> int:
+        self._last_message_id += 1
+        return self._last_message_id
+
+    def session(self) -> "MemorySession":
+        return MemorySession(self)
+
+    def seed(self, data: dict) -> None:
+        """Loads rows shaped like the SQL tables, e.g. from a JSON seed file.
+
+        `characters` rows carry the owning `user_id`.
+        """
+        unknown = set(data) - set(SEED_TABLES)
+        if unknown:
+            raise ValueError(f"Unknown seed tables: {', '.join(sorted(unknown))}")
+        now = utcnow()
+        for row in data.get("adventures", []):
+            self.adventures.append(to_jsonb(row))
+        for table in ("races", "classes", "backgrounds"):
+            rows = getattr(self, table)
+            for row in data.get(table, []):
+                rows[str(row["id"])] = to_jsonb(row)
+        for row in data.get("characters", []):
+            self.characters[str(row["id"])] = {
+                "created_at": now,
+                "updated_at": now,
+                **to_jsonb(row),
+            }
+
+    def load_seed(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            self.seed(json.load(f))
+
+
+class MemorySession:
+    """Stands in for an `AsyncSession` over a `MemoryStore`.
+
+    Writes are applied to the store straight away and are visible to every
+    session; each one records how to undo it, so `rollback` restores the rows
+    written since the last `commit`. There is no isolation between sessions.
+    """
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+        self._undo: List[Callable[[], None]] = []
+
+    def insert(self, table: Dict[str, dict], key: str, row: dict) -> dict:
+        table[key] = row
+        self._undo.append(lambda: table.pop(key, None))
+        return row
+
+    def append(self, rows: List[dict], row: dict) -> dict:
+        rows.append(row)
+        self._undo.append(lambda: rows.remove(row))
+        return row
+
+    def update(self, row: dict, **values: Any) -> None:
+        previous = {column: row.get(column) for column in values}
+        row.update(values)
+        self._undo.append(lambda: row.update(previous))
+
+    def in_transaction(self) -> bool:
+        return bool(self._undo)
+
+    async def commit(self) -> None:
+        self._undo.clear()
+
+    async def rollback(self) -> None:
+        while self._undo:
+            self._undo.pop()()
+
+    async def close(self) -> None:
+        await self.rollback()
+
+
+_store: Optional[MemoryStore] = None
+
+
+def get_memory_store() -> MemoryStore:
+    """Returns the process-wide store, seeded from `repo_memory_seed_path`."""
+    global _store
+    if _store is None:
+        _store = MemoryStore()
+        seed_path = get_settings().repo_memory_seed_path
+        if seed_path:
+            _store.load_seed(seed_path)
+    return _store
@@ -1,11 +1,16 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Request
+import json
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import NoResultFound
 
-from app.adapters.llm.openai_client import OpenAILLM
+from app.adapters.llm.errors import LLMRateLimitedError, LLMUnavailableError
+from app.adapters.llm.base import LLMClient
 from app.adapters.db import get_db_session
 from app.dependencies.auth import require_user_id
+from app.domains.chat import TurnDelta
 from app.schemas.chat import (
     MessageHistoryOut,
     MessageOut,
@@ -13,47 +18,63 @@ from app.schemas.chat import (
     SessionOut,
     SessionIn,
 )
-from app.repos.adventure_repo import AdventureRepo
-from app.repos.character_repo import CharacterRepo
-from app.repos.chat_repo import ChatRepo
+from app.domains.adventures import AdventureRepoProtocol
+from app.domains.character import CharacterRepoProtocol
+from app.domains.chat import ChatRepoProtocol
+from app.domains.usage import UsageRepoProtocol
+from app.repos.factory import (
+    adventure_repo_for,
+    character_repo_for,
+    chat_repo_for,
+    usage_repo_for,
+)
 from app.services.chat.chat_service import ChatService
+from app.services.chat.history_summarizer import run_history_summarizer
 
 chat_router = APIRouter(prefix="/chat", tags=["chat"])
 
 
-def get_llm(request: Request) -> OpenAILLM:
+def get_llm(request: Request) -> LLMClient:
     return request.app.state.llm
 
 
 def get_adventure_repo(
     db_session: AsyncSession = Depends(get_db_session),
-) -> AdventureRepo:
-    return AdventureRepo(db_session)
+) -> AdventureRepoProtocol:
+    return adventure_repo_for(db_session)
 
 
 def get_character_repo(
     db_session: AsyncSession = Depends(get_db_session),
-) -> CharacterRepo:
-    return CharacterRepo(db_session)
+) -> CharacterRepoProtocol:
+    return character_repo_for(db_session)
 
 
 def get_chat_repo(
     db_session: AsyncSession = Depends(get_db_session),
-) -> ChatRepo:
-    return ChatRepo(db_session)
+) -> ChatRepoProtocol:
+    return chat_repo_for(db_session)
+
+
+def get_usage_repo(
+    db_session: AsyncSession = Depends(get_db_session),
+) -> UsageRepoProtocol:
+    return usage_repo_for(db_session)
 
 
 def get_chat_service(
-    llm: OpenAILLM = Depends(get_llm),
-    adventure_repo: AdventureRepo = Depends(get_adventure_repo),
-    character_repo: CharacterRepo = Depends(get_character_repo),
-    chat_repo: ChatRepo = Depends(get_chat_repo),
+    llm: LLMClient = Depends(get_llm),
+    adventure_repo: AdventureRepoProtocol = Depends(get_adventure_repo),
+    character_repo: CharacterRepoProtocol = Depends(get_character_repo),
+    chat_repo: ChatRepoProtocol = Depends(get_chat_repo),
+    usage_repo: UsageRepoProtocol = Depends(get_usage_repo),
 ) -> ChatService:
     return ChatService(
         llm=llm,
         adventure_repo=adventure_repo,
         character_repo=character_repo,
         chat_repo=chat_repo,
+        usage_repo=usage_repo,
     )
 
 
@@ -61,7 +82,7 @@ def get_chat_service(
 async def session(
     session_id: str,
     user_id: str = Depends(require_user_id),
-    chat_repo: ChatRepo = Depends(get_chat_repo),
+    chat_repo: ChatRepoProtocol = Depends(get_chat_repo),
 ):
     s = await chat_repo.get_session(user_id, session_id)
     return SessionOut.model_validate(s)
@@ -84,7 +105,7 @@ async def history(
     after: Optional[int] = None,
     limit: int = 50,
     user_id: str = Depends(require_user_id),
-    chat_repo: ChatRepo = Depends(get_chat_repo),
+    chat_repo: ChatRepoProtocol = Depends(get_chat_repo),
 ):
     try:
         await chat_repo.assert_owned_session(user_id, session_id)
@@ -113,6 +134,7 @@ async def history(
 async def send_message(
     session_id: str,
     payload: SendMessageIn,
+    background_tasks: BackgroundTasks,
     user_id: str = Depends(require_user_id),
     chat_service: ChatService = Depends(get_chat_service),
 ):
@@ -122,9 +144,91 @@ async def send_message(
             session_id=session_id,
             user_text=payload.message,
         )
+        background_tasks.add_task(
+            run_history_summarizer, chat_service.llm, user_id, session_id
+        )
         return MessageOut.model_validate(msg)
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
+    except LLMRateLimitedError as e:
+        raise _llm_rate_limited(e)
     except Exception as e:
         print(e)
         raise HTTPException(
             status_code=500, detail=f"LLM generation failed: {type(e).__name__}: {e}"
         )
+
+
+def _llm_unavailable(e: LLMUnavailableError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="The Dungeon Master is unavailable, please try again shortly.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _llm_rate_limited(e: LLMRateLimitedError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="The Dungeon Master is busy, please try again shortly.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@chat_router.post("/sessions/{session_id}/message/stream")
+async def stream_message(
+    session_id: str,
+    payload: SendMessageIn,
+    user_id: str = Depends(require_user_id),
+    chat_service: ChatService = Depends(get_chat_service),
+):
+    """Sends a message and streams the DM's narration back as Server-Sent Events.
+
+    Emits `delta` events carrying narration text as it is generated, then a single
+    `message` event with the persisted assistant message (or an `error` event). A
+    `reset` event tells the client to clear the narration received so far, which
+    the model replaces after calling a tool.
+    """
+    try:
+        chat_service.check_llm_available()
+    except LLMUnavailableError as e:
+        raise _llm_unavailable(e)
+
+    completed = False
+
+    async def event_stream() -> AsyncIterator[str]:
+        nonlocal completed
+        try:
+            async for item in chat_service.stream_turn(
+                user_id=user_id,
+                session_id=session_id,
+                user_text=payload.message,
+            ):
+                if isinstance(item, TurnDelta) and item.reset:
+                    yield _sse("reset", "{}")
+                elif isinstance(item, TurnDelta):
+                    yield _sse("delta", json.dumps({"text": item.text}))
+                else:
+                    message_out = MessageOut.model_validate(item)
+                    completed = True
+                    yield _sse("message", message_out.model_dump_json(by_alias=True))
+        except Exception as e:
+            print(e)
+            detail = f"LLM generation failed: {type(e).__name__}: {e}"
+            yield _sse("error", json.dumps({"detail": detail}))
+
+    async def summarize_history() -> None:
+        # A failed turn added no messages to summarize.
+        if completed:
+            await run_history_summarizer(chat_service.llm, user_id, session_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(summarize_history),
+    )
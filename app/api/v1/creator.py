@@ -5,8 +5,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.adapters.db import get_db_session
 from app.dependencies.auth import require_user_id
+from app.domains.creator import CreatorRepoProtocol
 from app.mappers.creator_mappers import create_character_in_to_command
-from app.repos.creator_repo import CreatorRepo
+from app.repos.factory import creator_repo_for
 from app.schemas.creator import BackgroundOut, ClassOut, CreateCharacterIn, RaceOut
 from app.schemas.character import CharacterOut
 from app.services.character.create_character_service import CreateCharacterService
@@ -16,30 +17,30 @@ router = APIRouter(prefix="/creator", tags=["creator"])
 
 def get_creator_repo(
     db_session: AsyncSession = Depends(get_db_session),
-) -> CreatorRepo:
-    return CreatorRepo(db_session)
+) -> CreatorRepoProtocol:
+    return creator_repo_for(db_session)
 
 
 def get_create_character_service(
-    creator_repo: CreatorRepo = Depends(get_creator_repo),
+    creator_repo: CreatorRepoProtocol = Depends(get_creator_repo),
 ) -> CreateCharacterService:
     return CreateCharacterService(creator_repo)
 
 
 @router.get("/races", response_model=List[RaceOut])
-async def get_races(creator_repo: CreatorRepo = Depends(get_creator_repo)):
+async def get_races(creator_repo: CreatorRepoProtocol = Depends(get_creator_repo)):
     races = await creator_repo.list_races()
     return [RaceOut.model_validate(r) for r in races]
 
 
 @router.get("/classes", response_model=List[ClassOut])
-async def get_classes(creator_repo: CreatorRepo = Depends(get_creator_repo)):
+async def get_classes(creator_repo: CreatorRepoProtocol = Depends(get_creator_repo)):
     classes = await creator_repo.list_classes()
     return [ClassOut.model_validate(c) for c in classes]
 
 
 @router.get("/backgrounds", response_model=List[BackgroundOut])
-async def get_backgrounds(creator_repo: CreatorRepo = Depends(get_creator_repo)):
+async def get_backgrounds(creator_repo: CreatorRepoProtocol = Depends(get_creator_repo)):
     backgrounds = await creator_repo.list_backgrounds()
     return [BackgroundOut.model_validate(b) for b in backgrounds]
 
@@ -1,6 +1,8 @@
 from datetime import datetime, timezone
 from fastapi import APIRouter
 from pydantic import BaseModel
+from app.adapters.http_pool import pool_stats
+from app.services.observability.metrics import metrics
 from app.settings import get_settings
 
 router = APIRouter(tags=["health"])
@@ -24,3 +26,15 @@ async def health() -> HealthResponse:
         time=datetime.now(timezone.utc).isoformat(),
         env=s.env,
     )
+
+
+@router.get("/health/pool")
+async def pool() -> dict:
+    """Connection pool usage of the shared LLM HTTP client."""
+    return pool_stats()
+
+
+@router.get("/health/metrics")
+async def metrics_snapshot() -> dict:
+    """In-process counters and latency percentiles, e.g. per turn phase."""
+    return metrics.snapshot()
@@ -1,4 +1,8 @@
 from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
 
 @dataclass
 class AdventureStatus:
@@ -13,3 +17,9 @@ class Adventure:
     title: str
     story_brief: str
     starting_status: AdventureStatus
+
+
+class AdventureRepoProtocol(Protocol):
+    db_session: AsyncSession
+
+    async def list_adventures(self) -> list[Adventure]: ...
@@ -1,5 +1,7 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domains.character_common import (
     AbilityKey,
@@ -42,3 +44,18 @@ class Character:
     features: List[Feature] = field(default_factory=list)
     inventory: List[Item] = field(default_factory=list)
     spellcasting: Optional[Spellcasting] = None
+
+
+class CharacterRepoProtocol(Protocol):
+    db_session: AsyncSession
+
+    async def list_characters_for_user(self, user_id: str) -> list[Character]: ...
+    async def get_character_by_character_id(
+        self, user_id: str, id: str
+    ) -> Optional[Character]: ...
+    async def get_character_by_session_id(
+        self, user_id: str, session_id: str
+    ) -> Optional[Character]: ...
+    async def update_character_inventory(
+        self, character_id: str, inventory: list[Item]
+    ) -> None: ...
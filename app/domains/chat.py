@@ -1,7 +1,11 @@
-from dataclasses import dataclass
-from typing import Literal, Optional
+from dataclasses import dataclass, field
+from typing import List, Literal, Optional, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domains.adventures import AdventureStatus
+from app.domains.character import Character
+from app.domains.usage import TokenUsage
 
 
 @dataclass
@@ -22,3 +26,89 @@ class Session:
     created_at: str
     updated_at: str
     archived_at: Optional[str]
+    last_response_id: Optional[str] = None
+    last_response_backend: Optional[str] = None
+    response_chain_length: int = 0
+    rolling_summary: Optional[str] = None
+    summarized_through_message_id: Optional[int] = None
+
+
+@dataclass
+class TurnDelta:
+    """A fragment of the assistant's narration emitted while a turn streams.
+
+    With `reset` set, the narration streamed so far in the turn is void and the
+    client should clear it before showing the deltas that follow.
+    """
+
+    text: str
+    reset: bool = False
+
+
+@dataclass
+class TurnContext:
+    """Everything a chat turn needs from storage, loaded in one round trip."""
+
+    session: Session
+    character: Character
+    messages: List[Message] = field(default_factory=list)
+    user_message: Optional[Message] = None
+
+
+class ChatRepoProtocol(Protocol):
+    db_session: AsyncSession
+
+    async def assert_owned_session(self, user_id: str, session_id: str) -> None: ...
+    async def assert_owned_character(
+        self, user_id: str, character_id: str
+    ) -> None: ...
+    async def get_session(self, user_id: str, session_id: str) -> Optional[Session]: ...
+    async def get_session_by_id(self, session_id: str) -> Session: ...
+    async def get_session_for_character(
+        self, user_id: str, character_id: str
+    ) -> Optional[Session]: ...
+    async def create_session(
+        self,
+        user_id: str,
+        character_id: str,
+        adventure_title: str,
+        story_brief: str,
+        adventure_status: AdventureStatus,
+    ) -> Session: ...
+    async def update_session_adventure_status(
+        self, session_id: str, adventure_status: AdventureStatus
+    ) -> None: ...
+    async def update_session_response_chain(
+        self,
+        session_id: str,
+        response_id: Optional[str],
+        chain_length: int,
+        backend: Optional[str] = None,
+    ) -> None: ...
+    async def update_session_summary(
+        self,
+        session_id: str,
+        rolling_summary: str,
+        summarized_through_message_id: int,
+        previous_through_message_id: Optional[int],
+    ) -> bool: ...
+    async def list_messages_outside_window(
+        self, session_id: str, after: Optional[int], window: int, limit: int
+    ) -> List[Message]: ...
+    async def list_messages(
+        self, session_id: str, after: Optional[int] = None, limit: int = 10
+    ) -> List[Message]: ...
+    async def load_turn_context(
+        self,
+        user_id: str,
+        session_id: str,
+        user_text: Optional[str] = None,
+        history_limit: int = 10,
+    ) -> TurnContext: ...
+    async def count_total_messages(self, session_id: str) -> int: ...
+    async def insert_user_message_row(
+        self, session_id: str, content: str
+    ) -> Message: ...
+    async def insert_assistant_message_row(
+        self, session_id: str, content: str, usage: Optional[TokenUsage] = None
+    ) -> Message: ...
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass
+class TokenUsage:
+    """Token counts of one or more LLM calls."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    llm_calls: int = 0
+
+    def add(self, other: "TokenUsage") -> None:
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cached_tokens += other.cached_tokens
+        self.llm_calls += other.llm_calls
+
+
+@dataclass
+class UsageTotals:
+    """Running usage totals for a session or a user."""
+
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    llm_calls: int
+    turns: int
+    updated_at: str
+
+
+class UsageRepoProtocol(Protocol):
+    db_session: AsyncSession
+
+    async def record_usage(
+        self, user_id: str, session_id: str, usage: TokenUsage, turns: int = 1
+    ) -> None: ...
+    async def get_session_usage(self, session_id: str) -> Optional[UsageTotals]: ...
+    async def get_user_usage(self, user_id: str) -> Optional[UsageTotals]: ...
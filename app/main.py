@@ -1,7 +1,9 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.settings import get_settings
+from app.settings import Settings, get_settings
 from app.api.v1.health import router as health_router
 from app.api.v1.auth import router as auth_router
 from app.api.v1.characters import router as characters_router
@@ -9,13 +11,90 @@ from app.api.v1.creator import router as creator_router
 from app.api.v1.chat import chat_router
 
 from app.services.observability.trace import trace_middleware
+from app.adapters.http_pool import close_http_client, get_http_client, warmup
+from app.adapters.llm.base import LLMClient
 from app.adapters.llm.openai_client import OpenAILLM
+from app.adapters.llm.router import RoutedBackend, RoutingLLM
+from app.services.reliability.hedging import HedgePolicy
+from app.services.reliability.rate_limit import configure_governor
+
+
+def build_llm(settings: Settings) -> LLMClient:
+    """Builds the LLM client, routing across `llm_backends` when any are configured."""
+    hedge_policy = None
+    if settings.llm_hedge_enabled:
+        hedge_policy = HedgePolicy(
+            percentile=settings.llm_hedge_percentile,
+            max_hedges_per_minute=settings.llm_hedge_max_per_minute,
+            min_delay_s=settings.llm_hedge_min_delay_ms / 1000,
+            min_samples=settings.llm_hedge_min_samples,
+        )
+
+    rate_limiter = None
+    if settings.llm_rate_limit_enabled:
+        rate_limiter = configure_governor(
+            store_path=settings.llm_rate_limit_store_path,
+            max_wait_s=settings.llm_rate_limit_max_wait_seconds,
+        )
+
+    def openai_llm(
+        model: str,
+        api_key: str,
+        base_url: str | None = None,
+        backend: str | None = None,
+    ):
+        return OpenAILLM(
+            api_key=api_key,
+            model=model,
+            max_retries=settings.llm_max_retries,
+            retry_backoff_ms=settings.llm_retry_backoff_ms,
+            hedge_policy=hedge_policy,
+            circuit_open_threshold=settings.llm_circuit_open_threshold,
+            circuit_reset_seconds=settings.llm_circuit_reset_sec,
+            base_url=base_url,
+            http_client=get_http_client(),
+            rate_limiter=rate_limiter,
+            backend=backend,
+        )
+
+    if not settings.llm_backends:
+        return openai_llm(settings.llm_model, settings.openai_api_key)
+
+    return RoutingLLM(
+        [
+            RoutedBackend(
+                name=backend.name,
+                client=openai_llm(
+                    backend.model or settings.llm_model,
+                    backend.api_key or settings.openai_api_key,
+                    backend.base_url,
+                    backend.name,
+                ),
+                weight=backend.weight,
+            )
+            for backend in settings.llm_backends
+        ],
+        window=settings.llm_router_window,
+        max_error_rate=settings.llm_router_max_error_rate,
+        explore_ratio=settings.llm_router_explore_ratio,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    if settings.llm_http_warmup_connections > 0:
+        await warmup(app.state.llm.base_urls(), settings.llm_http_warmup_connections)
+    yield
+    await close_http_client()
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
 
-    app = FastAPI(title=settings.project_name, version=settings.version)
+    app = FastAPI(
+        title=settings.project_name, version=settings.version, lifespan=lifespan
+    )
 
     app.add_middleware(
         CORSMiddleware,
@@ -36,10 +115,7 @@ def create_app() -> FastAPI:
     #     print("Using NoOpLLM")
     #     app.state.llm = NoOpLLM()
 
-    app.state.llm = OpenAILLM(
-        api_key=settings.openai_api_key,
-        model=settings.llm_model,
-    )
+    app.state.llm = build_llm(settings)
 
     app.include_router(health_router, prefix=settings.api_v1_prefix)
     app.include_router(auth_router, prefix=settings.api_v1_prefix)
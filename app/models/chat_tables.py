@@ -33,6 +33,11 @@ chat_sessions = Table(
     Column("adventure_title", Text, nullable=False),
     Column("story_brief", Text, nullable=False),
     Column("adventure_status", JSONB, nullable=False),
+    Column("last_response_id", Text, nullable=True),
+    Column("last_response_backend", Text, nullable=True),
+    Column("response_chain_length", Integer, nullable=False, server_default="0"),
+    Column("rolling_summary", Text, nullable=True),
+    Column("summarized_through_message_id", BigInteger, nullable=True),
     Column("created_at", DateTime(timezone=True), nullable=False),
     Column("updated_at", DateTime(timezone=True), nullable=False),
     Column("archived_at", DateTime(timezone=True), nullable=True),
@@ -56,6 +61,7 @@ chat_messages = Table(
     Column("tool_result", JSONB),
     Column("tokens_in", Integer),
     Column("tokens_out", Integer),
+    Column("tokens_cached", Integer),
     Column("created_at", DateTime(timezone=True), nullable=False),
     schema="public",
 )
@@ -0,0 +1,43 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Table, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.adapters.db import metadata
+
+
+def _usage_columns() -> list[Column]:
+    return [
+        Column("input_tokens", BigInteger, nullable=False, server_default="0"),
+        Column("output_tokens", BigInteger, nullable=False, server_default="0"),
+        Column("cached_tokens", BigInteger, nullable=False, server_default="0"),
+        Column("llm_calls", BigInteger, nullable=False, server_default="0"),
+        Column("turns", BigInteger, nullable=False, server_default="0"),
+        Column(
+            "updated_at",
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=text("now()"),
+        ),
+    ]
+
+
+session_usage = Table(
+    "session_usage",
+    metadata,
+    Column(
+        "session_id",
+        UUID(as_uuid=False),
+        ForeignKey("public.chat_sessions.session_id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("user_id", UUID(as_uuid=False), nullable=False),
+    *_usage_columns(),
+    schema="public",
+)
+
+user_usage = Table(
+    "user_usage",
+    metadata,
+    Column("user_id", UUID(as_uuid=False), primary_key=True),
+    *_usage_columns(),
+    schema="public",
+)
@@ -38,7 +38,7 @@ class CharacterRepo:
         )
         res = await self.db_session.execute(stmt)
         rows = res.mappings().all()
-        return [_row_to_character(r) for r in rows]
+        return [row_to_character(r) for r in rows]
 
     async def get_character_by_character_id(
         self, user_id: str, id: str
@@ -66,7 +66,7 @@ class CharacterRepo:
         )
         res = await self.db_session.execute(stmt)
         row = res.mappings().first()
-        return _row_to_character(row) if row else None
+        return row_to_character(row) if row else None
 
     async def get_character_by_session_id(
         self, user_id: str, session_id: str
@@ -98,7 +98,7 @@ class CharacterRepo:
         )
         res = await self.db_session.execute(stmt)
         row = res.mappings().first()
-        return _row_to_character(row) if row else None
+        return row_to_character(row) if row else None
 
     async def update_character_inventory(
         self, character_id: str, inventory: list[Item]
@@ -116,7 +116,7 @@ class CharacterRepo:
             raise
 
 
-def _row_to_character(row: dict) -> Character:
+def row_to_character(row: dict) -> Character:
     return Character(
         id=str(row["id"]),
         name=row["name"],
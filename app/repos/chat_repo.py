@@ -1,13 +1,63 @@
 from dataclasses import asdict
+from types import SimpleNamespace
 from typing import Optional, List
-from sqlalchemy import select, insert, func, literal_column, update
+from sqlalchemy import (
+    and_,
+    cast,
+    false,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    true,
+    union_all,
+    update,
+)
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.character_tables import characters
-from app.models.chat_tables import chat_sessions, chat_messages
-from app.domains.chat import Message, Session
+from app.models.chat_tables import chat_role, chat_sessions, chat_messages
+from app.domains.chat import Message, Session, TurnContext
 from app.domains.adventures import AdventureStatus
+from app.domains.usage import TokenUsage
+from app.repos.character_repo import row_to_character
+
+_SESSION_COLUMNS = [
+    chat_sessions.c.session_id,
+    chat_sessions.c.character_id,
+    chat_sessions.c.adventure_title,
+    chat_sessions.c.story_brief,
+    chat_sessions.c.adventure_status,
+    chat_sessions.c.last_response_id,
+    chat_sessions.c.last_response_backend,
+    chat_sessions.c.response_chain_length,
+    chat_sessions.c.rolling_summary,
+    chat_sessions.c.summarized_through_message_id,
+    chat_sessions.c.created_at,
+    chat_sessions.c.updated_at,
+    chat_sessions.c.archived_at,
+]
+
+_CHARACTER_PREFIX = "char_"
+_CHARACTER_COLUMNS = [
+    characters.c.id,
+    characters.c.name,
+    characters.c.race,
+    characters.c.class_name,
+    characters.c.background,
+    characters.c.level,
+    characters.c.hp_current,
+    characters.c.hp_max,
+    characters.c.ac,
+    characters.c.speed,
+    characters.c.abilities,
+    characters.c.skills,
+    characters.c.features,
+    characters.c.inventory,
+    characters.c.spellcasting,
+]
 
 
 class ChatRepo:
@@ -41,16 +91,7 @@ class ChatRepo:
             raise NoResultFound("character not found or not owned")
 
     async def get_session(self, user_id: str, session_id: str) -> Optional[Session]:
-        stmt = select(
-            chat_sessions.c.session_id,
-            chat_sessions.c.character_id,
-            chat_sessions.c.adventure_title,
-            chat_sessions.c.story_brief,
-            chat_sessions.c.adventure_status,
-            chat_sessions.c.created_at,
-            chat_sessions.c.updated_at,
-            chat_sessions.c.archived_at,
-        ).where(
+        stmt = select(*_SESSION_COLUMNS).where(
             chat_sessions.c.user_id == user_id,
             chat_sessions.c.session_id == session_id,
         )
@@ -59,19 +100,19 @@ class ChatRepo:
             raise NoResultFound("session not found")
         return _row_to_session(rec)
 
+    async def get_session_by_id(self, session_id: str) -> Session:
+        stmt = select(*_SESSION_COLUMNS).where(
+            chat_sessions.c.session_id == session_id
+        )
+        rec = (await self.db_session.execute(stmt)).first()
+        if not rec:
+            raise NoResultFound("session not found")
+        return _row_to_session(rec)
+
     async def get_session_for_character(
         self, user_id: str, character_id: str
     ) -> Optional[Session]:
-        stmt = select(
-            chat_sessions.c.session_id,
-            chat_sessions.c.character_id,
-            chat_sessions.c.adventure_title,
-            chat_sessions.c.story_brief,
-            chat_sessions.c.adventure_status,
-            chat_sessions.c.created_at,
-            chat_sessions.c.updated_at,
-            chat_sessions.c.archived_at,
-        ).where(
+        stmt = select(*_SESSION_COLUMNS).where(
             chat_sessions.c.user_id == user_id,
             chat_sessions.c.character_id == character_id,
         )
@@ -97,16 +138,7 @@ class ChatRepo:
                 story_brief=story_brief,
                 adventure_status=asdict(adventure_status),
             )
-            .returning(
-                chat_sessions.c.session_id,
-                chat_sessions.c.character_id,
-                chat_sessions.c.adventure_title,
-                chat_sessions.c.story_brief,
-                chat_sessions.c.adventure_status,
-                chat_sessions.c.created_at,
-                chat_sessions.c.updated_at,
-                chat_sessions.c.archived_at,
-            )
+            .returning(*_SESSION_COLUMNS)
         )
         rec = (await self.db_session.execute(stmt)).first()
         return _row_to_session(rec)
@@ -119,6 +151,89 @@ class ChatRepo:
         )
         await self.db_session.execute(stmt)
 
+    async def update_session_response_chain(
+        self,
+        session_id: str,
+        response_id: Optional[str],
+        chain_length: int,
+        backend: Optional[str] = None,
+    ) -> None:
+        """Stores the response the next turn chains from, and the backend that
+        holds it; response ids are only valid on the backend that issued them."""
+        stmt = (
+            update(chat_sessions)
+            .where(chat_sessions.c.session_id == session_id)
+            .values(
+                last_response_id=response_id,
+                last_response_backend=backend,
+                response_chain_length=chain_length,
+            )
+        )
+        await self.db_session.execute(stmt)
+
+    async def update_session_summary(
+        self,
+        session_id: str,
+        rolling_summary: str,
+        summarized_through_message_id: int,
+        previous_through_message_id: Optional[int],
+    ) -> bool:
+        """Stores a new rolling summary, unless another summarizer got there first.
+
+        Returns whether the summary was stored.
+        """
+        stmt = (
+            update(chat_sessions)
+            .where(
+                chat_sessions.c.session_id == session_id,
+                chat_sessions.c.summarized_through_message_id.is_not_distinct_from(
+                    previous_through_message_id
+                ),
+            )
+            .values(
+                rolling_summary=rolling_summary,
+                summarized_through_message_id=summarized_through_message_id,
+            )
+        )
+        result = await self.db_session.execute(stmt)
+        return result.rowcount == 1
+
+    async def list_messages_outside_window(
+        self,
+        session_id: str,
+        after: Optional[int],
+        window: int,
+        limit: int,
+    ) -> List[Message]:
+        """Lists the oldest messages after `after` that are older than the last
+        `window` messages of the session."""
+        window_messages = (
+            select(chat_messages.c.message_id)
+            .where(chat_messages.c.session_id == session_id)
+            .order_by(chat_messages.c.message_id.desc())
+            .limit(window)
+            .subquery("window_messages")
+        )
+        stmt = (
+            select(
+                chat_messages.c.message_id,
+                chat_messages.c.role,
+                chat_messages.c.content,
+                chat_messages.c.created_at,
+            )
+            .where(
+                chat_messages.c.session_id == session_id,
+                chat_messages.c.message_id
+                < select(func.min(window_messages.c.message_id)).scalar_subquery(),
+            )
+            .order_by(chat_messages.c.message_id.asc())
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(chat_messages.c.message_id > after)
+        rows = (await self.db_session.execute(stmt)).all()
+        return [_row_to_message(r) for r in rows]
+
     async def list_messages(
         self,
         session_id: str,
@@ -164,6 +279,129 @@ class ChatRepo:
 
         return [_row_to_message(r) for r in rows]
 
+    async def load_turn_context(
+        self,
+        user_id: str,
+        session_id: str,
+        user_text: Optional[str] = None,
+        history_limit: int = 10,
+    ) -> TurnContext:
+        """Loads the session, its character and the last messages in one statement.
+
+        When `user_text` is given the user's message is inserted by a data-modifying
+        CTE in the same statement, and is returned as the newest history message.
+        The insert only happens if the session and its character are owned by the
+        user.
+
+        Raises:
+            NoResultFound: If the session does not exist or is not owned by the user,
+                or its character is missing.
+        """
+        owned = and_(
+            chat_sessions.c.session_id == session_id,
+            chat_sessions.c.user_id == user_id,
+        )
+        session_character = and_(
+            characters.c.id == chat_sessions.c.character_id,
+            characters.c.user_id == chat_sessions.c.user_id,
+        )
+        message_columns = ["message_id", "role", "content", "created_at"]
+
+        recent_limit = history_limit
+        parts = []
+        if user_text is not None:
+            recent_limit = max(0, history_limit - 1)
+            inserted = (
+                insert(chat_messages)
+                .from_select(
+                    ["session_id", "role", "content"],
+                    select(
+                        chat_sessions.c.session_id,
+                        cast(literal("user"), chat_role),
+                        literal(user_text),
+                    )
+                    .select_from(chat_sessions.join(characters, session_character))
+                    .where(owned),
+                )
+                .returning(*(chat_messages.c[c] for c in message_columns))
+                .cte("inserted_message")
+            )
+            parts.append(
+                select(
+                    *(inserted.c[c] for c in message_columns),
+                    true().label("is_new"),
+                )
+            )
+
+        recent = (
+            select(*(chat_messages.c[c] for c in message_columns))
+            .where(chat_messages.c.session_id == session_id)
+            .order_by(chat_messages.c.message_id.desc())
+            .limit(recent_limit)
+            .subquery("recent_messages")
+        )
+        parts.append(
+            select(*(recent.c[c] for c in message_columns), false().label("is_new"))
+        )
+        history = union_all(*parts).subquery("history")
+
+        stmt = (
+            select(
+                *_SESSION_COLUMNS,
+                *(c.label(_CHARACTER_PREFIX + c.name) for c in _CHARACTER_COLUMNS),
+                history.c.message_id,
+                history.c.role.label("message_role"),
+                history.c.content.label("message_content"),
+                history.c.created_at.label("message_created_at"),
+                history.c.is_new,
+            )
+            .select_from(
+                chat_sessions.outerjoin(characters, session_character).outerjoin(
+                    history, true()
+                )
+            )
+            .where(owned)
+            .order_by(history.c.message_id.asc())
+        )
+        rows = (await self.db_session.execute(stmt)).all()
+        if not rows:
+            raise NoResultFound("session not found")
+
+        first = rows[0]
+        if first._mapping[_CHARACTER_PREFIX + "id"] is None:
+            raise NoResultFound("character not found")
+        character = row_to_character(
+            {
+                key[len(_CHARACTER_PREFIX) :]: value
+                for key, value in first._mapping.items()
+                if key.startswith(_CHARACTER_PREFIX)
+            }
+        )
+
+        messages = []
+        user_message = None
+        for r in rows:
+            if r.message_id is None:
+                continue
+            message = _row_to_message(
+                SimpleNamespace(
+                    message_id=r.message_id,
+                    role=r.message_role,
+                    content=r.message_content,
+                    created_at=r.message_created_at,
+                )
+            )
+            messages.append(message)
+            if r.is_new:
+                user_message = message
+
+        return TurnContext(
+            session=_row_to_session(first),
+            character=character,
+            messages=messages,
+            user_message=user_message,
+        )
+
     async def count_total_messages(self, session_id: str) -> int:
         stmt = (
             select(func.count())
@@ -187,11 +425,25 @@ class ChatRepo:
         return _row_to_message(r)
 
     async def insert_assistant_message_row(
-        self, session_id: str, content: str
+        self, session_id: str, content: str, usage: Optional[TokenUsage] = None
     ) -> Message:
+        """Inserts a DM message, along with the token usage of the LLM calls that
+        produced it."""
+        token_columns = {}
+        if usage is not None:
+            token_columns = {
+                "tokens_in": usage.input_tokens,
+                "tokens_out": usage.output_tokens,
+                "tokens_cached": usage.cached_tokens,
+            }
         stmt = (
             insert(chat_messages)
-            .values(session_id=session_id, role="assistant", content=content)
+            .values(
+                session_id=session_id,
+                role="assistant",
+                content=content,
+                **token_columns,
+            )
             .returning(
                 chat_messages.c.message_id,
                 chat_messages.c.role,
@@ -210,6 +462,11 @@ def _row_to_session(r) -> Session:
         adventure_title=r.adventure_title,
         story_brief=r.story_brief,
         adventure_status=AdventureStatus(**r.adventure_status),
+        last_response_id=r.last_response_id,
+        last_response_backend=r.last_response_backend,
+        response_chain_length=r.response_chain_length or 0,
+        rolling_summary=r.rolling_summary,
+        summarized_through_message_id=r.summarized_through_message_id,
         created_at=r.created_at.isoformat(),
         updated_at=r.updated_at.isoformat(),
         archived_at=r.archived_at.isoformat() if r.archived_at else None,
@@ -0,0 +1,52 @@
+"""Builds the repos for a session, in-memory ones for a `MemorySession`."""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adapters.memory_db import MemorySession
+from app.domains.adventures import AdventureRepoProtocol
+from app.domains.character import CharacterRepoProtocol
+from app.domains.chat import ChatRepoProtocol
+from app.domains.creator import CreatorRepoProtocol
+from app.domains.usage import UsageRepoProtocol
+from app.repos.adventure_repo import AdventureRepo
+from app.repos.character_repo import CharacterRepo
+from app.repos.chat_repo import ChatRepo
+from app.repos.creator_repo import CreatorRepo
+from app.repos.memory_repos import (
+    MemoryAdventureRepo,
+    MemoryCharacterRepo,
+    MemoryChatRepo,
+    MemoryCreatorRepo,
+    MemoryUsageRepo,
+)
+from app.repos.usage_repo import UsageRepo
+
+
+def adventure_repo_for(db_session: AsyncSession) -> AdventureRepoProtocol:
+    if isinstance(db_session, MemorySession):
+        return MemoryAdventureRepo(db_session)
+    return AdventureRepo(db_session)
+
+
+def character_repo_for(db_session: AsyncSession) -> CharacterRepoProtocol:
+    if isinstance(db_session, MemorySession):
+        return MemoryCharacterRepo(db_session)
+    return CharacterRepo(db_session)
+
+
+def chat_repo_for(db_session: AsyncSession) -> ChatRepoProtocol:
+    if isinstance(db_session, MemorySession):
+        return MemoryChatRepo(db_session)
+    return ChatRepo(db_session)
+
+
+def creator_repo_for(db_session: AsyncSession) -> CreatorRepoProtocol:
+    if isinstance(db_session, MemorySession):
+        return MemoryCreatorRepo(db_session)
+    return CreatorRepo(db_session)
+
+
+def usage_repo_for(db_session: AsyncSession) -> UsageRepoProtocol:
+    if isinstance(db_session, MemorySession):
+        return MemoryUsageRepo(db_session)
+    return UsageRepo(db_session)
@@ -0,0 +1,435 @@
+"""In-memory versions of the repos, over a `MemoryStore`.
+
+They keep the SQL repos' semantics (ownership filters, message ordering and
+pagination, compare-and-set summaries, usage upserts, errors) and reuse their
+row mappers, so services behave the same against either backend.
+"""
+
+from bisect import bisect_right
+from dataclasses import asdict
+from types import SimpleNamespace
+from typing import List, Optional
+from uuid import uuid4
+
+from sqlalchemy.exc import NoResultFound
+
+from app.adapters.memory_db import MemorySession, MemoryStore, to_jsonb, utcnow
+from app.domains.adventures import Adventure, AdventureStatus
+from app.domains.character import Character, Item
+from app.domains.chat import Message, Session, TurnContext
+from app.domains.creator import Background, Class, Race
+from app.domains.usage import TokenUsage, UsageTotals
+from app.repos.adventure_repo import _row_to_adventure
+from app.repos.character_repo import row_to_character
+from app.repos.chat_repo import _row_to_message, _row_to_session
+from app.repos.creator_repo import (
+    _row_to_background,
+    _row_to_character as _row_to_created_character,
+    _row_to_class,
+    _row_to_race,
+)
+from app.repos.usage_repo import _row_to_usage_totals
+
+
+class MemoryAdventureRepo:
+    def __init__(self, db_session: MemorySession):
+        self.db_session = db_session
+        self.store = db_session.store
+
+    async def list_adventures(self) -> list[Adventure]:
+        return [_row_to_adventure(r) for r in self.store.adventures]
+
+
+class MemoryCharacterRepo:
+    def __init__(self, db_session: MemorySession):
+        self.db_session = db_session
+        self.store = db_session.store
+
+    async def list_characters_for_user(self, user_id: str) -> list[Character]:
+        rows = [r for r in self.store.characters.values() if r["user_id"] == user_id]
+        rows.sort(key=lambda r: r["updated_at"], reverse=True)
+        return [row_to_character(r) for r in rows]
+
+    async def get_character_by_character_id(
+        self, user_id: str, id: str
+    ) -> Optional[Character]:
+        row = _owned_character(self.store, user_id, id)
+        return row_to_character(row) if row else None
+
+    async def get_character_by_session_id(
+        self, user_id: str, session_id: str
+    ) -> Optional[Character]:
+        session = self.store.sessions.get(session_id)
+        if session is None:
+            return None
+        row = _owned_character(self.store, user_id, session["character_id"])
+        return row_to_character(row) if row else None
+
+    async def update_character_inventory(
+        self, character_id: str, inventory: list[Item]
+    ) -> None:
+        inventory_dict = [asdict(item) for item in inventory]
+        row = self.store.characters.get(character_id)
+        if row is not None:
+            self.db_session.update(row, inventory=to_jsonb(inventory_dict))
+
+
+class MemoryCreatorRepo:
+    def __init__(self, db_session: MemorySession):
+        self.db_session = db_session
+        self.store = db_session.store
+
+    async def get_race(self, id: str) -> Race:
+        row = self.store.races.get(id)
+        if not row:
+            raise NoResultFound(f"Race with id {id} not found")
+        return _row_to_race(row)
+
+    async def get_class(self, id: str) -> Class:
+        row = self.store.classes.get(id)
+        if not row:
+            raise NoResultFound(f"Class with id {id} not found")
+        return _row_to_class(row)
+
+    async def get_background(self, id: str) -> Background:
+        row = self.store.backgrounds.get(id)
+        if not row:
+            raise NoResultFound(f"Background with id {id} not found")
+        return _row_to_background(row)
+
+    async def list_races(self) -> list[Race]:
+        return [_row_to_race(r) for r in self.store.races.values()]
+
+    async def list_classes(self) -> list[Class]:
+        return [_row_to_class(r) for r in self.store.classes.values()]
+
+    async def list_backgrounds(self) -> list[Background]:
+        return [_row_to_background(r) for r in self.store.backgrounds.values()]
+
+    async def create_character(self, user_id: str, character: Character) -> Character:
+        character_dict = to_jsonb(asdict(character))
+        if character_dict["id"] in self.store.characters:
+            raise Exception(f"Character {character_dict['id']} already exists")
+        now = utcnow()
+        row = {
+            **character_dict,
+            "user_id": user_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.db_session.insert(self.store.characters, row["id"], row)
+        return _row_to_created_character(to_jsonb(character_dict))
+
+
+class MemoryChatRepo:
+    def __init__(self, db_session: MemorySession):
+        self.db_session = db_session
+        self.store = db_session.store
+
+    async def assert_owned_session(self, user_id: str, session_id: str) -> None:
+        if _owned_session(self.store, user_id, session_id) is None:
+            raise NoResultFound("session not found or not owned")
+
+    async def assert_owned_character(self, user_id: str, character_id: str) -> None:
+        if _owned_character(self.store, user_id, character_id) is None:
+            raise NoResultFound("character not found or not owned")
+
+    async def get_session(self, user_id: str, session_id: str) -> Optional[Session]:
+        row = _owned_session(self.store, user_id, session_id)
+        if not row:
+            raise NoResultFound("session not found")
+        return _to_session(row)
+
+    async def get_session_by_id(self, session_id: str) -> Session:
+        row = self.store.sessions.get(session_id)
+        if not row:
+            raise NoResultFound("session not found")
+        return _to_session(row)
+
+    async def get_session_for_character(
+        self, user_id: str, character_id: str
+    ) -> Optional[Session]:
+        for row in self.store.sessions.values():
+            if row["user_id"] == user_id and row["character_id"] == character_id:
+                return _to_session(row)
+        return None
+
+    async def create_session(
+        self,
+        user_id: str,
+        character_id: str,
+        adventure_title: str,
+        story_brief: str,
+        adventure_status: AdventureStatus,
+    ) -> Session:
+        now = utcnow()
+        row = {
+            "session_id": str(uuid4()),
+            "user_id": user_id,
+            "character_id": character_id,
+            "adventure_title": adventure_title,
+            "story_brief": story_brief,
+            "adventure_status": to_jsonb(asdict(adventure_status)),
+            "last_response_id": None,
+            "last_response_backend": None,
+            "response_chain_length": 0,
+            "rolling_summary": None,
+            "summarized_through_message_id": None,
+            "created_at": now,
+            "updated_at": now,
+            "archived_at": None,
+        }
+        self.db_session.insert(self.store.sessions, row["session_id"], row)
+        self.store.messages.setdefault(row["session_id"], [])
+        return _to_session(row)
+
+    async def update_session_adventure_status(
+        self, session_id: str, adventure_status: AdventureStatus
+    ) -> None:
+        row = self.store.sessions.get(session_id)
+        if row is not None:
+            self.db_session.update(
+                row, adventure_status=to_jsonb(asdict(adventure_status))
+            )
+
+    async def update_session_response_chain(
+        self,
+        session_id: str,
+        response_id: Optional[str],
+        chain_length: int,
+        backend: Optional[str] = None,
+    ) -> None:
+        row = self.store.sessions.get(session_id)
+        if row is not None:
+            self.db_session.update(
+                row,
+                last_response_id=response_id,
+                last_response_backend=backend,
+                response_chain_length=chain_length,
+            )
+
+    async def update_session_summary(
+        self,
+        session_id: str,
+        rolling_summary: str,
+        summarized_through_message_id: int,
+        previous_through_message_id: Optional[int],
+    ) -> bool:
+        """Stores a new rolling summary, unless another summarizer got there first.
+
+        Returns whether the summary was stored.
+        """
+        row = self.store.sessions.get(session_id)
+        if row is None or (
+            row["summarized_through_message_id"] != previous_through_message_id
+        ):
+            return False
+        self.db_session.update(
+            row,
+            rolling_summary=rolling_summary,
+            summarized_through_message_id=summarized_through_message_id,
+        )
+        return True
+
+    async def list_messages_outside_window(
+        self,
+        session_id: str,
+        after: Optional[int],
+        window: int,
+        limit: int,
+    ) -> List[Message]:
+        """Lists the oldest messages after `after` that are older than the last
+        `window` messages of the session."""
+        rows = self._messages(session_id)
+        if window <= 0 or not rows:
+            # The window's MIN(message_id) is NULL, so nothing compares below it.
+            return []
+        older = rows[: max(0, len(rows) - window)]
+        start = 0 if after is None else _index_after(older, after)
+        return [_to_message(r) for r in older[start : start + max(0, limit)]]
+
+    async def list_messages(
+        self,
+        session_id: str,
+        after: Optional[int] = None,
+        limit: int = 10,
+    ) -> List[Message]:
+        rows = self._messages(session_id)
+        limit = max(0, limit)
+        if after is not None:
+            start = _index_after(rows, after)
+            selected = rows[start : start + limit]
+        else:
+            selected = rows[len(rows) - limit :] if limit else []
+        return [_to_message(r) for r in selected]
+
+    async def load_turn_context(
+        self,
+        user_id: str,
+        session_id: str,
+        user_text: Optional[str] = None,
+        history_limit: int = 10,
+    ) -> TurnContext:
+        """Loads the session, its character and the last messages.
+
+        When `user_text` is given the user's message is inserted and returned as
+        the newest history message, as the SQL repo's single statement does.
+
+        Raises:
+            NoResultFound: If the session does not exist or is not owned by the user,
+                or its character is missing.
+        """
+        session = _owned_session(self.store, user_id, session_id)
+        if session is None:
+            raise NoResultFound("session not found")
+        character_row = _owned_character(
+            self.store, session["user_id"], session["character_id"]
+        )
+        if character_row is None:
+            raise NoResultFound("character not found")
+
+        recent_limit = history_limit
+        if user_text is not None:
+            recent_limit = max(0, history_limit - 1)
+        rows = self._messages(session_id)
+        recent = rows[len(rows) - recent_limit :] if recent_limit else []
+        messages = [_to_message(r) for r in recent]
+
+        user_message = None
+        if user_text is not None:
+            row = self._insert_message(session_id, "user", user_text)
+            user_message = _to_message(row)
+            messages.append(user_message)
+
+        return TurnContext(
+            session=_to_session(session),
+            character=row_to_character(character_row),
+            messages=messages,
+            user_message=user_message,
+        )
+
+    async def count_total_messages(self, session_id: str) -> int:
+        return len(self._messages(session_id))
+
+    async def insert_user_message_row(self, session_id: str, content: str) -> Message:
+        return _to_message(self._insert_message(session_id, "user", content))
+
+    async def insert_assistant_message_row(
+        self, session_id: str, content: str, usage: Optional[TokenUsage] = None
+    ) -> Message:
+        """Inserts a DM message, along with the token usage of the LLM calls that
+        produced it."""
+        token_columns = {}
+        if usage is not None:
+            token_columns = {
+                "tokens_in": usage.input_tokens,
+                "tokens_out": usage.output_tokens,
+                "tokens_cached": usage.cached_tokens,
+            }
+        row = self._insert_message(session_id, "assistant", content, **token_columns)
+        return _to_message(row)
+
+    def _messages(self, session_id: str) -> List[dict]:
+        return self.store.messages.get(session_id, [])
+
+    def _insert_message(
+        self, session_id: str, role: str, content: str, **columns
+    ) -> dict:
+        if session_id not in self.store.sessions:
+            # The foreign key on chat_messages.session_id.
+            raise NoResultFound("session not found")
+        row = {
+            "message_id": self.store.next_message_id(),
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "tokens_in": None,
+            "tokens_out": None,
+            "tokens_cached": None,
+            **columns,
+            "created_at": utcnow(),
+        }
+        rows = self.store.messages.setdefault(session_id, [])
+        return self.db_session.append(rows, row)
+
+
+class MemoryUsageRepo:
+    def __init__(self, db_session: MemorySession):
+        self.db_session = db_session
+        self.store = db_session.store
+
+    async def record_usage(
+        self, user_id: str, session_id: str, usage: TokenUsage, turns: int = 1
+    ) -> None:
+        """Adds token usage to the session and user totals."""
+        self._upsert_usage(
+            self.store.session_usage,
+            session_id,
+            {"session_id": session_id, "user_id": user_id},
+            usage,
+            turns,
+        )
+        self._upsert_usage(
+            self.store.user_usage, user_id, {"user_id": user_id}, usage, turns
+        )
+
+    async def get_session_usage(self, session_id: str) -> Optional[UsageTotals]:
+        row = self.store.session_usage.get(session_id)
+        return _row_to_usage_totals(row) if row else None
+
+    async def get_user_usage(self, user_id: str) -> Optional[UsageTotals]:
+        row = self.store.user_usage.get(user_id)
+        return _row_to_usage_totals(row) if row else None
+
+    def _upsert_usage(
+        self, table: dict, key: str, keys: dict, usage: TokenUsage, turns: int
+    ):
+        row = table.get(key)
+        if row is None:
+            self.db_session.insert(
+                table,
+                key,
+                {
+                    **keys,
+                    "input_tokens": usage.input_tokens,
+                    "output_tokens": usage.output_tokens,
+                    "cached_tokens": usage.cached_tokens,
+                    "llm_calls": usage.llm_calls,
+                    "turns": turns,
+                    "updated_at": utcnow(),
+                },
+            )
+            return
+        self.db_session.update(
+            row,
+            input_tokens=row["input_tokens"] + usage.input_tokens,
+            output_tokens=row["output_tokens"] + usage.output_tokens,
+            cached_tokens=row["cached_tokens"] + usage.cached_tokens,
+            llm_calls=row["llm_calls"] + usage.llm_calls,
+            turns=row["turns"] + turns,
+            updated_at=utcnow(),
+        )
+
+
+def _owned_session(store: MemoryStore, user_id: str, session_id: str) -> Optional[dict]:
+    row = store.sessions.get(session_id)
+    return row if row is not None and row["user_id"] == user_id else None
+
+
+def _owned_character(
+    store: MemoryStore, user_id: str, character_id: str
+) -> Optional[dict]:
+    row = store.characters.get(character_id)
+    return row if row is not None and row["user_id"] == user_id else None
+
+
+def _index_after(rows: List[dict], after: int) -> int:
+    return bisect_right(rows, after, key=lambda r: r["message_id"])
+
+
+def _to_session(row: dict) -> Session:
+    return _row_to_session(SimpleNamespace(**row))
+
+
+def _to_message(row: dict) -> Message:
+    return _row_to_message(SimpleNamespace(**row))
@@ -0,0 +1,81 @@
+from typing import Optional
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domains.usage import TokenUsage, UsageTotals
+from app.models.usage_tables import session_usage, user_usage
+
+
+class UsageRepo:
+    def __init__(self, db_session: AsyncSession):
+        self.db_session = db_session
+
+    async def record_usage(
+        self, user_id: str, session_id: str, usage: TokenUsage, turns: int = 1
+    ) -> None:
+        """Adds token usage to the session and user totals.
+
+        `turns` is the number of completed turns the usage covers; tokens spent on
+        a failed turn or a background call count towards no turn.
+        """
+        await self.db_session.execute(
+            _upsert_usage(
+                session_usage,
+                {"session_id": session_id, "user_id": user_id},
+                session_usage.c.session_id,
+                usage,
+                turns,
+            )
+        )
+        await self.db_session.execute(
+            _upsert_usage(
+                user_usage, {"user_id": user_id}, user_usage.c.user_id, usage, turns
+            )
+        )
+
+    async def get_session_usage(self, session_id: str) -> Optional[UsageTotals]:
+        stmt = select(session_usage).where(session_usage.c.session_id == session_id)
+        row = (await self.db_session.execute(stmt)).mappings().first()
+        return _row_to_usage_totals(row) if row else None
+
+    async def get_user_usage(self, user_id: str) -> Optional[UsageTotals]:
+        stmt = select(user_usage).where(user_usage.c.user_id == user_id)
+        row = (await self.db_session.execute(stmt)).mappings().first()
+        return _row_to_usage_totals(row) if row else None
+
+
+def _upsert_usage(
+    table: Table, keys: dict, conflict_column, usage: TokenUsage, turns: int
+):
+    stmt = insert(table).values(
+        **keys,
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cached_tokens=usage.cached_tokens,
+        llm_calls=usage.llm_calls,
+        turns=turns,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[conflict_column],
+        set_={
+            "input_tokens": table.c.input_tokens + stmt.excluded.input_tokens,
+            "output_tokens": table.c.output_tokens + stmt.excluded.output_tokens,
+            "cached_tokens": table.c.cached_tokens + stmt.excluded.cached_tokens,
+            "llm_calls": table.c.llm_calls + stmt.excluded.llm_calls,
+            "turns": table.c.turns + stmt.excluded.turns,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def _row_to_usage_totals(row: dict) -> UsageTotals:
+    return UsageTotals(
+        input_tokens=int(row["input_tokens"]),
+        output_tokens=int(row["output_tokens"]),
+        cached_tokens=int(row["cached_tokens"]),
+        llm_calls=int(row["llm_calls"]),
+        turns=int(row["turns"]),
+        updated_at=row["updated_at"].isoformat(),
+    )
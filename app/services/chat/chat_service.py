@@ -1,24 +1,51 @@
+import asyncio
 import json
-from typing import List, Tuple
-from openai.types.responses import Response
-
-from app.adapters.llm.openai_client import OpenAILLM
-from app.domains.character import Character
-from app.domains.adventures import AdventureStatus
-from app.domains.chat import Message, Session
-from app.adapters.llm.types import PromptPayload
+import time
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from app.adapters.llm.errors import LLMUnavailableError, ResponseChainExpired
+from app.adapters.llm.base import LLMClient
+from app.domains.character import Character, CharacterRepoProtocol
+from app.domains.adventures import AdventureRepoProtocol, AdventureStatus
+from app.domains.chat import ChatRepoProtocol, Message, Session, TurnDelta
+from app.domains.usage import TokenUsage, UsageRepoProtocol
+from app.adapters.llm.types import LLMResult, LLMStreamEvent, PromptPayload
 from app.services.orchestration.prompt_builder import PromptBuilder
-from app.repos.adventure_repo import AdventureRepo
-from app.repos.character_repo import CharacterRepo
-from app.repos.chat_repo import ChatRepo
+from app.services.orchestration.token_budget import estimate_tokens
 from app.services.dm_response.dm_response_handlers import (
     add_items_to_inventory,
     remove_items_from_inventory,
     update_adventure_status,
 )
 from app.services.dm_response.dm_response_models import DMResponse, DM_RESPONSE_SCHEMA
-from app.services.tools.tools import ability_check
+from app.services.dm_response.dm_response_repair import repair_dm_response
+from app.services.dm_response.dm_response_stream import MessageToUserExtractor
+from app.services.observability.logging import log_event
+from app.services.observability.metrics import metrics
+from app.services.tools.tool_executor import execute_tool_calls
 from app.services.tools.tools_mapping import TOOLS_FOR_LLM
+from app.settings import Settings, get_settings
+
+T = TypeVar("T")
+
+DEGRADED_NARRATION = (
+    "Merlin falls silent for a moment, lost in thought. "
+    "(The Dungeon Master is briefly unavailable; please send your action again shortly.)"
+)
+
+TOOL_DECISION = "tool_decision"
+TOOL_EXECUTION = "tool_execution"
+NARRATION = "narration"
 
 
 class ChatService:
@@ -26,15 +53,19 @@ class ChatService:
 
     def __init__(
         self,
-        llm: OpenAILLM,
-        adventure_repo: AdventureRepo,
-        character_repo: CharacterRepo,
-        chat_repo: ChatRepo,
+        llm: LLMClient,
+        adventure_repo: AdventureRepoProtocol,
+        character_repo: CharacterRepoProtocol,
+        chat_repo: ChatRepoProtocol,
+        usage_repo: Optional[UsageRepoProtocol] = None,
+        settings: Optional[Settings] = None,
     ):
         self.llm = llm
         self.adventure_repo = adventure_repo
         self.character_repo = character_repo
         self.chat_repo = chat_repo
+        self.usage_repo = usage_repo
+        self.settings = settings or get_settings()
 
     def build_initial_message(
         self,
@@ -88,89 +119,672 @@ class ChatService:
         session_id: str,
         user_text: str,
     ):
-        """Handles a single turn of the chat."""
-        await self.chat_repo.insert_user_message_row(session_id, user_text)
+        """Handles a single turn of the chat.
+
+        The turn runs as three phases so the pooled DB connection is never held
+        while waiting on the LLM: a short read/insert transaction that commits the
+        user's message, a connection-free LLM phase, and a short write transaction
+        for the DM response.
+        """
+        if not self.check_llm_available():
+            return self._degraded_message()
 
-        session, chat_history, character = await self._load_context(user_id, session_id)
+        session, chat_history, character = await self._load_context(
+            user_id, session_id, user_text
+        )
 
-        prompt_builder = PromptBuilder(
+        prompt_builder = self._build_prompt(session, chat_history, character)
+        usage = TokenUsage()
+
+        try:
+            try:
+                response = await self._generate_dm_response(
+                    prompt_builder, character, usage
+                )
+            except ResponseChainExpired as e:
+                log_event(
+                    "response_chain_expired",
+                    session_id=session_id,
+                    error=type(e).__name__,
+                )
+                prompt_builder.unchain()
+                response = await self._generate_dm_response(
+                    prompt_builder, character, usage
+                )
+
+            dm_response, response = await self._parse_dm_response(
+                response.text, response, session, prompt_builder, usage
+            )
+            msg = await self._handle_dm_response(
+                dm_response, character, session_id, usage
+            )
+            await self._save_response_chain(session, prompt_builder, response)
+            await self._record_usage(user_id, session_id, usage)
+
+            await self.chat_repo.db_session.commit()
+
+            return msg
+        except Exception as e:
+            print(e)
+            await self.chat_repo.db_session.rollback()
+            await self._record_failed_turn_usage(user_id, session_id, usage)
+            raise
+
+    async def stream_turn(
+        self,
+        user_id: str,
+        session_id: str,
+        user_text: str,
+    ) -> AsyncIterator[TurnDelta | Message]:
+        """Handles a single turn of the chat, yielding the narration as it is generated.
+
+        Yields `TurnDelta`s with the `message_to_user` text as it arrives, followed by
+        the persisted assistant `Message` once the full DM response has validated.
+        Uses the same three phases as `handle_turn`; the DM response is only written
+        if it is valid.
+        """
+        if not self.check_llm_available():
+            msg = self._degraded_message()
+            yield TurnDelta(text=msg.content)
+            yield msg
+            return
+
+        session, chat_history, character = await self._load_context(
+            user_id, session_id, user_text
+        )
+
+        prompt_builder = self._build_prompt(session, chat_history, character)
+        usage = TokenUsage()
+
+        outcome = {}
+        try:
+            try:
+                async for delta in self._stream_dm_response(
+                    prompt_builder, character, outcome, usage
+                ):
+                    yield delta
+            except ResponseChainExpired as e:
+                log_event(
+                    "response_chain_expired",
+                    session_id=session_id,
+                    error=type(e).__name__,
+                )
+                prompt_builder.unchain()
+                outcome = {}
+                async for delta in self._stream_dm_response(
+                    prompt_builder, character, outcome, usage
+                ):
+                    yield delta
+
+            dm_response, response = await self._parse_dm_response(
+                outcome["text"], outcome.get("response"), session, prompt_builder, usage
+            )
+            msg = await self._handle_dm_response(
+                dm_response, character, session_id, usage
+            )
+            await self._save_response_chain(session, prompt_builder, response)
+            await self._record_usage(user_id, session_id, usage)
+
+            await self.chat_repo.db_session.commit()
+        except Exception as e:
+            print(e)
+            await self.chat_repo.db_session.rollback()
+            await self._record_failed_turn_usage(user_id, session_id, usage)
+            raise
+        except BaseException as e:
+            print(e)
+            await self.chat_repo.db_session.rollback()
+            raise
+
+        yield msg
+
+    def check_llm_available(self) -> bool:
+        """Checks the LLM circuit of every model the turn will call before the turn
+        touches the database.
+
+        Returns False if a circuit is open and degraded narration is enabled.
+
+        Raises:
+            LLMUnavailableError: If a circuit is open and degraded narration is
+                disabled.
+        """
+        phases = [NARRATION]
+        if not self.settings.llm_single_round_turns:
+            phases.append(TOOL_DECISION)
+        models = {self._phase_options(phase)["model"] for phase in phases}
+        retry_afters = {model: self.llm.retry_after(model) for model in models}
+        model = max(retry_afters, key=retry_afters.get)
+        if not retry_afters[model]:
+            return True
+        if self.settings.llm_degraded_narration:
+            return False
+        raise LLMUnavailableError(
+            model or self.llm.model(), retry_after=retry_afters[model]
+        )
+
+    def _degraded_message(self) -> Message:
+        """A stand-in DM message for when the LLM is unavailable. It is not persisted."""
+        return Message(
+            message_id=0,
+            role="assistant",
+            content=DEGRADED_NARRATION,
+            created_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def _build_prompt(
+        self, session: Session, chat_history: List[Message], character: Character
+    ) -> PromptBuilder:
+        """Builds the turn prompt, continuing the session's response chain if enabled."""
+        previous_response_id = None
+        if (
+            self.settings.llm_chain_responses
+            and session.response_chain_length < self.settings.llm_chain_max_turns
+        ):
+            previous_response_id = session.last_response_id
+
+        return PromptBuilder(
             story_brief=session.story_brief,
             character=character,
             adventure_status=session.adventure_status,
             chat_history=chat_history,
+            previous_response_id=previous_response_id,
+            cache_key=f"merlin-session-{session.session_id}",
+            rolling_summary=session.rolling_summary,
+            previous_response_backend=session.last_response_backend,
         )
-        prompt_payload = prompt_builder.prompt_payload
 
+    async def _save_response_chain(
+        self,
+        session: Session,
+        prompt_builder: PromptBuilder,
+        response: Optional[LLMResult],
+    ) -> None:
+        """Stores the id of the response that produced the DM message on the session,
+        with the backend that issued it, so the next turn can chain from it."""
+        if not self.settings.llm_chain_responses:
+            return
+        response_id = response.response_id if response else None
+        chain_length = (
+            session.response_chain_length + 1 if prompt_builder.previous_response_id else 1
+        )
+        await self.chat_repo.update_session_response_chain(
+            session.session_id,
+            response_id,
+            chain_length if response_id else 0,
+            backend=response.backend if response_id else None,
+        )
+
+    async def _record_usage(
+        self, user_id: str, session_id: str, usage: TokenUsage
+    ) -> None:
+        """Adds the turn's token usage to the session and user totals."""
+        if self.usage_repo is not None:
+            await self.usage_repo.record_usage(user_id, session_id, usage)
+
+    async def _record_failed_turn_usage(
+        self, user_id: str, session_id: str, usage: TokenUsage
+    ) -> None:
+        """Adds the tokens a failed turn spent to the totals, without counting a turn.
+
+        Runs after the turn's transaction was rolled back, in a transaction of its
+        own, so the spend is kept even though nothing else from the turn is.
+        """
+        if self.usage_repo is None or not usage.llm_calls:
+            return
         try:
-            response = await self._call_llm(prompt_payload, tools=TOOLS_FOR_LLM)
+            await self.usage_repo.record_usage(user_id, session_id, usage, turns=0)
+            await self.usage_repo.db_session.commit()
+        except Exception as e:
+            log_event(
+                "failed_turn_usage_not_recorded",
+                session_id=session_id,
+                error=type(e).__name__,
+            )
+            await self.usage_repo.db_session.rollback()
+
+    def _speculate(self, call: Callable[[], Awaitable[T]]) -> "asyncio.Task[T]":
+        """Starts a speculative LLM call in a task.
 
-            for item in response.output:
-                if item.type == "function_call":
-                    if item.name == "ability_check":
-                        args = json.loads(item.arguments)
-                        call_id = item.call_id
-                        output = ability_check(character, **json.loads(item.arguments))
-                        prompt_builder.add_function_call_messages(
-                            call_id=call_id,
-                            name=item.name,
-                            arguments=args,
-                            output=output,
-                        )
+        The call's coroutine is only created once the task runs, so a task that is
+        cancelled before it starts leaves no coroutine behind unawaited.
+        """
 
-            follow_up_prompt = prompt_builder.prompt_payload
+        async def run() -> T:
+            return await call()
 
-            follow_up_response = await self._call_llm(
-                follow_up_prompt, output_schema=DM_RESPONSE_SCHEMA
+        return asyncio.ensure_future(run())
+
+    def _cancel_speculation(
+        self, task: "asyncio.Task", payload: PromptPayload, usage: TokenUsage
+    ) -> None:
+        """Cancels a speculative call that is still running.
+
+        A cancelled call returns no usage, but the provider may already bill its
+        prompt, so the prompt's estimated tokens are counted instead.
+        """
+        if not task.done() and not task.cancelling():
+            usage.add(TokenUsage(input_tokens=estimate_tokens(payload), llm_calls=1))
+        _discard(task)
+
+    async def _generate_dm_response(
+        self, prompt_builder: PromptBuilder, character: Character, usage: TokenUsage
+    ) -> LLMResult:
+        """Runs the tool and narration rounds and returns the DM response.
+
+        In single-round mode the tools and the DM response schema are sent together,
+        and the narration round only runs when the model actually called a tool.
+        """
+        if self.settings.llm_single_round_turns:
+            response = await self._call_llm(
+                self._prompt(prompt_builder),
+                usage,
+                NARRATION,
+                tools=TOOLS_FOR_LLM,
+                output_schema=DM_RESPONSE_SCHEMA,
+            )
+            if not await self._apply_tool_calls(response, prompt_builder, character):
+                return response
+        elif self.settings.llm_speculative_narration:
+            response = await self._speculative_dm_response(
+                prompt_builder, character, usage
             )
+            if response is not None:
+                return response
+        else:
+            await self._run_tool_round(prompt_builder, character, usage)
 
-            msg = await self._handle_dm_response(
-                follow_up_response.output_text, character, session_id
+        return await self._call_llm(
+            self._prompt(prompt_builder),
+            usage,
+            NARRATION,
+            output_schema=DM_RESPONSE_SCHEMA,
+        )
+
+    async def _stream_dm_response(
+        self,
+        prompt_builder: PromptBuilder,
+        character: Character,
+        outcome: dict,
+        usage: TokenUsage,
+    ) -> AsyncIterator[TurnDelta]:
+        """Streaming counterpart of `_generate_dm_response`.
+
+        In single-round mode the model may narrate before calling a tool, and that
+        narration is replaced by the one after the tool results. Its deltas stream
+        live until the first tool call starts; any already sent are then voided
+        with a reset delta and the rest of the round is not forwarded.
+        """
+        if self.settings.llm_single_round_turns:
+            async for delta in self._stream_narration(
+                self._prompt(prompt_builder), outcome, usage, tools=TOOLS_FOR_LLM
+            ):
+                yield delta
+            called_tools = await self._apply_tool_calls(
+                outcome.get("response"), prompt_builder, character
+            )
+        elif self.settings.llm_speculative_narration:
+            speculation = self._stream_speculative_narration(
+                prompt_builder, character, outcome, usage
             )
+            called_tools = True
+            async for delta in speculation:
+                if delta is None:
+                    called_tools = False
+                    continue
+                yield delta
+        else:
+            await self._run_tool_round(prompt_builder, character, usage)
+            called_tools = True
 
-            await self.chat_repo.db_session.commit()
+        if called_tools:
+            async for delta in self._stream_narration(
+                self._prompt(prompt_builder), outcome, usage
+            ):
+                yield delta
 
-            return msg
-        except Exception as e:
-            print(e)
-            await self.chat_repo.db_session.rollback()
+    async def _speculative_dm_response(
+        self, prompt_builder: PromptBuilder, character: Character, usage: TokenUsage
+    ) -> Optional[LLMResult]:
+        """Sends the narration request together with the tool round.
+
+        Without tool calls the narration prompt is the tool round's prompt, so when
+        the model calls no tool the speculative narration is the DM response and is
+        returned. Otherwise it is cancelled, the tool results are appended to the
+        prompt and None is returned so a normal narration round follows.
+        """
+        payload = self._prompt(prompt_builder)
+        narration = self._speculate(
+            lambda: self._call_llm(
+                payload, usage, NARRATION, output_schema=DM_RESPONSE_SCHEMA
+            )
+        )
+        try:
+            response = await self._call_llm(
+                payload, usage, TOOL_DECISION, tools=TOOLS_FOR_LLM
+            )
+        except BaseException:
+            self._cancel_speculation(narration, payload, usage)
             raise
 
+        if not response.tool_calls:
+            try:
+                result = await narration
+            except Exception as e:
+                log_event("speculative_narration_failed", error=type(e).__name__)
+                metrics.increment("speculative_narration", outcome="failed")
+                return None
+            metrics.increment("speculative_narration", outcome="used")
+            return result
+
+        self._cancel_speculation(narration, payload, usage)
+        metrics.increment("speculative_narration", outcome="cancelled")
+        await self._apply_tool_calls(response, prompt_builder, character)
+        return None
+
+    async def _stream_speculative_narration(
+        self,
+        prompt_builder: PromptBuilder,
+        character: Character,
+        outcome: dict,
+        usage: TokenUsage,
+    ) -> AsyncIterator[Optional[TurnDelta]]:
+        """Streaming counterpart of `_speculative_dm_response`.
+
+        The speculative narration deltas are buffered until the tool round shows
+        that no tool was called, then replayed and followed live. A final None
+        tells the caller the speculative narration was used; without it a normal
+        narration round follows.
+        """
+        payload = self._prompt(prompt_builder)
+        speculative_outcome = {}
+        deltas: asyncio.Queue = asyncio.Queue()
+
+        async def pump() -> None:
+            try:
+                async for delta in self._stream_narration(
+                    payload, speculative_outcome, usage
+                ):
+                    deltas.put_nowait(delta)
+            finally:
+                deltas.put_nowait(None)
+
+        narration = self._speculate(pump)
+        try:
+            response = await self._call_llm(
+                payload, usage, TOOL_DECISION, tools=TOOLS_FOR_LLM
+            )
+            if response.tool_calls:
+                self._cancel_speculation(narration, payload, usage)
+                metrics.increment("speculative_narration", outcome="cancelled")
+                await self._apply_tool_calls(response, prompt_builder, character)
+                return
+
+            yielded = False
+            while (delta := await deltas.get()) is not None:
+                yielded = True
+                yield delta
+            try:
+                await narration
+            except Exception as e:
+                if yielded:
+                    raise
+                log_event("speculative_narration_failed", error=type(e).__name__)
+                metrics.increment("speculative_narration", outcome="failed")
+                return
+        finally:
+            self._cancel_speculation(narration, payload, usage)
+
+        metrics.increment("speculative_narration", outcome="used")
+        outcome.update(speculative_outcome)
+        yield None
+
+    async def _stream_narration(
+        self,
+        payload: PromptPayload,
+        outcome: dict,
+        usage: TokenUsage,
+        tools: list[dict] = None,
+    ) -> AsyncIterator[TurnDelta]:
+        """Runs a DM response call, yielding narration deltas as they arrive.
+
+        Once the model starts a tool call no more deltas are yielded, and if some
+        were, a reset delta voids them. Stores the final DM response text under
+        `outcome["text"]` and the completed response under `outcome["response"]`.
+        """
+        extractor = MessageToUserExtractor()
+
+        if not self.settings.llm_streaming:
+            response = await self._call_llm(
+                payload, usage, NARRATION, tools=tools, output_schema=DM_RESPONSE_SCHEMA
+            )
+            outcome["response"] = response
+            outcome["text"] = response.text
+            text = extractor.feed(response.text)
+            if text and not response.tool_calls:
+                yield TurnDelta(text=text)
+            return
+
+        chunks = []
+        forwarding, forwarded = True, False
+        async for event in self._stream_llm(
+            payload, NARRATION, tools=tools, output_schema=DM_RESPONSE_SCHEMA
+        ):
+            if event.type == "text_delta":
+                chunks.append(event.delta)
+                text = extractor.feed(event.delta)
+                if text and forwarding:
+                    forwarded = True
+                    yield TurnDelta(text=text)
+            elif event.type == "tool_call_started" and forwarding:
+                forwarding = False
+                if forwarded:
+                    yield TurnDelta(text="", reset=True)
+            elif event.type == "completed":
+                outcome["response"] = event.result
+                usage.add(event.result.usage)
+                _observe_phase(NARRATION, event.result)
+        outcome["text"] = "".join(chunks)
+
+    async def _run_tool_round(
+        self, prompt_builder: PromptBuilder, character: Character, usage: TokenUsage
+    ) -> None:
+        """Lets the model call tools and appends their results to the prompt."""
+        response = await self._call_llm(
+            self._prompt(prompt_builder), usage, TOOL_DECISION, tools=TOOLS_FOR_LLM
+        )
+        await self._apply_tool_calls(response, prompt_builder, character)
+
+    async def _apply_tool_calls(
+        self,
+        response: Optional[LLMResult],
+        prompt_builder: PromptBuilder,
+        character: Character,
+    ) -> bool:
+        """Executes the function calls in the response concurrently and appends their
+        results to the prompt. Returns whether any were made."""
+        function_calls = response.tool_calls if response else []
+        if not function_calls:
+            return False
+
+        started = time.perf_counter()
+        results = await execute_tool_calls(
+            function_calls, character, timeout_s=self.settings.llm_tool_timeout_seconds
+        )
+        metrics.observe(
+            "turn_phase_latency_ms",
+            (time.perf_counter() - started) * 1000,
+            phase=TOOL_EXECUTION,
+        )
+        for result in results:
+            prompt_builder.add_function_call_messages(
+                call_id=result.call_id,
+                name=result.name,
+                arguments=result.arguments,
+                output=result.output,
+            )
+        return True
+
     async def _load_context(
-        self, user_id: str, session_id: str
+        self, user_id: str, session_id: str, user_text: str
     ) -> Tuple[Session, List[Message], Character]:
-        """Loads the session, chat history, and character for the given user and session."""
+        """Inserts the user's message and loads the session, chat history, and
+        character for the given user and session in a single round trip.
+
+        Commits straight away so the connection goes back to the pool before the
+        LLM phase starts.
 
-        session = await self.chat_repo.get_session(user_id, session_id)
-        chat_history = await self.chat_repo.list_messages(session_id, limit=10)
-        character = await self.character_repo.get_character_by_session_id(
-            user_id, session_id
+        With the rolling summary on, messages that have left the history window but
+        are not in the summary yet are kept too. The summarizer folds them in once
+        a full batch has left the window, so there are at most that many.
+        """
+        window = self.settings.llm_history_window
+        rolling_summary = self.settings.enable_rolling_summary
+        context = await self.chat_repo.load_turn_context(
+            user_id,
+            session_id,
+            user_text=user_text,
+            history_limit=(
+                window + self.settings.llm_summary_batch_size
+                if rolling_summary
+                else window
+            ),
         )
-        return session, chat_history, character
+        await self.chat_repo.db_session.commit()
+
+        messages = context.messages
+        summarized_through = context.session.summarized_through_message_id
+        if rolling_summary and summarized_through is not None:
+            cut = len(messages) - window
+            messages = [
+                m
+                for i, m in enumerate(messages)
+                if i >= cut or m.message_id > summarized_through
+            ]
+        return context.session, messages, context.character
+
+    def _prompt(self, prompt_builder: PromptBuilder) -> PromptPayload:
+        """Returns the current prompt fitted to the configured token budget."""
+        return prompt_builder.budgeted_payload(
+            soft_limit=self.settings.llm_soft_prompt_budget,
+            hard_limit=self.settings.llm_hard_prompt_budget,
+        )
+
+    def _phase_options(self, phase: str) -> dict:
+        """Returns the model, temperature and output token limit for a turn phase.
+
+        The tool decision only has to pick a tool and its arguments, so it can run
+        on a smaller model with a tight token limit. Unset phase settings fall back
+        to the general llm_* settings.
+        """
+        s = self.settings
+        if phase == TOOL_DECISION:
+            model, temperature, max_tokens = (
+                s.llm_tool_model,
+                s.llm_tool_temperature,
+                s.llm_tool_max_output_tokens,
+            )
+        else:
+            model, temperature, max_tokens = (
+                s.llm_narration_model,
+                s.llm_narration_temperature,
+                s.llm_narration_max_output_tokens,
+            )
+        return {
+            "model": model,
+            "temperature": s.llm_temperature if temperature is None else temperature,
+            "max_tokens": max_tokens or s.llm_max_output_tokens,
+        }
 
     async def _call_llm(
         self,
         pruned_payload: PromptPayload,
+        usage: TokenUsage,
+        phase: str,
         tools: list[dict] = None,
         output_schema: dict = None,
-    ) -> Response:
+    ) -> LLMResult:
         result = await self.llm.generate(
             prompt_payload=pruned_payload,
             tools=tools,
             output_schema=output_schema,
-            temperature=0.7,
-            max_tokens=700,
+            **self._phase_options(phase),
         )
+        usage.add(result.usage)
+        _observe_phase(phase, result)
         return result
 
+    def _stream_llm(
+        self,
+        pruned_payload: PromptPayload,
+        phase: str,
+        tools: list[dict] = None,
+        output_schema: dict = None,
+    ) -> AsyncIterator[LLMStreamEvent]:
+        return self.llm.stream(
+            prompt_payload=pruned_payload,
+            tools=tools,
+            output_schema=output_schema,
+            **self._phase_options(phase),
+        )
+
+    async def _parse_dm_response(
+        self,
+        dm_response_str: str,
+        response: Optional[LLMResult],
+        session: Session,
+        prompt_builder: PromptBuilder,
+        usage: TokenUsage,
+    ) -> Tuple[DMResponse, Optional[LLMResult]]:
+        """Parses the DM response, repairing it locally if it is malformed.
+
+        Truncated JSON is closed and missing fields are filled, with the adventure
+        status falling back to the session's current one. Only if that fails is the
+        model asked once for the full response again.
+
+        Returns the DM response and the LLM response it came from: `response`, or
+        the re-ask's response if the model was asked again.
+
+        Raises:
+            ValueError: If the response could not be repaired.
+        """
+        defaults = {"update_adventure_status": asdict(session.adventure_status)}
+        dm_response, fixes = repair_dm_response(dm_response_str, defaults)
+        for fix in fixes:
+            metrics.increment("dm_response_fix", fix=fix)
+        if dm_response is not None:
+            path = "local_repair" if fixes else "valid"
+            metrics.increment("dm_response_repair", path=path)
+            if fixes:
+                log_event("dm_response_repaired", fixes=fixes)
+            return dm_response, response
+
+        if self.settings.llm_dm_response_reask:
+            prompt_builder.add_repair_request(dm_response_str)
+            reask = await self._call_llm(
+                self._prompt(prompt_builder),
+                usage,
+                NARRATION,
+                output_schema=DM_RESPONSE_SCHEMA,
+            )
+            dm_response, _ = repair_dm_response(reask.text, defaults)
+            if dm_response is not None:
+                metrics.increment("dm_response_repair", path="reask")
+                return dm_response, reask
+
+        metrics.increment("dm_response_repair", path="failed")
+        raise ValueError(f"Invalid DM response: {dm_response_str[:200]!r}")
+
     async def _handle_dm_response(
-        self, dm_response_str: str, character: Character, session_id: str
+        self,
+        dm_response: DMResponse,
+        character: Character,
+        session_id: str,
+        usage: Optional[TokenUsage] = None,
     ) -> str:
         """Handles the DM response by inserting the message to user and updating the adventure status."""
-        dm_response = DMResponse.model_validate_json(dm_response_str)
-
         message_to_user = dm_response.message_to_user
         msg = await self.chat_repo.insert_assistant_message_row(
-            session_id, message_to_user
+            session_id, message_to_user, usage
         )
 
         adventure_status = AdventureStatus(
@@ -190,3 +804,19 @@ class ChatService:
             )
 
         return msg
+
+
+def _discard(task: asyncio.Future) -> None:
+    """Cancels a speculative call, retrieving its error if it already failed."""
+    task.cancel()
+    if task.done() and not task.cancelled():
+        task.exception()
+
+
+def _observe_phase(phase: str, result: LLMResult) -> None:
+    """Records an LLM call's latency, and time to first token when streamed."""
+    labels = {"phase": phase, "model": result.model or "unknown"}
+    metrics.observe("turn_phase_latency_ms", result.timing.latency_ms, **labels)
+    if result.timing.ttft_ms is not None:
+        metrics.observe("turn_phase_ttft_ms", result.timing.ttft_ms, **labels)
+    metrics.increment("llm_output_tokens", result.usage.output_tokens, **labels)
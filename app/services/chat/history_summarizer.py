@@ -0,0 +1,122 @@
+from typing import List, Optional
+
+from app.adapters.db import db_session_scope
+from app.adapters.llm.base import LLMClient
+from app.adapters.llm.types import InputMessage, PromptPayload
+from app.domains.chat import ChatRepoProtocol, Message
+from app.domains.usage import TokenUsage
+from app.repos.factory import chat_repo_for, usage_repo_for
+from app.services.observability.logging import log_event
+from app.settings import Settings, get_settings
+
+SUMMARY_PROMPT = """
+You maintain the running summary of a Dungeons & Dragons adventure.
+## Rules:
+* Fold the new messages into the current summary and return only the updated summary
+* Keep names, places, items, promises, unresolved threads, and anything the players may refer back to
+* Drop small talk and details that no longer matter
+* Write in the past tense, in at most 200 words
+""".strip()
+
+
+class HistorySummarizer:
+    """Keeps a rolling summary of the messages that have left the history window.
+
+    Messages are folded into the summary in batches as they age out of the last
+    `llm_history_window` messages, so each update only sends the current summary and
+    one batch, and the turn prompt stays the same size however long the session runs.
+    Until their batch is full, aged-out messages stay in the turn prompt.
+
+    The tokens of the summary calls add up in `usage`.
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        chat_repo: ChatRepoProtocol,
+        settings: Optional[Settings] = None,
+    ):
+        self.llm = llm
+        self.chat_repo = chat_repo
+        self.settings = settings or get_settings()
+        self.usage = TokenUsage()
+
+    async def summarize_session(self, session_id: str) -> bool:
+        """Folds the next batch of aged-out messages into the session's summary.
+
+        Does nothing until a full batch has left the window. Returns whether the
+        summary was updated.
+        """
+        session = await self.chat_repo.get_session_by_id(session_id)
+        batch_size = self.settings.llm_summary_batch_size
+        messages = await self.chat_repo.list_messages_outside_window(
+            session_id,
+            after=session.summarized_through_message_id,
+            window=self.settings.llm_history_window,
+            limit=batch_size,
+        )
+        # Ends the read transaction so no connection is held during the LLM call.
+        await self.chat_repo.db_session.commit()
+        if len(messages) < batch_size:
+            return False
+
+        summary = await self._summarize(session.rolling_summary, messages)
+        if not summary:
+            return False
+
+        return await self.chat_repo.update_session_summary(
+            session_id,
+            summary,
+            summarized_through_message_id=messages[-1].message_id,
+            previous_through_message_id=session.summarized_through_message_id,
+        )
+
+    async def _summarize(
+        self, current_summary: Optional[str], messages: List[Message]
+    ) -> str:
+        rendered = "\n".join(f"{m.role}: {m.content}" for m in messages)
+        payload = PromptPayload(
+            messages=[
+                InputMessage(role="system", content=SUMMARY_PROMPT),
+                InputMessage(
+                    role="user",
+                    content=(
+                        f"## Current Summary\n{current_summary or 'None yet.'}\n\n"
+                        f"## New Messages\n{rendered}"
+                    ),
+                ),
+            ]
+        )
+        response = await self.llm.generate(
+            prompt_payload=payload,
+            temperature=0.3,
+            max_tokens=self.settings.llm_summary_max_tokens,
+        )
+        self.usage.add(response.usage)
+        return response.text.strip()
+
+
+async def run_history_summarizer(
+    llm: LLMClient, user_id: str, session_id: str
+) -> None:
+    """Background task: updates the session's rolling summary with its own DB session,
+    and adds the tokens it spent to the session and user usage."""
+    settings = get_settings()
+    if not settings.enable_rolling_summary or llm.retry_after():
+        return
+    async with db_session_scope() as db_session:
+        try:
+            summarizer = HistorySummarizer(llm, chat_repo_for(db_session), settings)
+            await summarizer.summarize_session(session_id)
+            if summarizer.usage.llm_calls:
+                await usage_repo_for(db_session).record_usage(
+                    user_id, session_id, summarizer.usage, turns=0
+                )
+            await db_session.commit()
+        except Exception as e:
+            log_event(
+                "rolling_summary_failed",
+                session_id=session_id,
+                error=type(e).__name__,
+            )
+            await db_session.rollback()
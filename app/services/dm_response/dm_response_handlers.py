@@ -1,8 +1,7 @@
 from app.domains.adventures import AdventureStatus
-from app.domains.character import Character
+from app.domains.character import Character, CharacterRepoProtocol
 from app.domains.character_common import Item
-from app.repos.character_repo import CharacterRepo
-from app.repos.chat_repo import ChatRepo
+from app.domains.chat import ChatRepoProtocol
 from app.services.dm_response.dm_response_models import (
     AddItemsToInventory,
     RemoveItemsFromInventory,
@@ -10,7 +9,7 @@ from app.services.dm_response.dm_response_models import (
 
 
 async def update_adventure_status(
-    chat_repo: ChatRepo, session_id: str, adventure_status: AdventureStatus
+    chat_repo: ChatRepoProtocol, session_id: str, adventure_status: AdventureStatus
 ):
     """Updates the adventure status for the given session based on the current turn.
 
@@ -23,7 +22,7 @@ async def update_adventure_status(
 
 
 async def add_items_to_inventory(
-    character_repo: CharacterRepo,
+    character_repo: CharacterRepoProtocol,
     character: Character,
     add_items_to_inventory: AddItemsToInventory,
 ):
@@ -49,7 +48,7 @@ async def add_items_to_inventory(
 
 
 async def remove_items_from_inventory(
-    character_repo: CharacterRepo,
+    character_repo: CharacterRepoProtocol,
     character: Character,
     remove_items_from_inventory: RemoveItemsFromInventory,
 ):
@@ -0,0 +1,158 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.services.dm_response.dm_response_models import DM_RESPONSE_SCHEMA, DMResponse
+
+DM_RESPONSE_JSON_SCHEMA = DM_RESPONSE_SCHEMA["format"]["schema"]
+
+_CLOSERS = {"{": "}", "[": "]"}
+_COMPLETE_LITERAL = re.compile(r"^(true|false|null|-?\d+(\.\d+)?([eE][+-]?\d+)?)$")
+_PARTIAL_UNICODE_ESCAPE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+
+
+def close_truncated_json(text: str) -> str:
+    """Closes JSON that was cut off mid-output, e.g. at the output token limit.
+
+    A string value cut off mid-way is closed where it stopped, so a truncated
+    narration keeps the text that was generated. Anything else left dangling (a
+    key without its value, a partial number or literal, a trailing comma) is cut
+    back to the last complete value. The open arrays and objects are then closed.
+    """
+    stack: List[str] = []
+    expect_key = in_string = is_key = escape = False
+    bare = ""
+    bare_start = 0
+    safe_end, safe_stack = 0, []
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if is_key:
+                    expect_key = False
+                else:
+                    safe_end, safe_stack = i + 1, list(stack)
+            continue
+
+        if bare and (ch.isspace() or ch in ",:]}"):
+            if _COMPLETE_LITERAL.match(bare):
+                safe_end, safe_stack = bare_start + len(bare), list(stack)
+            bare = ""
+
+        if ch == '"':
+            in_string, is_key = True, expect_key
+        elif ch in "{[":
+            stack.append(ch)
+            expect_key = ch == "{"
+            safe_end, safe_stack = i + 1, list(stack)
+        elif ch in "]}":
+            if stack:
+                stack.pop()
+            expect_key = False
+            safe_end, safe_stack = i + 1, list(stack)
+        elif ch == ",":
+            expect_key = bool(stack) and stack[-1] == "{"
+        elif not ch.isspace() and ch != ":":
+            if not bare:
+                bare_start = i
+            bare += ch
+
+    if bare and _COMPLETE_LITERAL.match(bare):
+        safe_end, safe_stack = len(text), list(stack)
+
+    if in_string and not is_key:
+        head = text[:-1] if escape else text
+        head = _PARTIAL_UNICODE_ESCAPE.sub("", head)
+        return head + '"' + _closers(stack)
+    return text[:safe_end] + _closers(safe_stack)
+
+
+def conform_to_schema(value: Any, schema: dict, default: Any = None) -> Any:
+    """Fills in what a JSON schema requires but the model left out.
+
+    Missing required fields are taken from `default` when it has them, otherwise
+    set to None if the schema allows null. Array items that still miss required
+    fields, typically the last one of a truncated list, are dropped.
+    """
+    types = _types(schema)
+    if "object" in types and isinstance(value, dict):
+        out = dict(value)
+        for name in schema.get("required", []):
+            prop = schema["properties"][name]
+            fallback = default.get(name) if isinstance(default, dict) else None
+            if name in out:
+                out[name] = conform_to_schema(out[name], prop, fallback)
+            elif fallback is not None:
+                out[name] = fallback
+            elif "null" in _types(prop):
+                out[name] = None
+        return out
+    if "array" in types and isinstance(value, list):
+        item_schema = schema.get("items", {})
+        items = [conform_to_schema(v, item_schema) for v in value]
+        return [v for v in items if _has_required(v, item_schema)]
+    return value
+
+
+def repair_dm_response(
+    text: str, defaults: Optional[dict] = None
+) -> Tuple[Optional[DMResponse], List[str]]:
+    """Parses a DM response, fixing common defects locally.
+
+    Returns the response, or None if it could not be repaired, together with the
+    fixes that were applied: `extracted` (text around the JSON object was cut),
+    `closed` (truncated JSON was closed) and `filled` (missing fields were filled
+    from `defaults` or set to None).
+    """
+    try:
+        return DMResponse.model_validate_json(text), []
+    except ValidationError:
+        pass
+
+    fixes = []
+    start = text.find("{")
+    if start < 0:
+        return None, fixes
+    candidate = text[start:].strip()
+    if start > 0 or candidate.endswith("```"):
+        fixes.append("extracted")
+        candidate = candidate.removesuffix("```").rstrip()
+
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError:
+        try:
+            data = json.loads(close_truncated_json(candidate))
+        except json.JSONDecodeError:
+            return None, fixes
+        fixes.append("closed")
+
+    conformed = conform_to_schema(data, DM_RESPONSE_JSON_SCHEMA, defaults)
+    if conformed != data:
+        fixes.append("filled")
+    try:
+        return DMResponse.model_validate(conformed), fixes
+    except ValidationError:
+        return None, fixes
+
+
+def _closers(stack: List[str]) -> str:
+    return "".join(_CLOSERS[c] for c in reversed(stack))
+
+
+def _types(schema: dict) -> List[str]:
+    types = schema.get("type", [])
+    return types if isinstance(types, list) else [types]
+
+
+def _has_required(value: Any, schema: dict) -> bool:
+    if not isinstance(value, dict) or "object" not in _types(schema):
+        return True
+    return all(name in value for name in schema.get("required", []))
@@ -0,0 +1,112 @@
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class MessageToUserExtractor:
+    """Incrementally extracts the `message_to_user` string from a streamed DM response.
+
+    The DM response arrives as JSON text split into arbitrary chunks. Each call to
+    `feed` returns the newly decoded characters of the top-level `message_to_user`
+    value, so the narration can be forwarded while the remaining fields are still
+    being generated. Escape sequences split across chunks are buffered.
+    """
+
+    def __init__(self, field: str = "message_to_user"):
+        self.field = field
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._expect_key = False
+        self._is_key = False
+        self._capturing = False
+        self._escape = ""
+        self._high_surrogate = ""
+        self._key_chars: list[str] = []
+        self._last_key = ""
+
+    def feed(self, chunk: str) -> str:
+        """Consumes the next chunk and returns any newly decoded field text."""
+        out: list[str] = []
+        for ch in chunk:
+            if self._in_string:
+                self._consume_string_char(ch, out)
+            elif ch == '"':
+                self._start_string()
+            elif ch in "{[":
+                self._depth += 1
+                self._expect_key = ch == "{" and self._depth == 1
+            elif ch in "}]":
+                self._depth -= 1
+            elif self._depth == 1:
+                if ch == ",":
+                    self._expect_key = True
+                elif ch == ":":
+                    self._expect_key = False
+        return "".join(out)
+
+    def _start_string(self) -> None:
+        self._in_string = True
+        self._is_key = self._depth == 1 and self._expect_key
+        self._capturing = (
+            self._depth == 1
+            and not self._expect_key
+            and not self.done
+            and self._last_key == self.field
+        )
+        self._key_chars = []
+
+    def _end_string(self) -> None:
+        self._in_string = False
+        if self._is_key:
+            self._last_key = "".join(self._key_chars)
+        elif self._capturing:
+            self.done = True
+        self._is_key = False
+        self._capturing = False
+
+    def _consume_string_char(self, ch: str, out: list[str]) -> None:
+        if self._escape:
+            self._escape += ch
+            decoded = self._decode_escape()
+            if decoded is None:
+                return
+            self._escape = ""
+            self._emit(decoded, out)
+            return
+        if ch == "\\":
+            self._escape = ch
+        elif ch == '"':
+            self._end_string()
+        else:
+            self._emit(ch, out)
+
+    def _decode_escape(self) -> str | None:
+        """Returns the decoded escape once complete, or None while more chars are needed."""
+        kind = self._escape[1]
+        if kind != "u":
+            return _SIMPLE_ESCAPES.get(kind, kind)
+        if len(self._escape) < 6:
+            return None
+        code = int(self._escape[2:6], 16)
+        if 0xD800 <= code <= 0xDBFF:
+            self._high_surrogate = chr(code)
+            return ""
+        if 0xDC00 <= code <= 0xDFFF and self._high_surrogate:
+            pair = self._high_surrogate + chr(code)
+            self._high_surrogate = ""
+            return pair.encode("utf-16", "surrogatepass").decode("utf-16")
+        return chr(code)
+
+    def _emit(self, text: str, out: list[str]) -> None:
+        if self._is_key:
+            self._key_chars.append(text)
+        elif self._capturing:
+            out.append(text)
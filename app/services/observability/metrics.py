@@ -0,0 +1,88 @@
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _label_string(key: _Key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+class Timing:
+    """Count, sum and a moving window of samples for one metric series."""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class Metrics:
+    """In-process counters and timings, labelled like `name{phase=tool}`.
+
+    Percentiles are taken over the most recent `window` samples of each series, so
+    they follow the current behaviour rather than the process's whole lifetime.
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._counters: Dict[_Key, int] = defaultdict(int)
+        self._timings: Dict[_Key, Timing] = {}
+
+    def increment(self, name: str, value: int = 1, **labels: Any) -> None:
+        self._counters[_key(name, labels)] += value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _key(name, labels)
+        timing = self._timings.get(key)
+        if timing is None:
+            timing = self._timings[key] = Timing(self.window)
+        timing.observe(value)
+
+    def counter(self, name: str, **labels: Any) -> int:
+        return self._counters.get(_key(name, labels), 0)
+
+    def timing(self, name: str, **labels: Any) -> Optional[Timing]:
+        return self._timings.get(_key(name, labels))
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": {_label_string(k): v for k, v in self._counters.items()},
+            "timings": {
+                _label_string(k): t.summary() for k, t in self._timings.items()
+            },
+        }
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._timings.clear()
+
+
+metrics = Metrics()
@@ -1,5 +1,5 @@
 import json
-from typing import List
+from typing import List, Optional
 
 from app.domains.adventures import AdventureStatus
 from app.domains.character import Character
@@ -10,6 +10,8 @@ from app.adapters.llm.types import (
     InputMessage,
     PromptPayload,
 )
+from app.services.observability.logging import log_event
+from app.services.orchestration import token_budget
 
 STANDARD_RULES_PROMPT = """
 You are Merlin, a Dungeon Master guiding a Dungeons & Dragons adventure. Speak from the DM’s perspective and keep narration immersive but concise.
@@ -25,20 +27,51 @@ You are Merlin, a Dungeon Master guiding a Dungeons & Dragons adventure. Speak f
 * If no tools are necessary, respond with a message to the user.
 """.strip()
 
+REPAIR_PROMPT = (
+    "Your previous response was cut off or was not valid JSON. Send the complete "
+    "response again as valid JSON, keeping message_to_user within 2 to 4 sentences."
+)
+
 
 class PromptBuilder:
+    """Builds the turn prompt.
+
+    The prompt is laid out for provider prompt caching: static content (rules,
+    story brief, character sheet) first, then the rolling summary of older turns,
+    which only changes when a batch of messages leaves the history window, then the
+    chat history, and the adventure status last because it changes on every turn.
+    While the history window is still filling up, everything before the status is
+    byte-identical from one turn to the next.
+
+    `sections` tags every message in `prompt_payload` with its prompt section so the
+    token budget can drop or trim the least important messages first.
+    """
+
     def __init__(
         self,
         story_brief: str,
         character: Character,
         adventure_status: AdventureStatus,
         chat_history: List[Message],
+        previous_response_id: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        rolling_summary: Optional[str] = None,
+        previous_response_backend: Optional[str] = None,
     ):
         self.story_brief = story_brief
         self.character = character
         self.adventure_status = adventure_status
         self.chat_history = chat_history
-        self.prompt_payload = self.build_standard_prompt()
+        self.previous_response_id = previous_response_id
+        self.previous_response_backend = previous_response_backend
+        self.cache_key = cache_key
+        self.rolling_summary = rolling_summary
+        self.sections: list[str] = []
+        self.prompt_payload = (
+            self.build_chained_prompt()
+            if previous_response_id
+            else self.build_standard_prompt()
+        )
 
     def build_standard_prompt(self) -> PromptPayload:
         story_brief = "## Story Brief\n" + self.story_brief
@@ -47,20 +80,58 @@ class PromptBuilder:
 
         adventure_status = "## Adventure Status\n" + self._render_adventure_status()
 
+        summary = []
+        if self.rolling_summary:
+            summary = [
+                InputMessage(
+                    role="system",
+                    content="## Earlier in the Adventure\n" + self.rolling_summary,
+                )
+            ]
+
         chat_history = self._render_chat_history()
 
+        self.sections = (
+            [token_budget.RULES, token_budget.BRIEF, token_budget.CHARACTER]
+            + [token_budget.SUMMARY] * len(summary)
+            + self._chat_history_sections(len(chat_history))
+            + [token_budget.STATUS]
+        )
         return PromptPayload(
             messages=[
                 InputMessage(role="system", content=STANDARD_RULES_PROMPT),
                 InputMessage(role="system", content=story_brief),
                 InputMessage(role="system", content=character),
-                InputMessage(role="system", content=adventure_status),
             ]
-            + chat_history,
+            + summary
+            + chat_history
+            + [InputMessage(role="system", content=adventure_status)],
+            prompt_cache_key=self.cache_key,
         )
 
+    def build_chained_prompt(self) -> PromptPayload:
+        """Builds a prompt that continues the provider-side response chain.
+
+        Only the newest message is sent. The rules, brief, character sheet and
+        earlier turns are already part of the chain behind `previous_response_id`.
+        """
+        messages = self._render_chat_history()[-1:]
+        self.sections = self._chat_history_sections(len(messages))
+        return PromptPayload(
+            messages=messages,
+            previous_response_id=self.previous_response_id,
+            previous_response_backend=self.previous_response_backend,
+            prompt_cache_key=self.cache_key,
+        )
+
+    def unchain(self) -> None:
+        """Drops the response chain and rebuilds the full prompt."""
+        self.previous_response_id = None
+        self.previous_response_backend = None
+        self.prompt_payload = self.build_standard_prompt()
+
     def add_function_call_messages(
-        self, call_id: str, name: str, arguments: dict, output: bool
+        self, call_id: str, name: str, arguments: dict, output: str
     ):
         function_call = FunctionCall(
             call_id=call_id, name=name, arguments=json.dumps(arguments)
@@ -68,6 +139,29 @@ class PromptBuilder:
         function_call_output = FunctionCallOutput(call_id=call_id, output=output)
         self.prompt_payload.messages.append(function_call)
         self.prompt_payload.messages.append(function_call_output)
+        self.sections += [token_budget.TOOL, token_budget.TOOL]
+
+    def add_repair_request(self, invalid_response: str):
+        """Appends a DM response that could not be parsed, asking for it again."""
+        self.prompt_payload.messages.append(
+            InputMessage(role="assistant", content=invalid_response)
+        )
+        self.prompt_payload.messages.append(
+            InputMessage(role="system", content=REPAIR_PROMPT)
+        )
+        self.sections += [token_budget.TOOL, token_budget.TOOL]
+
+    def budgeted_payload(self, soft_limit: int, hard_limit: int) -> PromptPayload:
+        """Returns the prompt payload fitted to the token budget."""
+        payload, meta = token_budget.apply_budget(
+            self.prompt_payload,
+            soft_limit=soft_limit,
+            hard_limit=hard_limit,
+            sections=self.sections,
+        )
+        if meta["applied"]:
+            log_event("prompt_budget_applied", **meta)
+        return payload
 
     def _render_adventure_status(self) -> str:
         return (
@@ -89,5 +183,16 @@ class PromptBuilder:
             f"Inventory:\n{rendered_inventory}\n"
         )
 
+    def _chat_history_sections(self, count: int) -> list[str]:
+        """The newest history message is the user's input for this turn."""
+        if not count:
+            return []
+        latest = (
+            token_budget.USER_INPUT
+            if self.chat_history[-1].role == "user"
+            else token_budget.HISTORY
+        )
+        return [token_budget.HISTORY] * (count - 1) + [latest]
+
     def _render_chat_history(self) -> list[InputMessage]:
         return [InputMessage(role=m.role, content=m.content) for m in self.chat_history]
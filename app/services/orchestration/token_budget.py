@@ -1,25 +1,90 @@
-from typing import Tuple, Dict
-from app.adapters.llm.types import PromptPayload
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from app.adapters.llm.types import (
+    FunctionCall,
+    FunctionCallOutput,
+    InputMessage,
+    PromptPayload,
+)
 
-def estimate_tokens(payload: PromptPayload, model: str = "unknown") -> int:
-    """
-    Very rough character-to-token estimate for budgeting.
+# Sections of the turn prompt, as tagged by the PromptBuilder.
+RULES = "rules"
+BRIEF = "brief"
+CHARACTER = "character"
+SUMMARY = "summary"
+STATUS = "status"
+HISTORY = "history"
+USER_INPUT = "input"
+TOOL = "tool"
+
+# Lower priority goes first. History is dropped oldest-first; everything else is
+# only ever trimmed, and only when the hard limit would otherwise be exceeded.
+SECTION_PRIORITIES: Dict[str, int] = {
+    HISTORY: 10,
+    SUMMARY: 30,
+    BRIEF: 40,
+    STATUS: 60,
+    CHARACTER: 70,
+    RULES: 90,
+    USER_INPUT: 95,
+    TOOL: 100,
+}
+DROPPABLE_SECTIONS = frozenset({HISTORY})
+# Tool calls and their outputs must stay paired, so they are never cut.
+TRIMMABLE_SECTIONS = frozenset(
+    {SUMMARY, BRIEF, STATUS, CHARACTER, RULES, USER_INPUT}
+)
+
+MESSAGE_OVERHEAD_TOKENS = 4
+TRIM_MARKER = " [...]"
+_MIN_TRIMMED_TOKENS = 16
+
+
+class PromptBudgetExceeded(Exception):
+    """The prompt is still above the hard limit after dropping and trimming."""
+
+    def __init__(self, estimate_tokens: int, hard_limit: int):
+        super().__init__(
+            f"prompt needs ~{estimate_tokens} tokens, above the hard limit of "
+            f"{hard_limit}"
+        )
+        self.estimate_tokens = estimate_tokens
+        self.hard_limit = hard_limit
+
+
+@lru_cache(maxsize=8192)
+def _text_tokens(text: str) -> int:
+    """Very rough character-to-token estimate, cached per text.
+
+    Rendered messages are rebuilt on every turn but their text rarely changes, so
+    the cache turns most estimates into a dict lookup.
     """
-    total_chars = 0
-    total_chars += sum(len(s or "") for s in payload.system_messages)
-    total_chars += sum(len(u or "") for u in payload.user_messages)
-    return max(1, total_chars // 4)
+    return max(1, len(text) // 4) if text else 0
+
+
+def message_tokens(message: InputMessage | FunctionCall | FunctionCallOutput) -> int:
+    if isinstance(message, FunctionCall):
+        text_tokens = _text_tokens(message.name) + _text_tokens(message.arguments)
+    elif isinstance(message, FunctionCallOutput):
+        text_tokens = _text_tokens(message.output)
+    else:
+        text_tokens = _text_tokens(message.content)
+    return text_tokens + MESSAGE_OVERHEAD_TOKENS
 
 
-def _shrink_text_to_ratio(text: str, ratio: float) -> str:
+def estimate_tokens(payload: PromptPayload) -> int:
     """
-    Returns a prefix of text scaled by ratio, bounded to at least 1 char if text is non-empty.
+    Very rough character-to-token estimate for budgeting.
     """
-    if not text:
-        return text
-    n = max(1, int(len(text) * ratio))
-    return text[:n]
+    return sum(message_tokens(m) for m in payload.messages)
+
+
+def _trim_message(message: InputMessage, max_tokens: int) -> InputMessage:
+    keep_chars = max(0, max_tokens - MESSAGE_OVERHEAD_TOKENS) * 4 - len(TRIM_MARKER)
+    return message.model_copy(
+        update={"content": message.content[: max(0, keep_chars)] + TRIM_MARKER}
+    )
 
 
 def apply_budget(
@@ -27,77 +92,74 @@ def apply_budget(
     *,
     soft_limit: int,
     hard_limit: int,
+    sections: Optional[Sequence[str]] = None,
 ) -> Tuple[PromptPayload, Dict]:
     """
-    Prunes the payload to fit within soft_limit, not to exceed hard_limit.
+    Fits the payload within soft_limit where possible and within hard_limit.
+
+    `sections` tags each message in `payload.messages` with its prompt section.
+    Untagged payloads are treated as all history, except that the last message is
+    kept as the user's input.
+
     Strategy:
-      1) Prefer shrinking the conversation user message (index 1) if present.
-      2) Then shrink the character sheet (index 0).
-      3) As a last resort, shrink the task (last index) and, if still over, hard-truncate all.
-    Returns a new PromptPayload and a small budgeting metadata dict.
+      1) Over the soft limit, drop history messages, oldest first.
+      2) Over the hard limit, trim the remaining messages from the lowest section
+         priority up, cutting each only as much as still needed.
+    Returns a new PromptPayload (or the same one if nothing changed) and a small
+    budgeting metadata dict.
+
+    Raises:
+        PromptBudgetExceeded: If the messages that can be neither dropped nor
+            trimmed (tool calls, and trimmed messages' minimum length) are still
+            above hard_limit.
     """
-    est = estimate_tokens(payload)
-    if est <= soft_limit:
-        return payload, {"applied": False, "strategy": "none", "estimate_tokens": est}
-
-    pruned = PromptPayload(**payload.model_dump())
-    strategy_steps = []
-
-    def within(limit: int) -> bool:
-        return estimate_tokens(pruned) <= limit
-
-    if len(pruned.user_messages) >= 2 and pruned.user_messages[1]:
-        original = pruned.user_messages[1]
-        for r in (0.75, 0.5, 0.35, 0.25):
-            pruned.user_messages[1] = _shrink_text_to_ratio(original, r)
-            strategy_steps.append(f"shrink_conversation_{int(r * 100)}")
-            if within(soft_limit):
-                return pruned, {
-                    "applied": True,
-                    "strategy": strategy_steps,
-                    "estimate_tokens": estimate_tokens(pruned),
-                }
-
-    if len(pruned.user_messages) >= 1 and pruned.user_messages[0]:
-        original = pruned.user_messages[0]
-        for r in (0.75, 0.5, 0.35, 0.25):
-            pruned.user_messages[0] = _shrink_text_to_ratio(original, r)
-            strategy_steps.append(f"shrink_character_{int(r * 100)}")
-            if within(soft_limit):
-                return pruned, {
-                    "applied": True,
-                    "strategy": strategy_steps,
-                    "estimate_tokens": estimate_tokens(pruned),
-                }
-
-    if len(pruned.user_messages) >= 1:
-        idx = len(pruned.user_messages) - 1
-        original = pruned.user_messages[idx]
-        for r in (0.75, 0.5, 0.35, 0.25):
-            pruned.user_messages[idx] = _shrink_text_to_ratio(original, r)
-            strategy_steps.append(f"shrink_task_{int(r * 100)}")
-            if within(soft_limit):
-                return pruned, {
-                    "applied": True,
-                    "strategy": strategy_steps,
-                    "estimate_tokens": estimate_tokens(pruned),
-                }
-
-    if estimate_tokens(pruned) > hard_limit:
-        budget_chars = hard_limit * 4
-        sys_join = "\n".join(pruned.system_messages)
-        usr_join = "\n".join(pruned.user_messages)
-        combined = (sys_join + "\n" + usr_join).strip()
-        combined = combined[:budget_chars]
-        midpoint = min(len(sys_join), len(combined))
-        new_sys = sys_join[:midpoint]
-        new_usr = combined[midpoint:]
-        pruned.system_messages = [new_sys] if new_sys else []
-        pruned.user_messages = [new_usr] if new_usr else []
-        strategy_steps.append("hard_truncate_all")
+    messages = payload.messages
+    counts = [message_tokens(m) for m in messages]
+    total = sum(counts)
+    if total <= soft_limit:
+        return payload, {"applied": False, "strategy": "none", "estimate_tokens": total}
+
+    if sections is None or len(sections) != len(messages):
+        sections = [HISTORY] * (len(messages) - 1) + [USER_INPUT]
+
+    order = sorted(
+        range(len(messages)), key=lambda i: (SECTION_PRIORITIES.get(sections[i], 0), i)
+    )
+    kept: List[Optional[InputMessage | FunctionCall | FunctionCallOutput]] = list(
+        messages
+    )
+    strategy_steps: List[str] = []
+
+    dropped = 0
+    for i in order:
+        if total <= soft_limit:
+            break
+        if sections[i] in DROPPABLE_SECTIONS:
+            kept[i] = None
+            total -= counts[i]
+            dropped += 1
+    if dropped:
+        strategy_steps.append(f"drop_{HISTORY}_{dropped}")
+
+    for i in order:
+        if total <= hard_limit:
+            break
+        if kept[i] is None or sections[i] not in TRIMMABLE_SECTIONS:
+            continue
+        target = max(_MIN_TRIMMED_TOKENS, counts[i] - (total - hard_limit))
+        if target >= counts[i]:
+            continue
+        kept[i] = _trim_message(kept[i], target)
+        new_count = message_tokens(kept[i])
+        total -= counts[i] - new_count
+        strategy_steps.append(f"trim_{sections[i]}")
+
+    if total > hard_limit:
+        raise PromptBudgetExceeded(total, hard_limit)
 
+    pruned = payload.model_copy(update={"messages": [m for m in kept if m is not None]})
     return pruned, {
         "applied": True,
         "strategy": strategy_steps or ["no_room_left"],
-        "estimate_tokens": estimate_tokens(pruned),
+        "estimate_tokens": total,
     }
@@ -1,32 +1,75 @@
 import time
 
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
 
 class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After `open_threshold` consecutive failures the breaker opens and rejects
+    requests for `reset_seconds`. It then goes half-open and lets a single probe
+    through: a success closes it, a failure opens it again for another period.
+    """
+
     def __init__(self, open_threshold: int, reset_seconds: int):
         self.open_threshold = open_threshold
         self.reset_seconds = reset_seconds
+        self._state = CLOSED
         self._fail_count = 0
         self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._cooldown_elapsed():
+            return HALF_OPEN
+        return self._state
 
     def is_open(self) -> bool:
-        if self._opened_at == 0:
-            return False
-        if time.time() - self._opened_at >= self.reset_seconds:
-            self._fail_count = 0
-            self._opened_at = 0.0
-            return False
-        return True
+        return self.retry_after() > 0
+
+    def allow_request(self) -> bool:
+        """Returns whether a request may go through, claiming the half-open probe
+        if it is the one let through."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._state = HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def retry_after(self) -> int:
+        """Seconds until a request would be let through, 0 if it would be now."""
+        state = self.state
+        if state == CLOSED:
+            return 0
+        if state == HALF_OPEN:
+            return 1 if self._probe_in_flight else 0
+        return max(1, int(self.reset_seconds - (time.monotonic() - self._opened_at)))
+
+    def remaining_cooldown(self) -> int:
+        return self.retry_after()
 
     def record_success(self) -> None:
+        self._state = CLOSED
         self._fail_count = 0
         self._opened_at = 0.0
+        self._probe_in_flight = False
 
     def record_failure(self) -> None:
         self._fail_count += 1
-        if self._fail_count >= self.open_threshold and self._opened_at == 0.0:
-            self._opened_at = time.time()
+        if self._state == HALF_OPEN or self._fail_count >= self.open_threshold:
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
 
-    def remaining_cooldown(self) -> int:
-        if not self.is_open():
-            return 0
-        return max(0, int(self.reset_seconds - (time.time() - self._opened_at)))
+    def release_probe(self) -> None:
+        """Gives up the half-open probe without a verdict, e.g. when it was cancelled."""
+        self._probe_in_flight = False
+
+    def _cooldown_elapsed(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.reset_seconds
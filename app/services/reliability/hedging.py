@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Keeps the most recent call latencies per model."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+
+    def record(self, model: str, seconds: float) -> None:
+        self._samples[model].append(seconds)
+
+    def count(self, model: str) -> int:
+        return len(self._samples[model])
+
+    def percentile(self, model: str, p: float) -> Optional[float]:
+        samples = self._samples[model]
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
+
+
+class HedgePolicy:
+    """Decides when to fire a hedge request, and caps how many are fired per minute."""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_hedges_per_minute: int = 30,
+        min_delay_s: float = 0.25,
+        min_samples: int = 20,
+    ):
+        self.percentile = percentile
+        self.max_hedges_per_minute = max_hedges_per_minute
+        self.min_delay_s = min_delay_s
+        self.min_samples = min_samples
+        self._fired: Deque[float] = deque()
+
+    def hedge_delay(self, tracker: LatencyTracker, model: str) -> Optional[float]:
+        """Returns how long to wait before hedging, or None if there is too little
+        latency history to tell what slow looks like."""
+        if tracker.count(model) < self.min_samples:
+            return None
+        return max(self.min_delay_s, tracker.percentile(model, self.percentile))
+
+    def try_acquire(self) -> bool:
+        """Takes one hedge from the per-minute allowance, if any is left."""
+        now = time.monotonic()
+        while self._fired and now - self._fired[0] >= 60:
+            self._fired.popleft()
+        if len(self._fired) >= self.max_hedges_per_minute:
+            return False
+        self._fired.append(now)
+        return True
+
+
+async def hedged(
+    fn: Callable[[], Awaitable[T]],
+    *,
+    delay_s: Optional[float],
+    policy: HedgePolicy,
+    on_hedge: Optional[Callable[[], None]] = None,
+) -> T:
+    """Runs `fn`, firing a second identical call if the first has not returned
+    after `delay_s`.
+
+    Whichever call finishes first wins and the other is cancelled. If one call
+    fails the other is still awaited, so a hedge also covers a failed primary.
+    If the caller is cancelled, every call still running is cancelled with it.
+    """
+    primary = asyncio.ensure_future(fn())
+    tasks = [primary]
+    try:
+        if delay_s is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay_s)
+        if done or not policy.try_acquire():
+            return await primary
+
+        if on_hedge:
+            on_hedge()
+        tasks.append(asyncio.ensure_future(fn()))
+        pending = set(tasks)
+        while True:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            winner = next((t for t in done if t.exception() is None), None)
+            if winner is not None:
+                return winner.result()
+            if not pending:
+                return next(iter(done)).result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,319 @@
+import asyncio
+import fcntl
+import json
+import math
+import mmap
+import os
+import re
+import time
+from typing import Callable, Dict, Mapping, Optional, Protocol, TypeVar
+
+import httpx
+
+from app.adapters.llm.errors import LLMRateLimitedError
+from app.services.observability.logging import log_event
+from app.services.observability.metrics import metrics
+
+T = TypeVar("T")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+_LOCK_RETRY_MIN_S = 0.0005
+_LOCK_RETRY_MAX_S = 0.01
+
+# LLM clients name the model of a call, and the routed backend serving it, in
+# these headers. The shared HTTP client moves them into request extensions before
+# the request is sent, so the response hook can tell whose limits the response
+# reports.
+MODEL_HEADER = "x-merlin-model"
+BACKEND_HEADER = "x-merlin-backend"
+_REQUEST_TAGS = {MODEL_HEADER: "merlin_model", BACKEND_HEADER: "merlin_backend"}
+
+
+class BucketStore(Protocol):
+    """Holds the governor's per-model bucket state.
+
+    `transact` runs `fn` on the model's state dict under the store's lock and
+    persists what it changed, so check-and-reserve is atomic.
+    """
+
+    async def transact(self, key: str, fn: Callable[[dict], T]) -> T: ...
+
+
+class MemoryBucketStore:
+    """Bucket state for a single process."""
+
+    def __init__(self):
+        self._state: Dict[str, dict] = {}
+
+    async def transact(self, key: str, fn: Callable[[dict], T]) -> T:
+        return fn(self._state.setdefault(key, {}))
+
+
+class FileBucketStore:
+    """Bucket state shared by every worker process on the host.
+
+    The state is a small JSON document in a memory-mapped file (put it on
+    /dev/shm to keep it off disk). An exclusive `flock` around each transaction
+    serialises the workers. The lock is taken without blocking and retried after
+    a short sleep, so a worker waiting for it does not stall its event loop.
+    """
+
+    def __init__(self, path: str, size: int = 64 * 1024):
+        self.path = path
+        self.size = size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+    async def transact(self, key: str, fn: Callable[[dict], T]) -> T:
+        await self._lock()
+        try:
+            raw = self._map[:].split(b"\0", 1)[0]
+            state = json.loads(raw) if raw else {}
+            result = fn(state.setdefault(key, {}))
+            data = json.dumps(state, separators=(",", ":")).encode()
+            if len(data) >= self.size:
+                raise ValueError(f"Rate limit state outgrew {self.path}")
+            self._map[: len(data) + 1] = data + b"\0"
+            return result
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    async def _lock(self) -> None:
+        delay = _LOCK_RETRY_MIN_S
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _LOCK_RETRY_MAX_S)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class RateLimitGovernor:
+    """Paces LLM calls to the provider's requests- and tokens-per-minute limits.
+
+    Each model has two token buckets, one for requests and one for tokens, sized
+    from the `x-ratelimit-limit-*` response headers and refilled evenly over a
+    minute. The `x-ratelimit-remaining-*` headers pull the buckets down to what
+    the provider reports, and a 429 blocks the model until its Retry-After has
+    passed.
+
+    Before each call `acquire` reserves one request and the call's estimated
+    tokens. A call that cannot be served straight away waits its turn, or is shed
+    with `LLMRateLimitedError` if it would wait longer than `max_wait_s`. Until a
+    model's limits have been seen in a response, its calls are not paced.
+
+    Deployments have their own limits, so the buckets of a routed `backend` are
+    kept apart from those of other backends serving the same model.
+    """
+
+    def __init__(
+        self,
+        store: Optional[BucketStore] = None,
+        max_wait_s: float = 10.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.store = store or MemoryBucketStore()
+        self.max_wait_s = max_wait_s
+        self._clock = clock
+
+    async def acquire(
+        self, model: str, tokens: int, backend: Optional[str] = None
+    ) -> None:
+        """Waits until one request and `tokens` tokens are available, then
+        reserves them.
+
+        Raises:
+            LLMRateLimitedError: If that would take longer than `max_wait_s`.
+        """
+        key = _bucket_key(model, backend)
+        deadline = self._clock() + self.max_wait_s
+        queued = False
+        while True:
+            now = self._clock()
+            wait = await self.store.transact(key, lambda s: _reserve(s, tokens, now))
+            if wait <= 0:
+                return
+            if now + wait > deadline:
+                metrics.increment("llm_rate_limit", outcome="shed", model=model)
+                log_event(
+                    "llm_rate_limit_shed",
+                    model=model,
+                    backend=backend,
+                    wait_s=round(wait, 2),
+                )
+                raise LLMRateLimitedError(model, retry_after=math.ceil(wait))
+            if not queued:
+                queued = True
+                metrics.increment("llm_rate_limit", outcome="queued", model=model)
+            await asyncio.sleep(wait)
+
+    async def observe(
+        self,
+        model: str,
+        status_code: int,
+        headers: Mapping[str, str],
+        backend: Optional[str] = None,
+    ) -> None:
+        """Updates the model's buckets from a provider response."""
+        limits = _parse_headers(headers)
+        now = self._clock()
+        if status_code == 429:
+            metrics.increment("llm_rate_limit", outcome="provider_429", model=model)
+            limits["blocked_for"] = _retry_after(headers) or limits.get("reset", 1.0)
+        if limits:
+            await self.store.transact(
+                _bucket_key(model, backend), lambda s: _update(s, limits, now)
+            )
+
+
+def _bucket_key(model: str, backend: Optional[str]) -> str:
+    return f"{backend}/{model}" if backend else model
+
+
+def _reserve(state: dict, tokens: int, now: float) -> float:
+    """Reserves a request and `tokens` tokens, returning 0, or returns how many
+    seconds to wait before trying again."""
+    _refill(state, now)
+    blocked_until = state.get("blocked_until", 0.0)
+    if blocked_until > now:
+        return blocked_until - now
+
+    waits = [0.0]
+    if state.get("request_limit"):
+        deficit = 1 - state["requests"]
+        waits.append(deficit * 60.0 / state["request_limit"])
+    if state.get("token_limit"):
+        deficit = min(tokens, state["token_limit"]) - state["tokens"]
+        waits.append(deficit * 60.0 / state["token_limit"])
+    wait = max(waits)
+    if wait > 0:
+        return wait
+
+    if state.get("request_limit"):
+        state["requests"] -= 1
+    if state.get("token_limit"):
+        state["tokens"] -= tokens
+    return 0.0
+
+
+def _refill(state: dict, now: float) -> None:
+    elapsed = max(0.0, now - state.get("updated_at", now))
+    state["updated_at"] = now
+    for limit, level in (("request_limit", "requests"), ("token_limit", "tokens")):
+        if state.get(limit):
+            state[level] = min(
+                state[limit], state.get(level, state[limit]) + state[limit] * elapsed / 60.0
+            )
+
+
+def _update(state: dict, limits: dict, now: float) -> None:
+    _refill(state, now)
+    for limit, level in (("request_limit", "requests"), ("token_limit", "tokens")):
+        if limit in limits:
+            state[limit] = limits[limit]
+            state[level] = min(state.get(level, limits[limit]), limits[limit])
+        if level in limits and state.get(limit):
+            # Never raise the level above what the provider reports as remaining.
+            state[level] = min(state[level], limits[level])
+    if "blocked_for" in limits:
+        state["blocked_until"] = max(
+            state.get("blocked_until", 0.0), now + limits["blocked_for"]
+        )
+
+
+def _parse_headers(headers: Mapping[str, str]) -> dict:
+    fields = {
+        "x-ratelimit-limit-requests": "request_limit",
+        "x-ratelimit-limit-tokens": "token_limit",
+        "x-ratelimit-remaining-requests": "requests",
+        "x-ratelimit-remaining-tokens": "tokens",
+    }
+    limits = {}
+    for header, field in fields.items():
+        value = headers.get(header)
+        if value is not None and value.isdigit():
+            limits[field] = int(value)
+    resets = [
+        _duration_s(headers.get(h))
+        for h in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    resets = [r for r in resets if r is not None]
+    if resets:
+        limits["reset"] = max(resets)
+    return limits
+
+
+def _duration_s(value: Optional[str]) -> Optional[float]:
+    """Parses durations like "20ms", "1s" or "6m0s"."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_SECONDS[unit] for n, unit in parts)
+
+
+def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+        try:
+            return float(headers[header]) / scale
+        except (KeyError, ValueError):
+            continue
+    return None
+
+
+_governor: Optional[RateLimitGovernor] = None
+
+
+def get_governor() -> Optional[RateLimitGovernor]:
+    """Returns the process-wide governor, if one was configured."""
+    return _governor
+
+
+def configure_governor(
+    store_path: Optional[str] = None, max_wait_s: float = 10.0
+) -> RateLimitGovernor:
+    """Creates the process-wide governor, sharing its state through `store_path`
+    across workers when given."""
+    global _governor
+    store = FileBucketStore(store_path) if store_path else MemoryBucketStore()
+    _governor = RateLimitGovernor(store, max_wait_s=max_wait_s)
+    return _governor
+
+
+async def tag_request_model(request: httpx.Request) -> None:
+    """httpx request hook that moves the `MODEL_HEADER` and `BACKEND_HEADER` into
+    request extensions, so they are not sent to the provider."""
+    for header, extension in _REQUEST_TAGS.items():
+        value = request.headers.get(header)
+        if value is not None:
+            del request.headers[header]
+            request.extensions = {**request.extensions, extension: value}
+
+
+async def observe_response(response: httpx.Response) -> None:
+    """httpx response hook that feeds rate limit headers to the governor."""
+    if _governor is None:
+        return
+    if (
+        response.status_code != 429
+        and "x-ratelimit-limit-requests" not in response.headers
+    ):
+        return
+    extensions = response.request.extensions
+    model = extensions.get(_REQUEST_TAGS[MODEL_HEADER])
+    if model:
+        await _governor.observe(
+            model,
+            response.status_code,
+            response.headers,
+            backend=extensions.get(_REQUEST_TAGS[BACKEND_HEADER]),
+        )
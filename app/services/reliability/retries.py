@@ -1,14 +1,43 @@
 import asyncio
-from typing import Callable, TypeVar
+from typing import Callable, Optional, TypeVar
 
 T = TypeVar("T")
 
+# Longest provider-requested wait a retry honours; longer waits are not retried.
+MAX_RETRY_AFTER_S = 10.0
+
 
 def _is_retryable(exc: Exception) -> bool:
-    retryable = ("Timeout" in type(exc).__name__) or ("temporar" in str(exc).lower())
+    name = type(exc).__name__
+    status_code = getattr(exc, "status_code", None)
+    retryable = (
+        ("Timeout" in name)
+        or ("Connection" in name)
+        or (isinstance(status_code, int) and status_code >= 500)
+        or (status_code == 429 and retry_after_seconds(exc) <= MAX_RETRY_AFTER_S)
+        or ("temporar" in str(exc).lower())
+    )
     return retryable
 
 
+def retry_after_seconds(exc: Exception) -> float:
+    """Seconds the provider asked to wait before retrying, 0 if it did not say."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+        value = _float(headers.get(header))
+        if value is not None:
+            return value / scale
+    return 0.0
+
+
+def _float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
 async def with_retries(
     fn,
     *,
@@ -25,4 +54,4 @@ async def with_retries(
                 raise
             attempt += 1
             on_retry(attempt, e)
-            await asyncio.sleep(backoff_ms / 1000.0)
+            await asyncio.sleep(max(backoff_ms / 1000.0, retry_after_seconds(e)))
@@ -0,0 +1,75 @@
+import asyncio
+import inspect
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from app.domains.character import Character
+from app.services.observability.logging import log_event
+from app.services.tools.tools_mapping import TOOLS_TO_FUNCTIONS
+
+
+@dataclass
+class ToolCallResult:
+    call_id: str
+    name: str
+    arguments: dict
+    output: str
+
+
+async def execute_tool_calls(
+    function_calls: Iterable[Any],
+    character: Character,
+    timeout_s: float,
+) -> list[ToolCallResult]:
+    """Executes every function call from one model response concurrently.
+
+    Coroutine tools (anything doing I/O) run concurrently, each with its own
+    timeout, so the stage takes as long as the slowest tool rather than the sum of
+    all of them. Plain functions such as `ability_check` are pure CPU and run
+    inline. Failures and timeouts are reported back to the model as the tool output
+    instead of failing the turn. Results keep the order of `function_calls`.
+
+    Args:
+        function_calls: The `function_call` output items from the model response.
+        character: The character the tools act on.
+        timeout_s: The timeout applied to each coroutine tool call.
+
+    Returns:
+        One result per function call.
+    """
+    return list(
+        await asyncio.gather(
+            *(_execute_tool_call(call, character, timeout_s) for call in function_calls)
+        )
+    )
+
+
+async def _execute_tool_call(
+    call: Any, character: Character, timeout_s: float
+) -> ToolCallResult:
+    try:
+        arguments = json.loads(call.arguments or "{}")
+    except json.JSONDecodeError:
+        return ToolCallResult(
+            call.call_id, call.name, {}, "The tool arguments were not valid JSON."
+        )
+
+    fn = TOOLS_TO_FUNCTIONS.get(call.name)
+    if fn is None:
+        return ToolCallResult(
+            call.call_id, call.name, arguments, f"Unknown tool: {call.name}."
+        )
+
+    try:
+        if inspect.iscoroutinefunction(fn):
+            output = await asyncio.wait_for(fn(character, **arguments), timeout_s)
+        else:
+            output = fn(character, **arguments)
+    except asyncio.TimeoutError:
+        output = f"The {call.name} tool timed out."
+    except Exception as e:
+        log_event("tool_call_failed", tool=call.name, error=type(e).__name__)
+        output = f"The {call.name} tool failed."
+
+    return ToolCallResult(call.call_id, call.name, arguments, str(output))
@@ -1,9 +1,19 @@
 from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 
+class LLMBackendConfig(BaseModel):
+    """One deployment for the LLM router; unset fields fall back to the llm_* settings."""
+
+    name: str
+    model: Optional[str] = None
+    api_key: Optional[str] = None
+    base_url: Optional[str] = None
+    weight: float = 1.0
+
+
 class Settings(BaseSettings):
     project_name: str = "merlin-backend"
     version: str = "0.1.0"
@@ -14,6 +24,10 @@ class Settings(BaseSettings):
 
     database_url: str
     db_ssl_root_cert: Optional[str] = None
+    # "sql" for Postgres, or "memory" to keep everything in process (profiling, demos)
+    repo_backend: str = "sql"
+    # JSON seed for the memory backend: {"adventures": [...], "races": [...], ...}
+    repo_memory_seed_path: Optional[str] = None
 
     supabase_jwks_url: Optional[str] = None
     supabase_issuer: Optional[str] = None
@@ -23,16 +37,54 @@ class Settings(BaseSettings):
     llm_model: str = "gpt-4o-mini"
     llm_temperature: float = 0.7
     llm_max_output_tokens: int = 700
+    # Per-phase overrides; unset fields fall back to the llm_* settings above.
+    llm_tool_model: Optional[str] = None
+    llm_tool_temperature: Optional[float] = 0.2
+    llm_tool_max_output_tokens: Optional[int] = 150
+    llm_narration_model: Optional[str] = None
+    llm_narration_temperature: Optional[float] = None
+    llm_narration_max_output_tokens: Optional[int] = None
     llm_streaming: bool = True
+    llm_single_round_turns: bool = False
+    llm_speculative_narration: bool = False
+    llm_dm_response_reask: bool = True
+    llm_chain_responses: bool = False
+    llm_chain_max_turns: int = 50
     llm_json_mode: bool = True
     llm_timeout_seconds: int = 30
+    llm_http2: bool = True
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive_connections: int = 20
+    llm_http_keepalive_expiry_seconds: float = 60.0
+    llm_http_connect_timeout_seconds: float = 5.0
+    llm_http_warmup_connections: int = 2
     llm_max_retries: int = 2
     llm_retry_backoff_ms: int = 250
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_max_per_minute: int = 30
+    llm_hedge_min_delay_ms: int = 250
+    llm_hedge_min_samples: int = 20
     llm_circuit_open_threshold: int = 5
     llm_circuit_reset_sec: int = 60
+    llm_rate_limit_enabled: bool = True
+    llm_rate_limit_max_wait_seconds: float = 10.0
+    # e.g. /dev/shm/merlin-rate-limit to share the limits across workers on a host
+    llm_rate_limit_store_path: Optional[str] = None
+    llm_degraded_narration: bool = False
+    # JSON list of LLMBackendConfig; when set, calls are routed across the backends.
+    llm_backends: List[LLMBackendConfig] = []
+    llm_router_window: int = 50
+    llm_router_max_error_rate: float = 0.5
+    llm_router_explore_ratio: float = 0.05
     llm_soft_prompt_budget: int = 6000
     llm_hard_prompt_budget: int = 8000
+    llm_history_window: int = 10
+    enable_rolling_summary: bool = False
+    llm_summary_batch_size: int = 6
+    llm_summary_max_tokens: int = 300
     enable_tool_calling: bool = True
+    llm_tool_timeout_seconds: float = 5.0
     enable_rules_rag: bool = False
     enable_safety_filter: bool = True
 
@@ -0,0 +1,131 @@
+"""Realistic domain fixtures shared by the benchmarks."""
+
+from app.domains.adventures import AdventureStatus
+from app.domains.character import Character, Spellcasting, SpellSlots
+from app.domains.character_common import AbilityScores, Feature, Item, Skill, Spell
+from app.domains.chat import Message
+
+STORY_BRIEF = (
+    "Stormspire Keep has stood silent for a century, until lights were seen in its "
+    "highest tower. The Duke has offered a fortune to whoever learns what stirs "
+    "inside, and rumours speak of a princess held there against her will. The "
+    "adventurer arrives at the gates at dusk as a storm rolls in from the sea."
+)
+
+USER_LINES = [
+    "I creep along the wall and peek around the corner.",
+    "I search the guard's body for anything useful.",
+    "Can I pick the lock on the iron door?",
+    "I cast Detect Magic and look around the chamber.",
+    "I ask the prisoner how long she has been held here.",
+    "I draw my sword and step into the torchlight.",
+]
+
+ASSISTANT_LINES = [
+    "The corridor bends left, and the flicker of torchlight reveals two guards "
+    "playing dice beside a barred door. Neither has noticed you yet.",
+    "Beneath the guard's cloak you find a ring of three iron keys, a half-eaten "
+    "heel of bread and a crumpled note stamped with the Duke's seal.",
+    "The lock is old but well oiled. Your picks scrape against the tumblers as "
+    "thunder rolls somewhere far above the keep.",
+    "A faint violet glow pulses from a loose stone in the northern wall, and a "
+    "sickly green aura clings to the chains hanging from the ceiling.",
+]
+
+
+def sample_character(
+    inventory_size: int = 12, spell_count: int = 8, name: str = "Awin"
+) -> Character:
+    return Character(
+        id="4e0c1f0e-8d55-4b7a-9a37-9f1b2c3d4e5f",
+        name=name,
+        race="High Elf",
+        class_name="Wizard",
+        background="Sage",
+        level=5,
+        hp_current=27,
+        hp_max=32,
+        ac=13,
+        speed=30,
+        abilities=AbilityScores(str=8, dex=14, con=12, int=18, wis=12, cha=10),
+        skills=[
+            Skill(key=key, proficient=True, expertise=key == "arcana")
+            for key in ("arcana", "history", "investigation", "perception")
+        ],
+        features=[
+            Feature(
+                id=f"feature-{i}",
+                name=name,
+                description=f"{name} grants the character a useful edge in play.",
+                uses=2 if i % 2 else None,
+                max_uses=2 if i % 2 else None,
+            )
+            for i, name in enumerate(
+                ["Darkvision", "Fey Ancestry", "Trance", "Arcane Recovery", "Researcher"]
+            )
+        ],
+        inventory=[
+            Item(
+                id=f"item-{i}",
+                name=f"Item {i}",
+                quantity=1 + i % 3,
+                weight=round(0.5 + i * 0.25, 2),
+                description="A well-worn piece of adventuring gear with a story of its own.",
+            )
+            for i in range(inventory_size)
+        ],
+        spellcasting=Spellcasting(
+            ability="int",
+            spells=[
+                Spell(
+                    id=f"spell-{i}",
+                    name=f"Spell {i}",
+                    level=i % 4,
+                    description="Arcane energy shapes itself to the caster's will.",
+                )
+                for i in range(spell_count)
+            ],
+            slots={
+                "1": SpellSlots(max=4, used=1),
+                "2": SpellSlots(max=3, used=0),
+                "3": SpellSlots(max=2, used=0),
+            },
+            class_name="Wizard",
+        ),
+    )
+
+
+def sample_history(length: int = 10) -> list[Message]:
+    messages = []
+    for i in range(length):
+        role = "assistant" if i % 2 == 0 else "user"
+        lines = ASSISTANT_LINES if role == "assistant" else USER_LINES
+        messages.append(
+            Message(
+                message_id=i + 1,
+                role=role,
+                content=lines[i % len(lines)],
+                created_at="2025-01-01T00:00:00+00:00",
+            )
+        )
+    if messages and messages[-1].role != "user":
+        messages.append(
+            Message(
+                message_id=length + 1,
+                role="user",
+                content=USER_LINES[0],
+                created_at="2025-01-01T00:00:00+00:00",
+            )
+        )
+    return messages
+
+
+def sample_adventure_status() -> AdventureStatus:
+    return AdventureStatus(
+        summary=(
+            "Awin slipped through the postern gate, overheard the guards talking "
+            "about the princess, took a ring of keys and is now in the dungeons."
+        ),
+        location="Stormspire Keep, dungeon corridor",
+        combat_state=False,
+    )
@@ -0,0 +1,333 @@
+"""Simulates concurrent players against the chat API and reports what they saw.
+
+Each player opens its session (`POST /chat/sessions/active`), loads its history,
+then plays `--turns` turns: a `POST /message`, a think time, and a
+`GET /history` every `--history-every` turns. Players start spread over
+`--ramp-s`. The report has p50/p95/p99 latency per endpoint, turns per second,
+the event loop lag seen while the players ran and the app's `db_pool_wait_ms`.
+
+By default the app runs in this process over ASGI, fully offline: storage is the
+in-memory repo backend seeded with one fixture character per player, the bearer
+token is taken as the user id, and the LLM is the stub provider (`--llm stub`,
+with `--llm-latency-ms` and friends) or `NoOpLLM` (`--llm noop`). The event loop
+lag is then the app's own.
+
+With `--base-url` the players hit a running server instead. Give them
+credentials with `--players-file`, one `<bearer token> <character id>` per line,
+used in turn; point the server at `benchmarks.stub_provider` to keep it offline.
+
+Usage:
+    python -m benchmarks.load_driver --players 50 --turns 5 --think-ms 2000
+    python -m benchmarks.load_driver --base-url http://127.0.0.1:8000 \\
+        --players-file players.txt --players 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.services.observability.metrics import Timing, metrics
+from benchmarks.fixtures import (
+    STORY_BRIEF,
+    USER_LINES,
+    sample_adventure_status,
+    sample_character,
+)
+
+_API = "/api/v1"
+_SAMPLES = 1_000_000
+
+
+@dataclass
+class Player:
+    token: str
+    character_id: str
+
+
+class LoadReport:
+    """Latencies per endpoint and event loop lag, in milliseconds."""
+
+    def __init__(self):
+        self.latencies: Dict[str, Timing] = {}
+        self.errors: Dict[str, int] = {}
+        self.loop_lag = Timing(_SAMPLES)
+        self.turns = 0
+
+    def observe(self, endpoint: str, ms: float, ok: bool) -> None:
+        self.latencies.setdefault(endpoint, Timing(_SAMPLES)).observe(ms)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        elif endpoint == "message":
+            self.turns += 1
+
+    def endpoints(self) -> dict:
+        return {
+            endpoint: {
+                **{k: _round(v) for k, v in timing.summary().items()},
+                "errors": self.errors.get(endpoint, 0),
+            }
+            for endpoint, timing in self.latencies.items()
+        }
+
+
+async def _request(
+    client: httpx.AsyncClient,
+    report: LoadReport,
+    endpoint: str,
+    method: str,
+    url: str,
+    player: Player,
+    **kwargs,
+) -> Optional[dict]:
+    started = time.perf_counter()
+    try:
+        response = await client.request(
+            method,
+            url,
+            headers={"Authorization": f"Bearer {player.token}"},
+            **kwargs,
+        )
+        ok = response.status_code < 400
+    except httpx.HTTPError as e:
+        print(f"{endpoint} failed: {type(e).__name__}: {e}")
+        response, ok = None, False
+    report.observe(endpoint, (time.perf_counter() - started) * 1000, ok)
+    return response.json() if ok else None
+
+
+async def _play(
+    client: httpx.AsyncClient,
+    report: LoadReport,
+    player: Player,
+    args: argparse.Namespace,
+    rng: random.Random,
+    start_delay_s: float,
+) -> None:
+    await asyncio.sleep(start_delay_s)
+    session = await _request(
+        client,
+        report,
+        "session",
+        "POST",
+        f"{_API}/chat/sessions/active",
+        player,
+        json={"characterId": player.character_id},
+    )
+    if session is None:
+        return
+    history_url = f"{_API}/chat/sessions/{session['sessionId']}/history"
+    await _request(client, report, "history", "GET", history_url, player)
+
+    for turn in range(args.turns):
+        await _request(
+            client,
+            report,
+            "message",
+            "POST",
+            f"{_API}/chat/sessions/{session['sessionId']}/message",
+            player,
+            json={"message": rng.choice(USER_LINES)},
+        )
+        if args.history_every and (turn + 1) % args.history_every == 0:
+            await _request(client, report, "history", "GET", history_url, player)
+        if args.think_ms > 0 and turn < args.turns - 1:
+            await asyncio.sleep(args.think_ms * rng.uniform(0.5, 1.5) / 1000)
+
+
+async def _watch_loop_lag(report: LoadReport, interval_s: float = 0.05) -> None:
+    """Samples how late the event loop wakes a sleeping task."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval_s
+        await asyncio.sleep(interval_s)
+        report.loop_lag.observe(max(0.0, loop.time() - expected) * 1000)
+
+
+def _build_stub_llm(args: argparse.Namespace):
+    from app.adapters.llm.base import NoOpLLM
+    from app.adapters.llm.openai_client import OpenAILLM
+    from benchmarks.stub_provider import StubConfig, create_stub_app
+
+    if args.llm == "noop":
+        return NoOpLLM()
+    config = StubConfig(
+        latency_ms=args.llm_latency_ms,
+        tokens_per_second=args.llm_tokens_per_second,
+        tool_call_rate=args.tool_call_rate,
+        seed=args.seed,
+    )
+    http_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_stub_app(config)),
+        timeout=httpx.Timeout(60.0),
+    )
+    return OpenAILLM(
+        api_key="stub",
+        model="gpt-4o-mini",
+        base_url="http://stub/v1",
+        http_client=http_client,
+    )
+
+
+def _build_asgi_app(args: argparse.Namespace, players: List[Player]):
+    """Creates the app in process, on the memory backend with the stub LLM."""
+    os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://bench/unused")
+    os.environ.setdefault("REPO_BACKEND", "memory")
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("LLM_HTTP_WARMUP_CONNECTIONS", "0")
+
+    from fastapi import Header
+
+    from app.adapters.memory_db import get_memory_store
+    from app.dependencies.auth import require_user_id
+    from app.main import create_app
+
+    async def bench_user_id(authorization: str = Header()) -> str:
+        return authorization.split(" ", 1)[-1]
+
+    app = create_app()
+    app.state.llm = _build_stub_llm(args)
+    app.dependency_overrides[require_user_id] = bench_user_id
+
+    store = get_memory_store()
+    if not store.adventures:
+        store.seed(
+            {
+                "adventures": [
+                    {
+                        "adventure_id": "stormspire",
+                        "title": "Stormspire Keep",
+                        "story_brief": STORY_BRIEF,
+                        "starting_status": asdict(sample_adventure_status()),
+                    }
+                ]
+            }
+        )
+    store.seed(
+        {
+            "characters": [
+                {
+                    **asdict(replace(sample_character(), id=player.character_id)),
+                    "user_id": player.token,
+                }
+                for player in players
+            ]
+        }
+    )
+    return app
+
+
+def _players(args: argparse.Namespace) -> List[Player]:
+    if not args.players_file:
+        return [
+            Player(token=f"player-{i}", character_id=f"character-{i}")
+            for i in range(args.players)
+        ]
+    with open(args.players_file, encoding="utf-8") as f:
+        credentials = [line.split() for line in f if line.strip()]
+    return [
+        Player(*credentials[i % len(credentials)][:2]) for i in range(args.players)
+    ]
+
+
+async def _app_metrics(client: httpx.AsyncClient) -> dict:
+    try:
+        response = await client.get(f"{_API}/health/metrics")
+        return response.json().get("timings", {}) if response.is_success else {}
+    except httpx.HTTPError:
+        return {}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    players = _players(args)
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        app = _build_asgi_app(args, players)
+        metrics.reset()
+        transport, base_url = httpx.ASGITransport(app=app), "http://app"
+
+    rng = random.Random(args.seed)
+    report = LoadReport()
+    client = httpx.AsyncClient(
+        transport=transport,
+        base_url=base_url,
+        timeout=httpx.Timeout(args.timeout_s),
+        limits=httpx.Limits(max_connections=max(1, len(players))),
+    )
+    watcher = asyncio.create_task(_watch_loop_lag(report))
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(
+                _play(
+                    client,
+                    report,
+                    player,
+                    args,
+                    random.Random(rng.random()),
+                    args.ramp_s * i / max(1, len(players)),
+                )
+                for i, player in enumerate(players)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        app_timings = await _app_metrics(client)
+    finally:
+        watcher.cancel()
+        await client.aclose()
+
+    pool_wait = app_timings.get("db_pool_wait_ms")
+    return {
+        "target": args.base_url or "asgi",
+        "players": len(players),
+        "turns_per_player": args.turns,
+        "think_ms": args.think_ms,
+        "duration_s": round(elapsed, 2),
+        "turns": report.turns,
+        "turns_per_second": round(report.turns / elapsed, 2) if elapsed else None,
+        "endpoints": report.endpoints(),
+        "event_loop_lag_ms": {
+            **{k: _round(v) for k, v in report.loop_lag.summary().items()},
+            "max": _round(max(report.loop_lag.samples, default=None)),
+        },
+        "db_pool_wait_ms": (
+            {k: _round(v) for k, v in pool_wait.items()} if pool_wait else None
+        ),
+    }
+
+
+def _round(value):
+    return round(value, 2) if isinstance(value, float) else value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--think-ms", type=float, default=1000.0)
+    parser.add_argument("--history-every", type=int, default=3)
+    parser.add_argument("--ramp-s", type=float, default=1.0)
+    parser.add_argument("--timeout-s", type=float, default=120.0)
+    parser.add_argument("--base-url", help="a running server; default is in-process")
+    parser.add_argument("--players-file", help="lines of '<token> <character id>'")
+    parser.add_argument("--llm", choices=["stub", "noop"], default="stub")
+    parser.add_argument("--llm-latency-ms", type=float, default=600.0)
+    parser.add_argument("--llm-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--tool-call-rate", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    if args.base_url and not args.players_file:
+        parser.error("--base-url needs --players-file")
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Microbenchmarks of the pure-Python code that runs on every request.
+
+Covers prompt building and rendering, prompt payload serialisation, DM response
+parsing, the repos' row mappers and the routers' response model validation, on
+large fixtures: a spellcaster with a big inventory and a long history.
+
+Each case is timed with `timeit` (auto-ranged loops, best of `--repeat`) and
+reported in microseconds per call next to its stored baseline. A fixed
+calibration workload is timed alongside and the changes are scaled by how fast it
+ran compared with when the baselines were taken, so a machine that is busier or
+slower overall does not show up as a regression. A case more than
+`--threshold` slower than its baseline is measured again, and is a regression if
+its best time is still over the threshold; regressions make the run exit with
+status 1. Baselines depend on the machine and Python version they were
+taken on, which are stored with them; re-take them with `--save` when either
+changes, or when a change is meant to move the numbers.
+
+Usage:
+    python -m benchmarks.microbench [--filter prompt] [--threshold 0.25]
+    python -m benchmarks.microbench --save
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from dataclasses import asdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict
+
+from app.schemas.character import CharacterOut
+from app.schemas.chat import MessageOut
+from app.services.dm_response.dm_response_models import DMResponse
+from app.services.orchestration.prompt_builder import PromptBuilder
+from benchmarks.fixtures import (
+    ASSISTANT_LINES,
+    STORY_BRIEF,
+    sample_adventure_status,
+    sample_character,
+    sample_history,
+)
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "microbench_baselines.json")
+
+_INVENTORY_SIZE = 60
+_SPELL_COUNT = 30
+_HISTORY_LENGTH = 50
+_NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    # The repo modules import the DB adapter, which needs a URL but no database.
+    os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://bench/unused")
+    from app.repos.character_repo import row_to_character
+    from app.repos.chat_repo import _row_to_message, _row_to_session
+
+    character = sample_character(
+        inventory_size=_INVENTORY_SIZE, spell_count=_SPELL_COUNT
+    )
+    history = sample_history(_HISTORY_LENGTH)
+    builder = PromptBuilder(
+        story_brief=STORY_BRIEF,
+        character=character,
+        adventure_status=sample_adventure_status(),
+        chat_history=history,
+        rolling_summary=sample_adventure_status().summary,
+    )
+    payload = builder.prompt_payload
+
+    dm_response_json = json.dumps(
+        {
+            "message_to_user": " ".join(ASSISTANT_LINES[:2]),
+            "update_adventure_status": asdict(sample_adventure_status()),
+            "add_items_to_inventory": {
+                "items": [asdict(item) for item in character.inventory[:5]]
+            },
+            "remove_items_from_inventory": {
+                "items": [{"id": item.id} for item in character.inventory[5:7]]
+            },
+        }
+    )
+
+    character_row = asdict(character)
+    session_row = SimpleNamespace(
+        session_id="0b7c7a3e-4a8e-4d4b-9b1a-3c2d1e0f9a8b",
+        character_id=character.id,
+        adventure_title="Stormspire Keep",
+        story_brief=STORY_BRIEF,
+        adventure_status=asdict(sample_adventure_status()),
+        last_response_id="resp_0123456789",
+        last_response_backend="primary",
+        response_chain_length=12,
+        rolling_summary=sample_adventure_status().summary,
+        summarized_through_message_id=40,
+        created_at=_NOW,
+        updated_at=_NOW,
+        archived_at=None,
+    )
+    message_rows = [
+        SimpleNamespace(
+            message_id=m.message_id, role=m.role, content=m.content, created_at=_NOW
+        )
+        for m in history
+    ]
+    messages = [_row_to_message(r) for r in message_rows]
+
+    return {
+        "prompt.build_standard_prompt": builder.build_standard_prompt,
+        "prompt.render_character": builder._render_character,
+        "payload.model_dump_json": payload.model_dump_json,
+        "dm_response.model_validate_json": lambda: DMResponse.model_validate_json(
+            dm_response_json
+        ),
+        "row.character": lambda: row_to_character(character_row),
+        "row.session": lambda: _row_to_session(session_row),
+        "row.messages_page": lambda: [_row_to_message(r) for r in message_rows],
+        "schema.character_out": lambda: CharacterOut.model_validate(character),
+        "schema.message_out_page": lambda: [
+            MessageOut.model_validate(m) for m in messages
+        ],
+    }
+
+
+def _calibration() -> object:
+    return sorted(str(i * 7919 % 1000) for i in range(500))
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    """Microseconds per call, the best of `repeat` auto-ranged runs."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "system": platform.system(),
+    }
+
+
+def compare(
+    results: Dict[str, float],
+    baselines: Dict[str, float],
+    threshold: float,
+    speed: float = 1.0,
+):
+    """Returns the report rows and the names of the cases that regressed.
+
+    `speed` is the calibration time now over its baseline time.
+    """
+    rows, regressions = {}, []
+    for name, us in results.items():
+        baseline = baselines.get(name)
+        change = (us / speed - baseline) / baseline if baseline else None
+        if change is not None and change > threshold:
+            regressions.append(name)
+        rows[name] = {
+            "us_per_call": round(us, 3),
+            "baseline_us": baseline,
+            "change_pct": round(100 * change, 1) if change is not None else None,
+        }
+    return rows, regressions
+
+
+def load_baselines(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"environment": None, "calibration_us": None, "cases": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only cases containing this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--save", action="store_true", help="store as baselines")
+    args = parser.parse_args()
+
+    cases = {n: fn for n, fn in build_cases().items() if args.filter in n}
+    calibration_us = measure(_calibration, args.repeat)
+    results = {name: measure(fn, args.repeat) for name, fn in cases.items()}
+    calibration_us = min(calibration_us, measure(_calibration, args.repeat))
+    stored = load_baselines(args.baselines)
+
+    if args.save:
+        stored["environment"] = environment()
+        stored["calibration_us"] = round(calibration_us, 3)
+        stored["cases"] = {
+            **stored.get("cases", {}),
+            **{name: round(us, 3) for name, us in results.items()},
+        }
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    speed = calibration_us / (stored.get("calibration_us") or calibration_us)
+    rows, regressions = compare(results, stored["cases"], args.threshold, speed)
+    if regressions and not args.save:
+        # Re-measure to rule out a noisy neighbour before calling it a regression.
+        for name in regressions:
+            results[name] = min(results[name], measure(cases[name], args.repeat * 2))
+        rows, regressions = compare(results, stored["cases"], args.threshold, speed)
+    report = {
+        "threshold_pct": round(100 * args.threshold, 1),
+        "machine_speed": round(1 / speed, 3),
+        "cases": rows,
+    }
+    if stored["environment"] and stored["environment"] != environment():
+        report["warning"] = "baselines were taken in a different environment"
+        report["baseline_environment"] = stored["environment"]
+    report["regressions"] = regressions
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if regressions and not args.save else 0)
+
+
+if __name__ == "__main__":
+    main()
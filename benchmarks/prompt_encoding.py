@@ -0,0 +1,129 @@
+"""Compares input token counts for the JSON-string and native input-item encodings.
+
+The old adapter sent `PromptPayload.model_dump_json()` as a single input string;
+the current one sends role-typed Responses API input items. This benchmark counts
+the input tokens of both encodings for a set of prompts.
+
+Usage:
+    python -m benchmarks.prompt_encoding [--sessions prompts.jsonl] [--provider]
+
+`--sessions` takes a JSONL file with one recorded `PromptPayload` per line. Without
+it a synthetic session built from the benchmark fixtures is used. Token counts use
+`tiktoken` when installed, otherwise a 4-characters-per-token estimate. With
+`--provider` the counts come from the Responses API input token endpoint instead
+(requires OPENAI_API_KEY).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+from typing import Callable, Iterable
+
+from app.adapters.llm.openai_client import to_input_items
+from app.adapters.llm.types import PromptPayload
+from app.services.orchestration.prompt_builder import PromptBuilder
+from benchmarks.fixtures import (
+    STORY_BRIEF,
+    sample_adventure_status,
+    sample_character,
+    sample_history,
+)
+
+# Per-item overhead the provider adds around each role-typed message.
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _local_counter() -> tuple[str, Callable[[str], int]]:
+    try:
+        import tiktoken
+    except ImportError:
+        return "chars/4 estimate", lambda text: max(1, len(text) // 4)
+    encoding = tiktoken.get_encoding("o200k_base")
+    return "tiktoken o200k_base", lambda text: len(encoding.encode(text))
+
+
+def _count_items(items: list[dict], count: Callable[[str], int]) -> int:
+    total = 0
+    for item in items:
+        total += _MESSAGE_OVERHEAD_TOKENS
+        total += sum(count(v) for v in item.values() if isinstance(v, str))
+    return total
+
+
+def load_prompts(path: str | None) -> list[PromptPayload]:
+    if path:
+        with open(path) as f:
+            return [PromptPayload.model_validate_json(line) for line in f if line.strip()]
+
+    prompts = []
+    for turn in range(2, 12):
+        builder = PromptBuilder(
+            story_brief=STORY_BRIEF,
+            character=sample_character(),
+            adventure_status=sample_adventure_status(),
+            chat_history=sample_history(turn),
+        )
+        prompts.append(builder.prompt_payload)
+    return prompts
+
+
+async def _provider_counts(
+    prompts: Iterable[PromptPayload], model: str
+) -> list[tuple[int, int]]:
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    counts = []
+    for prompt in prompts:
+        as_string = await client.responses.input_tokens.count(
+            model=model, input=prompt.model_dump_json(include={"messages"})
+        )
+        as_items = await client.responses.input_tokens.count(
+            model=model, input=to_input_items(prompt)
+        )
+        counts.append((as_string.input_tokens, as_items.input_tokens))
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", help="JSONL file of recorded PromptPayloads")
+    parser.add_argument("--provider", action="store_true")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+
+    prompts = load_prompts(args.sessions)
+    if args.provider:
+        method = f"provider count ({args.model})"
+        counts = asyncio.run(_provider_counts(prompts, args.model))
+    else:
+        method, count = _local_counter()
+        counts = [
+            (
+                count(prompt.model_dump_json(include={"messages"})),
+                _count_items(to_input_items(prompt), count),
+            )
+            for prompt in prompts
+        ]
+
+    json_tokens = [c[0] for c in counts]
+    item_tokens = [c[1] for c in counts]
+    saved = [(j - i) / j for j, i in counts if j]
+    print(
+        json.dumps(
+            {
+                "prompts": len(prompts),
+                "method": method,
+                "json_string_tokens_mean": statistics.mean(json_tokens),
+                "input_items_tokens_mean": statistics.mean(item_tokens),
+                "saving_mean_pct": round(100 * statistics.mean(saved), 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""A local stand-in for the OpenAI Responses API, for load testing.
+
+Serves `POST /v1/responses` the way `OpenAILLM` uses it: tools, `text.format`
+json_schema output and streaming. Requests with tools and no tool result yet get
+an `ability_check` function call (at `--tool-call-rate`); requests with the DM
+response schema get schema-valid DM JSON; anything else gets plain narration.
+Latency, streaming token rate, error rate and a requests-per-minute limit (with
+429s and `x-ratelimit-*` headers) are configurable.
+
+Usage:
+    python -m benchmarks.stub_provider --port 8900 --latency-ms 800 --rpm 500
+
+then point the backend at it with `OPENAI_BASE_URL=http://127.0.0.1:8900/v1`, or
+an `llm_backends` entry with that `base_url`.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.fixtures import ASSISTANT_LINES
+
+_ABILITIES = ["strength", "dexterity", "intelligence", "wisdom", "charisma"]
+_SKILLS = ["athletics", "stealth", "perception", "investigation", "persuasion"]
+_LOCATIONS = ["Castle gate", "Great hall", "Dungeon corridor", "North tower"]
+
+
+@dataclass
+class StubConfig:
+    # Time to first token follows a log-normal distribution around the median.
+    latency_ms: float = 600.0
+    latency_sigma: float = 0.35
+    tokens_per_second: float = 80.0
+    tool_call_rate: float = 0.3
+    error_rate: float = 0.0
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 1_000_000
+    seed: Optional[int] = None
+    rng: random.Random = field(init=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+
+
+def create_stub_app(config: Optional[StubConfig] = None) -> FastAPI:
+    config = config or StubConfig()
+    app = FastAPI(title="merlin-stub-provider")
+    window: Deque[float] = deque()
+    stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def rate_limit_headers(now: float) -> dict:
+        while window and now - window[0] >= 60:
+            window.popleft()
+        if not config.requests_per_minute:
+            return {}
+        remaining = max(0, config.requests_per_minute - len(window))
+        reset_s = 60 - (now - window[0]) if window else 0
+        return {
+            "x-ratelimit-limit-requests": str(config.requests_per_minute),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset_s:.3f}s",
+            "x-ratelimit-limit-tokens": str(config.tokens_per_minute),
+            "x-ratelimit-remaining-tokens": str(config.tokens_per_minute),
+            "x-ratelimit-reset-tokens": "0s",
+        }
+
+    @app.get("/stats")
+    async def get_stats() -> dict:
+        return stats
+
+    @app.post("/v1/responses")
+    async def create_response(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        now = time.monotonic()
+        headers = rate_limit_headers(now)
+
+        if config.requests_per_minute and len(window) >= config.requests_per_minute:
+            stats["rate_limited"] += 1
+            retry_after = max(1, int(60 - (now - window[0])) + 1)
+            return _error(
+                429,
+                "rate_limit_exceeded",
+                "Rate limit reached for requests",
+                {**headers, "retry-after": str(retry_after)},
+            )
+        window.append(now)
+        headers = rate_limit_headers(now)
+
+        if config.rng.random() < config.error_rate:
+            stats["errors"] += 1
+            await asyncio.sleep(_first_token_delay(config))
+            return _error(500, "server_error", "The server had an error", headers)
+
+        response = _build_response(body, config)
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_events(response, config),
+                media_type="text/event-stream",
+                headers=headers,
+            )
+
+        await asyncio.sleep(
+            _first_token_delay(config)
+            + response["usage"]["output_tokens"] / config.tokens_per_second
+        )
+        return JSONResponse(response, headers=headers)
+
+    return app
+
+
+def _build_response(body: dict, config: StubConfig) -> dict:
+    items = body.get("input") or []
+    answered = any(
+        isinstance(item, dict) and item.get("type") == "function_call_output"
+        for item in items
+    )
+    tool_names = [t.get("name") for t in body.get("tools") or []]
+    text_format = (body.get("text") or {}).get("format") or {}
+
+    if (
+        "ability_check" in tool_names
+        and not answered
+        and config.rng.random() < config.tool_call_rate
+    ):
+        output = [_function_call(config)]
+        text = output[0]["arguments"]
+    else:
+        narration = config.rng.choice(ASSISTANT_LINES)
+        text = (
+            json.dumps(_dm_response(narration, config))
+            if text_format.get("type") == "json_schema"
+            else narration
+        )
+        output = [_message(text)]
+
+    input_tokens = max(1, len(json.dumps(items)) // 4)
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "model": body.get("model", "stub-model"),
+        "output": output,
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": body.get("tools") or [],
+        "temperature": body.get("temperature"),
+        "max_output_tokens": body.get("max_output_tokens"),
+        "previous_response_id": body.get("previous_response_id"),
+        "error": None,
+        "incomplete_details": None,
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def _function_call(config: StubConfig) -> dict:
+    arguments = {
+        "difficulty": config.rng.randint(8, 18),
+        "ability": config.rng.choice(_ABILITIES),
+        "skill": config.rng.choice(_SKILLS),
+    }
+    return {
+        "type": "function_call",
+        "id": f"fc_{uuid.uuid4().hex}",
+        "call_id": f"call_{uuid.uuid4().hex[:24]}",
+        "name": "ability_check",
+        "arguments": json.dumps(arguments),
+        "status": "completed",
+    }
+
+
+def _message(text: str) -> dict:
+    return {
+        "type": "message",
+        "id": f"msg_{uuid.uuid4().hex}",
+        "role": "assistant",
+        "status": "completed",
+        "content": [{"type": "output_text", "text": text, "annotations": []}],
+    }
+
+
+def _dm_response(narration: str, config: StubConfig) -> dict:
+    return {
+        "message_to_user": narration,
+        "update_adventure_status": {
+            "summary": "The adventurer presses deeper into Stormspire Keep.",
+            "location": config.rng.choice(_LOCATIONS),
+            "combat_state": config.rng.random() < 0.2,
+        },
+        "add_items_to_inventory": None,
+        "remove_items_from_inventory": None,
+    }
+
+
+async def _stream_events(response: dict, config: StubConfig) -> AsyncIterator[str]:
+    sequence = 0
+
+    def event(payload: dict) -> str:
+        nonlocal sequence
+        payload["sequence_number"] = sequence
+        sequence += 1
+        return f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+
+    in_progress = {**response, "status": "in_progress", "output": [], "usage": None}
+    yield event({"type": "response.created", "response": in_progress})
+    await asyncio.sleep(_first_token_delay(config))
+
+    item = response["output"][0]
+    if item["type"] == "message":
+        text = item["content"][0]["text"]
+        chunk_chars = 16
+        delay = chunk_chars / 4 / config.tokens_per_second
+        for i in range(0, len(text), chunk_chars):
+            if i:
+                await asyncio.sleep(delay)
+            yield event(
+                {
+                    "type": "response.output_text.delta",
+                    "item_id": item["id"],
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": text[i : i + chunk_chars],
+                    "logprobs": [],
+                }
+            )
+    else:
+        yield event(
+            {
+                "type": "response.output_item.added",
+                "output_index": 0,
+                "item": {**item, "arguments": "", "status": "in_progress"},
+            }
+        )
+    yield event({"type": "response.completed", "response": response})
+
+
+def _first_token_delay(config: StubConfig) -> float:
+    if config.latency_ms <= 0:
+        return 0.0
+    return config.rng.lognormvariate(0, config.latency_sigma) * config.latency_ms / 1000
+
+
+def _error(status: int, code: str, message: str, headers: dict) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"message": message, "type": code, "param": None, "code": code}},
+        status_code=status,
+        headers=headers,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=600.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.35)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--tool-call-rate", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=0, help="0 disables rate limits")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_second=args.tokens_per_second,
+        tool_call_rate=args.tool_call_rate,
+        error_rate=args.error_rate,
+        requests_per_minute=args.rpm,
+        seed=args.seed,
+    )
+    uvicorn.run(create_stub_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
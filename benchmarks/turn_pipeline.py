@@ -0,0 +1,142 @@
+"""Benchmarks `ChatService.handle_turn` end to end against a recorded cassette.
+
+The turn pipeline (context load, prompt build and budget, tool and narration
+rounds, tool execution, DM response parsing and persistence) runs for real; the
+LLM is a `CassetteLLM` replaying recorded exchanges with their recorded latency,
+and storage is the in-memory repo backend seeded from the benchmark fixtures.
+
+Usage:
+    python -m benchmarks.turn_pipeline --cassette turns.jsonl.gz --record
+    python -m benchmarks.turn_pipeline --cassette turns.jsonl.gz [--latency-scale 0]
+
+`--record` plays the turns against the real provider (requires OPENAI_API_KEY)
+and writes the cassette. Without it the cassette is replayed offline. Dice rolls
+are seeded, so a replay sends exactly the recorded prompts unless the prompt or
+pipeline changed; pass `--fallback` to answer changed prompts with the next
+recording of the same kind of call.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from dataclasses import asdict
+
+from app.adapters.llm.cassette import CassetteLLM
+from app.adapters.memory_db import MemoryStore
+from app.repos.memory_repos import (
+    MemoryAdventureRepo,
+    MemoryCharacterRepo,
+    MemoryChatRepo,
+)
+from app.services.chat.chat_service import ChatService
+from app.settings import Settings
+from benchmarks.fixtures import (
+    STORY_BRIEF,
+    USER_LINES,
+    sample_adventure_status,
+    sample_character,
+    sample_history,
+)
+
+_USER_ID = "bench-user"
+
+
+async def _seed_session(store: MemoryStore, history: int) -> str:
+    """Stores the fixture character and a session with `history` messages."""
+    character = sample_character()
+    store.seed({"characters": [{**asdict(character), "user_id": _USER_ID}]})
+    db_session = store.session()
+    chat_repo = MemoryChatRepo(db_session)
+    session = await chat_repo.create_session(
+        _USER_ID,
+        character.id,
+        "Stormspire Keep",
+        STORY_BRIEF,
+        sample_adventure_status(),
+    )
+    for message in sample_history(history)[:-1]:
+        if message.role == "user":
+            await chat_repo.insert_user_message_row(session.session_id, message.content)
+        else:
+            await chat_repo.insert_assistant_message_row(
+                session.session_id, message.content
+            )
+    await db_session.commit()
+    return session.session_id
+
+
+def _build_llm(args: argparse.Namespace) -> CassetteLLM:
+    if not args.record:
+        return CassetteLLM(
+            args.cassette, latency_scale=args.latency_scale, fallback=args.fallback
+        )
+
+    from app.adapters.llm.openai_client import OpenAILLM
+
+    if os.path.exists(args.cassette):
+        os.remove(args.cassette)
+    inner = OpenAILLM(api_key=os.environ["OPENAI_API_KEY"], model=args.model)
+    return CassetteLLM(args.cassette, inner=inner)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    random.seed(args.seed)
+    llm = _build_llm(args)
+    store = MemoryStore()
+    session_id = await _seed_session(store, args.history)
+    db_session = store.session()
+    settings = Settings(
+        database_url=os.getenv("DATABASE_URL", "postgresql+asyncpg://bench/unused"),
+        llm_model=args.model,
+    )
+    service = ChatService(
+        llm=llm,
+        adventure_repo=MemoryAdventureRepo(db_session),
+        character_repo=MemoryCharacterRepo(db_session),
+        chat_repo=MemoryChatRepo(db_session),
+        settings=settings,
+    )
+
+    latencies = []
+    for turn in range(args.turns):
+        started = time.perf_counter()
+        await service.handle_turn(
+            _USER_ID, session_id, USER_LINES[turn % len(USER_LINES)]
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "mode": "record" if args.record else "replay",
+        "turns": args.turns,
+        "latency_scale": 1.0 if args.record else args.latency_scale,
+        "turn_ms_mean": round(statistics.mean(latencies), 2),
+        "turn_ms_p50": round(ordered[len(ordered) // 2], 2),
+        "turn_ms_p95": round(p95, 2),
+        "cassette_hits": llm.hits,
+        "cassette_misses": llm.misses,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--history", type=int, default=10)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--fallback", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+-- Response chaining: the last Responses API id of a session, the routed backend
+-- that issued it and the number of turns chained from a full prompt.
+ALTER TABLE public.chat_sessions
+    ADD COLUMN IF NOT EXISTS last_response_id text NULL,
+    ADD COLUMN IF NOT EXISTS last_response_backend text NULL,
+    ADD COLUMN IF NOT EXISTS response_chain_length integer NOT NULL DEFAULT 0;
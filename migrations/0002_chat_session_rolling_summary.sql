@@ -0,0 +1,4 @@
+-- Rolling history summary: the summary text and the last message it covers.
+ALTER TABLE public.chat_sessions
+    ADD COLUMN IF NOT EXISTS rolling_summary text NULL,
+    ADD COLUMN IF NOT EXISTS summarized_through_message_id bigint NULL;
@@ -0,0 +1,25 @@
+-- Token usage: cached tokens per message and running totals per session and user.
+ALTER TABLE public.chat_messages
+    ADD COLUMN IF NOT EXISTS tokens_cached integer NULL;
+
+CREATE TABLE IF NOT EXISTS public.session_usage (
+    session_id uuid PRIMARY KEY
+        REFERENCES public.chat_sessions (session_id) ON DELETE CASCADE,
+    user_id uuid NOT NULL,
+    input_tokens bigint NOT NULL DEFAULT 0,
+    output_tokens bigint NOT NULL DEFAULT 0,
+    cached_tokens bigint NOT NULL DEFAULT 0,
+    llm_calls bigint NOT NULL DEFAULT 0,
+    turns bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.user_usage (
+    user_id uuid PRIMARY KEY,
+    input_tokens bigint NOT NULL DEFAULT 0,
+    output_tokens bigint NOT NULL DEFAULT 0,
+    cached_tokens bigint NOT NULL DEFAULT 0,
+    llm_calls bigint NOT NULL DEFAULT 0,
+    turns bigint NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
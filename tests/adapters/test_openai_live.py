@@ -2,35 +2,30 @@ import os
 import pytest
 from pytest import mark
 
-from app.adapters.llm.openai_adapter import OpenAILLM
-from app.adapters.llm.types import PromptPayload
+from app.adapters.llm.openai_client import OpenAILLM
+from app.adapters.llm.types import InputMessage, PromptPayload
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 
 @mark.asyncio
 @mark.live_openai
-@mark.parametrize("model", ["gpt-4o-mini", "o4-mini"])  # chat path and responses path
+@mark.parametrize("model", ["gpt-4o-mini", "o4-mini"])
 async def test_openai_generate_live(model):
     if not OPENAI_API_KEY:
         pytest.skip("Set OPENAI_API_KEY to run live OpenAI tests.")
 
-    llm = OpenAILLM(api_key=OPENAI_API_KEY, model=model, default_timeout_s=20)
+    llm = OpenAILLM(api_key=OPENAI_API_KEY, model=model)
 
     payload = PromptPayload(
-        system_messages=["You are concise."],
-        user_messages=[
-            "Say 'pong' and stop."
-        ],  # must include at least one user message
+        messages=[
+            InputMessage(role="system", content="You are concise."),
+            InputMessage(role="user", content="Say 'pong' and stop."),
+        ]
     )
 
-    res = await llm.generate(
-        prompt_payload=payload,
-        temperature=0.1,
-        max_tokens=16,
-        json_mode=False,
-        timeout_s=20,
-    )
+    res = await llm.generate(prompt_payload=payload, max_tokens=16)
 
     assert isinstance(res.text, str) and len(res.text) > 0
-    assert res.finish_reason in (None, "stop")
+    assert res.finish_reason in ("stop", "max_output_tokens")
+    assert res.usage.llm_calls == 1
@@ -0,0 +1,81 @@
+import json
+
+import httpx
+import pytest
+
+from app.adapters.llm.errors import LLMRateLimitedError
+from app.adapters.llm.openai_client import OpenAILLM
+from app.adapters.llm.types import InputMessage, PromptPayload
+from app.services.dm_response.dm_response_models import DM_RESPONSE_SCHEMA, DMResponse
+from app.services.tools.tools_mapping import TOOLS_FOR_LLM
+from benchmarks.stub_provider import StubConfig, create_stub_app
+
+
+def _llm(config: StubConfig, **kwargs) -> OpenAILLM:
+    http_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_stub_app(config))
+    )
+    return OpenAILLM(
+        api_key="stub",
+        model="gpt-4o-mini",
+        base_url="http://stub/v1",
+        http_client=http_client,
+        **kwargs,
+    )
+
+
+def _payload() -> PromptPayload:
+    return PromptPayload(
+        messages=[InputMessage(role="user", content="I climb the wall.")]
+    )
+
+
+@pytest.mark.asyncio
+async def test_tool_round_gets_an_ability_check_call():
+    llm = _llm(StubConfig(latency_ms=0, tool_call_rate=1.0, seed=1))
+
+    result = await llm.generate(_payload(), tools=TOOLS_FOR_LLM)
+
+    assert result.finish_reason == "tool_calls"
+    assert result.tool_calls[0].name == "ability_check"
+    assert set(json.loads(result.tool_calls[0].arguments)) == {
+        "difficulty",
+        "ability",
+        "skill",
+    }
+
+
+@pytest.mark.asyncio
+async def test_streamed_dm_response_is_schema_valid():
+    llm = _llm(StubConfig(latency_ms=0, tokens_per_second=1e9, seed=1))
+
+    events = [
+        e async for e in llm.stream(_payload(), output_schema=DM_RESPONSE_SCHEMA)
+    ]
+
+    text = "".join(e.delta for e in events if e.type == "text_delta")
+    assert DMResponse.model_validate_json(text).message_to_user
+    assert events[-1].type == "completed"
+    assert events[-1].result.text == text
+    assert events[-1].result.usage.output_tokens > 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_tool_round_marks_the_tool_call():
+    llm = _llm(StubConfig(latency_ms=0, tool_call_rate=1.0, seed=1))
+
+    events = [e async for e in llm.stream(_payload(), tools=TOOLS_FOR_LLM)]
+
+    assert [e.type for e in events] == ["tool_call_started", "completed"]
+    assert events[-1].result.tool_calls[0].name == "ability_check"
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_limit_get_429s():
+    llm = _llm(StubConfig(latency_ms=0, requests_per_minute=1), max_retries=0)
+
+    await llm.generate(_payload())
+    with pytest.raises(LLMRateLimitedError) as exc:
+        await llm.generate(_payload())
+
+    assert exc.value.retry_after >= 1
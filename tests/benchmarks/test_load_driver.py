@@ -0,0 +1,64 @@
+import argparse
+
+import pytest
+
+from app.adapters import db, http_pool
+from app.services.reliability import rate_limit
+from app.settings import Settings
+from benchmarks import load_driver
+
+
+@pytest.fixture
+async def memory_backend(monkeypatch):
+    monkeypatch.setattr(
+        db,
+        "_settings",
+        Settings(
+            database_url="postgresql+asyncpg://u:p@localhost/db",
+            repo_backend="memory",
+        ),
+    )
+    # create_app configures the process-wide rate limit governor.
+    monkeypatch.setattr(rate_limit, "_governor", None)
+    yield
+    await http_pool.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_one_player_plays_one_turn_in_process(memory_backend):
+    args = argparse.Namespace(
+        players=1,
+        turns=1,
+        think_ms=0.0,
+        history_every=1,
+        ramp_s=0.0,
+        timeout_s=30.0,
+        base_url=None,
+        players_file=None,
+        llm="stub",
+        llm_latency_ms=0.0,
+        llm_tokens_per_second=10_000.0,
+        tool_call_rate=1.0,
+        seed=7,
+    )
+
+    report = await load_driver.run(args)
+
+    assert set(report) == {
+        "target",
+        "players",
+        "turns_per_player",
+        "think_ms",
+        "duration_s",
+        "turns",
+        "turns_per_second",
+        "endpoints",
+        "event_loop_lag_ms",
+        "db_pool_wait_ms",
+    }
+    assert report["target"] == "asgi"
+    assert report["turns"] == 1
+    assert set(report["endpoints"]) == {"session", "history", "message"}
+    assert all(e["errors"] == 0 for e in report["endpoints"].values())
+    assert "p95" in report["endpoints"]["message"]
+    assert "max" in report["event_loop_lag_ms"]
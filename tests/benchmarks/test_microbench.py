@@ -0,0 +1,20 @@
+from benchmarks import microbench
+
+
+def test_every_case_runs_once_and_compares_without_baselines():
+    cases = microbench.build_cases()
+
+    results = {}
+    for name, fn in cases.items():
+        assert fn() is not None, name
+        results[name] = 1.0
+
+    rows, regressions = microbench.compare(results, {}, threshold=0.25)
+    assert regressions == []
+    assert all(row["change_pct"] is None for row in rows.values())
+
+
+def test_every_case_has_a_stored_baseline():
+    stored = microbench.load_baselines(microbench.BASELINES_PATH)
+
+    assert set(microbench.build_cases()) <= set(stored["cases"])
@@ -9,9 +9,28 @@ class _FakeMappings:
         return list(self._rows)
 
 
+class _FakeRow:
+    """Mimics a SQLAlchemy Row: attribute access plus `_mapping`."""
+
+    def __init__(self, mapping):
+        self._mapping = dict(mapping)
+
+    def __getattr__(self, name):
+        try:
+            return self._mapping[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
 class FakeResult:
     def __init__(self, rows):
         self._rows = rows
 
     def mappings(self):
         return _FakeMappings(self._rows)
+
+    def first(self):
+        return _FakeRow(self._rows[0]) if self._rows else None
+
+    def all(self):
+        return [_FakeRow(r) for r in self._rows]
@@ -0,0 +1,126 @@
+import pytest
+
+from app.adapters.llm.cassette import CassetteLLM, CassetteMissError, prompt_key
+from app.adapters.llm.types import (
+    FunctionCall,
+    FunctionCallOutput,
+    InputMessage,
+    LLMResult,
+    LLMStreamEvent,
+    LLMTiming,
+    PromptPayload,
+    ToolCall,
+)
+from app.domains.usage import TokenUsage
+
+
+def _payload(user_text="Open the gate", call_id="call-1", **kwargs) -> PromptPayload:
+    return PromptPayload(
+        messages=[
+            InputMessage(role="system", content="You are Merlin."),
+            InputMessage(role="user", content=user_text),
+            FunctionCall(call_id=call_id, name="ability_check", arguments='{"a": 1}'),
+            FunctionCallOutput(call_id=call_id, output="The action was successful."),
+        ],
+        **kwargs,
+    )
+
+
+class RecordedLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def model(self):
+        return "gpt-4o-mini"
+
+    async def generate(self, prompt_payload, tools=None, output_schema=None, *_):
+        self.calls += 1
+        return LLMResult(
+            text=f"answer {self.calls}",
+            response_id=f"resp_{self.calls}",
+            model="gpt-4o-mini",
+            tool_calls=[ToolCall(call_id="c", name="ability_check", arguments="{}")],
+            usage=TokenUsage(100, 20, 64, 1),
+            timing=LLMTiming(latency_ms=400.0, ttft_ms=100.0),
+        )
+
+    async def stream(self, prompt_payload, *args):
+        result = await self.generate(prompt_payload)
+        yield LLMStreamEvent(type="text_delta", delta=result.text)
+        yield LLMStreamEvent(type="completed", result=result)
+
+
+def test_prompt_key_ignores_run_specific_details():
+    base = prompt_key(_payload(), None, None, None)
+
+    assert base == prompt_key(
+        _payload(
+            user_text="Open   the gate\n",
+            call_id="call-xyz",
+            previous_response_id=None,
+            prompt_cache_key="merlin-session-other",
+        ),
+        None,
+        None,
+        None,
+    )
+    assert base != prompt_key(_payload(user_text="Close the gate"), None, None, None)
+    assert base != prompt_key(_payload(), None, None, "gpt-4o")
+
+
+@pytest.mark.asyncio
+async def test_replays_recordings_in_order_with_scaled_latency(tmp_path, monkeypatch):
+    path = str(tmp_path / "turns.jsonl.gz")
+    recorder = CassetteLLM(path, inner=RecordedLLM())
+    await recorder.generate(_payload())
+    await recorder.generate(_payload())
+
+    slept = []
+
+    async def _sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr("app.adapters.llm.cassette.asyncio.sleep", _sleep)
+    player = CassetteLLM(path, latency_scale=0.5)
+
+    first = await player.generate(_payload(call_id="other"))
+    second = await player.generate(_payload())
+
+    assert [first.text, second.text] == ["answer 1", "answer 2"]
+    assert first.tool_calls[0].name == "ability_check"
+    assert first.usage.cached_tokens == 64
+    assert first.timing.latency_ms == 200.0
+    assert slept == [0.2, 0.2]
+    assert (player.hits, player.misses) == (2, 0)
+
+
+@pytest.mark.asyncio
+async def test_stream_replay_spreads_deltas_after_the_first_token(tmp_path, monkeypatch):
+    path = str(tmp_path / "turns.jsonl")
+    recorder = CassetteLLM(path, inner=RecordedLLM())
+    [_ async for _ in recorder.stream(_payload())]
+
+    slept = []
+
+    async def _sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr("app.adapters.llm.cassette.asyncio.sleep", _sleep)
+    events = [e async for e in CassetteLLM(path).stream(_payload())]
+
+    assert "".join(e.delta for e in events if e.type == "text_delta") == "answer 1"
+    assert events[-1].result.response_id == "resp_1"
+    assert slept == [0.1]
+
+
+@pytest.mark.asyncio
+async def test_unrecorded_prompts_miss_unless_falling_back(tmp_path):
+    path = str(tmp_path / "turns.jsonl")
+    await CassetteLLM(path, inner=RecordedLLM()).generate(_payload())
+
+    with pytest.raises(CassetteMissError):
+        await CassetteLLM(path, latency_scale=0).generate(_payload("Jump"))
+
+    player = CassetteLLM(path, latency_scale=0, fallback=True)
+    assert (await player.generate(_payload("Jump"))).text == "answer 1"
+    assert player.misses == 1
@@ -0,0 +1,327 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import openai
+import pytest
+
+from app.adapters.llm.errors import (
+    LLMRateLimitedError,
+    LLMUnavailableError,
+    is_provider_failure,
+    should_fail_over,
+)
+from app.adapters.llm.openai_client import OpenAILLM, to_input_items, to_llm_result
+from app.adapters.llm.types import (
+    FunctionCall,
+    FunctionCallOutput,
+    InputMessage,
+    LLMTiming,
+    PromptPayload,
+)
+from app.services.reliability.hedging import HedgePolicy
+from app.services.reliability.rate_limit import BACKEND_HEADER, MODEL_HEADER
+
+
+def _payload(**kwargs) -> PromptPayload:
+    return PromptPayload(
+        messages=[
+            InputMessage(role="system", content="You are Merlin."),
+            InputMessage(role="assistant", content="The gate looms."),
+            InputMessage(role="user", content='I shout "open up!"'),
+            FunctionCall(call_id="call-1", name="ability_check", arguments="{}"),
+            FunctionCallOutput(call_id="call-1", output="The action was successful."),
+        ],
+        **kwargs,
+    )
+
+
+def test_to_input_items_uses_native_responses_items():
+    items = to_input_items(_payload())
+
+    assert items == [
+        {"role": "system", "content": "You are Merlin."},
+        {"role": "assistant", "content": "The gate looms."},
+        {"role": "user", "content": 'I shout "open up!"'},
+        {
+            "call_id": "call-1",
+            "name": "ability_check",
+            "arguments": "{}",
+            "type": "function_call",
+        },
+        {
+            "call_id": "call-1",
+            "output": "The action was successful.",
+            "type": "function_call_output",
+        },
+    ]
+
+
+def test_build_params_sends_items_and_chain_id():
+    llm = OpenAILLM(api_key="test", model="gpt-4o-mini")
+
+    params = llm._build_params(
+        _payload(previous_response_id="resp_1"), None, None, 0.7, 700
+    )
+
+    assert isinstance(params["input"], list)
+    assert params["previous_response_id"] == "resp_1"
+    assert "previous_response_id" not in params["input"][0]
+
+
+def test_build_params_passes_prompt_cache_key():
+    llm = OpenAILLM(api_key="test", model="gpt-4o-mini")
+
+    params = llm._build_params(
+        _payload(prompt_cache_key="merlin-session-s1"), None, None, 0.7, 700
+    )
+
+    assert params["prompt_cache_key"] == "merlin-session-s1"
+
+
+@pytest.mark.parametrize(
+    "model, sends_temperature",
+    [("gpt-4o-mini", True), ("o4-mini", False), ("o3", False)],
+)
+def test_build_params_omits_temperature_for_reasoning_models(model, sends_temperature):
+    llm = OpenAILLM(api_key="test", model="gpt-4o-mini")
+
+    params = llm._build_params(_payload(), None, None, 0.7, 700, model=model)
+
+    assert ("temperature" in params) is sends_temperature
+    assert params["model"] == model
+
+
+def test_build_params_tags_the_model_for_the_rate_limiter():
+    llm = OpenAILLM(api_key="test", model="gpt-4o-mini")
+    assert "extra_headers" not in llm._build_params(_payload(), None, None, 0.7, 700)
+
+    llm = OpenAILLM(api_key="test", model="gpt-4o-mini", rate_limiter=object())
+    params = llm._build_params(_payload(), None, None, 0.7, 700, model="gpt-4o")
+
+    assert params["extra_headers"] == {MODEL_HEADER: "gpt-4o"}
+
+    llm = OpenAILLM(
+        api_key="test", model="gpt-4o-mini", rate_limiter=object(), backend="east"
+    )
+    params = llm._build_params(_payload(), None, None, 0.7, 700)
+
+    assert params["extra_headers"] == {
+        MODEL_HEADER: "gpt-4o-mini",
+        BACKEND_HEADER: "east",
+    }
+
+
+def _response(output=(), output_text="", status="completed", usage=None, **kwargs):
+    return SimpleNamespace(
+        id="resp_1",
+        model="gpt-4o-mini",
+        output=list(output),
+        output_text=output_text,
+        status=status,
+        incomplete_details=None,
+        usage=usage,
+        **kwargs,
+    )
+
+
+def test_to_llm_result_maps_tool_calls_and_usage():
+    response = _response(
+        output=[
+            SimpleNamespace(
+                type="function_call",
+                call_id="call-1",
+                name="ability_check",
+                arguments="{}",
+            )
+        ],
+        usage=SimpleNamespace(
+            input_tokens=100,
+            output_tokens=20,
+            input_tokens_details=SimpleNamespace(cached_tokens=64),
+        ),
+    )
+
+    result = to_llm_result(response, LLMTiming(latency_ms=12.0))
+
+    assert result.finish_reason == "tool_calls"
+    assert [c.name for c in result.tool_calls] == ["ability_check"]
+    assert (result.usage.input_tokens, result.usage.cached_tokens) == (100, 64)
+    assert result.usage.llm_calls == 1
+    assert result.timing.latency_ms == 12.0
+
+
+def test_to_llm_result_reports_why_a_response_is_incomplete():
+    response = _response(output_text='{"message', status="incomplete")
+    response.incomplete_details = SimpleNamespace(reason="max_output_tokens")
+
+    result = to_llm_result(response, LLMTiming())
+
+    assert result.finish_reason == "max_output_tokens"
+    assert result.usage.llm_calls == 1
+
+
+class _TimeoutError(Exception):
+    pass
+
+
+_TimeoutError.__name__ = "APITimeoutError"
+
+
+@pytest.mark.asyncio
+async def test_generate_retries_and_tracks_latency_per_model():
+    llm = OpenAILLM(api_key="test", model="gpt-4o-mini", retry_backoff_ms=0)
+    response = _response(output_text="{}")
+    llm._client = SimpleNamespace(
+        responses=SimpleNamespace(
+            create=AsyncMock(side_effect=[_TimeoutError("slow"), response])
+        )
+    )
+
+    result = await llm.generate(_payload())
+    assert result.text == "{}"
+    assert result.response_id == "resp_1"
+    assert llm._client.responses.create.await_count == 2
+    assert llm._latency.count("gpt-4o-mini") == 1
+
+
+class _ServerError(openai.InternalServerError):
+    def __init__(self, message):
+        request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+        response = httpx.Response(503, request=request)
+        super().__init__(message, response=response, body=None)
+
+
+class _BadRequest(Exception):
+    status_code = 400
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_calling_the_provider():
+    llm = OpenAILLM(
+        api_key="test", model="gpt-4o-mini", max_retries=0, circuit_open_threshold=2
+    )
+    create = AsyncMock(side_effect=_ServerError("down"))
+    llm._client = SimpleNamespace(responses=SimpleNamespace(create=create))
+
+    for _ in range(2):
+        with pytest.raises(_ServerError):
+            await llm.generate(_payload())
+
+    with pytest.raises(LLMUnavailableError) as exc:
+        await llm.generate(_payload())
+    assert exc.value.retry_after > 0
+    assert create.await_count == 2
+    assert llm.retry_after() > 0
+    assert llm.retry_after("gpt-4o") == 0
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_trip_the_circuit():
+    llm = OpenAILLM(
+        api_key="test", model="gpt-4o-mini", max_retries=0, circuit_open_threshold=1
+    )
+    create = AsyncMock(side_effect=_BadRequest("bad input"))
+    llm._client = SimpleNamespace(responses=SimpleNamespace(create=create))
+
+    for _ in range(2):
+        with pytest.raises(_BadRequest):
+            await llm.generate(_payload())
+
+    assert llm.retry_after() == 0
+
+
+@pytest.mark.asyncio
+async def test_our_own_errors_do_not_trip_the_circuit():
+    llm = OpenAILLM(
+        api_key="test", model="gpt-4o-mini", max_retries=0, circuit_open_threshold=1
+    )
+    create = AsyncMock(side_effect=ValueError("bad tool arguments"))
+    llm._client = SimpleNamespace(responses=SimpleNamespace(create=create))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await llm.generate(_payload())
+
+    assert create.await_count == 2
+    assert llm.retry_after() == 0
+
+
+def test_only_provider_errors_count_as_provider_failures():
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+
+    assert is_provider_failure(openai.APITimeoutError(request=request))
+    assert is_provider_failure(openai.APIConnectionError(request=request))
+    assert is_provider_failure(_ServerError("down"))
+    assert is_provider_failure(LLMUnavailableError("gpt-4o-mini", retry_after=5))
+    assert not is_provider_failure(ValueError("bad tool arguments"))
+    assert not is_provider_failure(_BadRequest("bad input"))
+    assert not should_fail_over(ValueError("bad tool arguments"))
+    assert should_fail_over(_RateLimited("1"))
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("Rate limit reached")
+        self.response = SimpleNamespace(headers={"retry-after": retry_after})
+
+
+class _RecordingGovernor:
+    def __init__(self):
+        self.reserved = []
+
+    async def acquire(self, model, tokens, backend=None):
+        self.reserved.append((model, tokens, backend))
+
+
+class _QueueingGovernor(_RecordingGovernor):
+    async def acquire(self, model, tokens, backend=None):
+        await super().acquire(model, tokens, backend)
+        await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_time_queued_for_the_rate_limits_is_not_provider_latency():
+    governor = _QueueingGovernor()
+    llm = OpenAILLM(
+        api_key="test",
+        model="gpt-4o-mini",
+        rate_limiter=governor,
+        hedge_policy=HedgePolicy(min_samples=1, min_delay_s=0.01),
+    )
+    llm._latency.record("gpt-4o-mini", 0.001)
+    create = AsyncMock(return_value=_response(output_text="{}"))
+    llm._client = SimpleNamespace(responses=SimpleNamespace(create=create))
+
+    await llm.generate(_payload())
+
+    assert create.await_count == 1
+    assert len(governor.reserved) == 1
+    assert llm._latency.percentile("gpt-4o-mini", 100) < 0.05
+
+
+@pytest.mark.asyncio
+async def test_429s_are_retried_then_surface_as_rate_limited():
+    governor = _RecordingGovernor()
+    llm = OpenAILLM(
+        api_key="test",
+        model="gpt-4o-mini",
+        max_retries=1,
+        retry_backoff_ms=0,
+        rate_limiter=governor,
+        backend="east",
+    )
+    create = AsyncMock(side_effect=_RateLimited("0.01"))
+    llm._client = SimpleNamespace(responses=SimpleNamespace(create=create))
+
+    with pytest.raises(LLMRateLimitedError) as exc:
+        await llm.generate(_payload(), max_tokens=100)
+
+    assert exc.value.retry_after == 1
+    assert create.await_count == 2
+    assert [(m, b) for m, _, b in governor.reserved] == [("gpt-4o-mini", "east")] * 2
+    assert all(tokens > 100 for _, tokens, _ in governor.reserved)
+    assert llm.retry_after() == 0
@@ -0,0 +1,197 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.adapters.llm.errors import LLMUnavailableError, ResponseChainExpired
+from app.adapters.llm.router import RoutedBackend, RoutingLLM
+from app.adapters.llm.types import InputMessage, PromptPayload
+
+
+PAYLOAD = PromptPayload(messages=[InputMessage(role="user", content="Open the gate")])
+
+
+class _ServerError(openai.InternalServerError):
+    def __init__(self, message):
+        request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+        response = httpx.Response(500, request=request)
+        super().__init__(message, response=response, body=None)
+
+
+class StubBackend:
+    """LLM stand-in with injected latency and failures."""
+
+    def __init__(self, model, latency_s=0.0, error=None, unavailable_for=0):
+        self._model = model
+        self.latency_s = latency_s
+        self.error = error
+        self.unavailable_for = unavailable_for
+        self.calls = 0
+
+    def model(self):
+        return self._model
+
+    def retry_after(self, model=None):
+        return self.unavailable_for
+
+    async def generate(self, prompt_payload, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency_s)
+        if self.error:
+            raise self.error
+        return SimpleNamespace(model=self._model)
+
+    async def stream(self, prompt_payload, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency_s)
+        if self.error:
+            raise self.error
+        for delta in ("The gate ", "opens."):
+            yield SimpleNamespace(type="response.output_text.delta", delta=delta)
+
+
+def _router(*backends, **kwargs):
+    kwargs.setdefault("explore_ratio", 0.0)
+    return RoutingLLM(
+        [RoutedBackend(name=b.model(), client=b) for b in backends], **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_routes_to_the_fastest_backend_once_measured():
+    slow, fast = StubBackend("slow", 0.05), StubBackend("fast", 0.001)
+    router = _router(slow, fast)
+
+    for _ in range(2):
+        await router.generate(PAYLOAD)
+    results = [(await router.generate(PAYLOAD)).model for _ in range(5)]
+
+    assert results == ["fast"] * 5
+    assert slow.calls == 1
+    assert router.stats["slow"].mean_latency > router.stats["fast"].mean_latency
+
+
+@pytest.mark.asyncio
+async def test_weights_scale_the_latency_score():
+    a, b = StubBackend("a", 0.02), StubBackend("b", 0.01)
+    router = RoutingLLM(
+        [RoutedBackend("a", a, weight=10.0), RoutedBackend("b", b, weight=1.0)],
+        explore_ratio=0.0,
+    )
+    await router.generate(PAYLOAD)
+    await router.generate(PAYLOAD)
+
+    assert [x.name for x in router.ranked()] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_fails_over_on_provider_errors_and_skips_failing_backends():
+    broken = StubBackend("broken", error=_ServerError("down"))
+    healthy = StubBackend("healthy", 0.01)
+    router = _router(broken, healthy, max_error_rate=0.5)
+
+    assert (await router.generate(PAYLOAD)).model == "healthy"
+    assert (await router.generate(PAYLOAD)).model == "healthy"
+    assert broken.calls == 1
+    assert router.stats["broken"].error_rate == 1.0
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_backends_are_tried_last():
+    tripped = StubBackend("tripped", unavailable_for=30)
+    ok = StubBackend("ok", 0.5)
+    router = _router(tripped, ok)
+
+    assert [b.name for b in router.ranked()] == ["ok", "tripped"]
+    assert router.retry_after() == 0
+
+    ok.unavailable_for = 10
+    assert router.retry_after() == 10
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_failed_over():
+    first = StubBackend("first", error=ResponseChainExpired("resp_1"))
+    second = StubBackend("second")
+    router = _router(first, second)
+
+    with pytest.raises(ResponseChainExpired):
+        await router.generate(PAYLOAD)
+    assert second.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_chained_calls_stay_on_the_backend_that_issued_the_response():
+    fast, issuer = StubBackend("fast", 0.001), StubBackend("issuer", 0.05)
+    router = _router(fast, issuer)
+    await router.generate(PAYLOAD)
+    chained = PAYLOAD.model_copy(
+        update={"previous_response_id": "resp_1", "previous_response_backend": "issuer"}
+    )
+
+    result = await router.generate(chained)
+
+    assert result.backend == "issuer"
+    assert fast.calls == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "issuer",
+    [
+        StubBackend("issuer", unavailable_for=30),
+        StubBackend("issuer", error=_ServerError("down")),
+    ],
+)
+async def test_chain_expires_when_its_backend_cannot_serve_it(issuer):
+    other = StubBackend("other")
+    router = _router(issuer, other)
+    chained = PAYLOAD.model_copy(
+        update={"previous_response_id": "resp_1", "previous_response_backend": "issuer"}
+    )
+
+    with pytest.raises(ResponseChainExpired):
+        await router.generate(chained)
+    with pytest.raises(ResponseChainExpired):
+        await anext(router.stream(chained))
+    assert other.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_raises_the_last_error_when_every_backend_fails():
+    router = _router(
+        StubBackend("a", error=_ServerError("down")),
+        StubBackend("b", error=LLMUnavailableError("b", retry_after=5)),
+    )
+
+    with pytest.raises(LLMUnavailableError):
+        await router.generate(PAYLOAD)
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_the_first_event_and_records_ttft():
+    broken = StubBackend("broken", error=_ServerError("down"))
+    ok = StubBackend("ok", 0.01)
+    router = _router(broken, ok)
+
+    deltas = [e.delta async for e in router.stream(PAYLOAD)]
+
+    assert "".join(deltas) == "The gate opens."
+    assert router.stats["ok"].mean_ttft >= 0.01
+    assert router.stats["broken"].error_rate == 1.0
+
+
+def test_exploration_sends_some_calls_to_other_backends():
+    router = RoutingLLM(
+        [RoutedBackend(n, StubBackend(n)) for n in ("a", "b", "c")],
+        explore_ratio=1.0,
+        rng=random.Random(1),
+    )
+    router.stats["a"].record_success(0.01)
+    router.stats["b"].record_success(0.02)
+    router.stats["c"].record_success(0.03)
+
+    assert router.ranked()[0].name != "a"
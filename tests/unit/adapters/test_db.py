@@ -0,0 +1,28 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.util import greenlet_spawn
+
+from app.adapters.db import _TimedPool
+from app.services.observability.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_timed_pool_records_how_long_checkouts_wait():
+    metrics.reset()
+    pool = _TimedPool(creator=MagicMock, pool_size=1, max_overflow=0, timeout=0.05)
+
+    def checkouts():
+        held = pool.connect()
+        try:
+            with pytest.raises(PoolTimeout):
+                pool.connect()
+        finally:
+            held.close()
+
+    await greenlet_spawn(checkouts)
+
+    waits = metrics.timing("db_pool_wait_ms")
+    assert waits.count == 2
+    assert max(waits.samples) >= 50
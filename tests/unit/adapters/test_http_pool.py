@@ -0,0 +1,133 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.adapters import http_pool
+from app.settings import Settings
+
+
+class _KeepAliveServer:
+    """Minimal HTTP/1.1 server that answers 401 and counts connections."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 401 Unauthorized\r\n"
+                    b"Content-Length: 0\r\nConnection: keep-alive\r\n\r\n"
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def server():
+    handler = _KeepAliveServer()
+    srv = await asyncio.start_server(handler.handle, "127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    handler.url = f"http://127.0.0.1:{port}/v1/"
+    yield handler
+    srv.close()
+    await srv.wait_closed()
+
+
+@pytest.fixture
+async def shared_client(monkeypatch):
+    settings = Settings(
+        database_url="postgresql+asyncpg://u:p@localhost/db",
+        llm_http2=False,
+        llm_http_max_keepalive_connections=5,
+    )
+    monkeypatch.setattr(http_pool, "_client", http_pool.build_http_client(settings))
+    yield http_pool.get_http_client()
+    await http_pool.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_warmup_opens_connections_that_later_calls_reuse(server, shared_client):
+    await http_pool.warmup([server.url, server.url], connections=2)
+
+    assert server.connections == 2
+    stats = http_pool.pool_stats()
+    assert stats["connections"] == 2
+    assert stats["idle_connections"] == 2
+    assert stats["pool_details"] is True
+    assert stats["in_flight_requests"] == 0
+
+    await shared_client.get(server.url + "responses")
+    assert server.connections == 2
+    assert server.requests == 3
+
+
+@pytest.mark.asyncio
+async def test_warmup_survives_unreachable_hosts(shared_client):
+    await http_pool.warmup(["http://127.0.0.1:1/v1/"], connections=1)
+
+    assert http_pool.pool_stats()["connections"] == 0
+
+
+@pytest.mark.asyncio
+async def test_warmup_opens_one_connection_per_https_url_with_http2(
+    shared_client, monkeypatch
+):
+    touched = []
+
+    async def _get(url, **kwargs):
+        touched.append(url)
+
+    monkeypatch.setattr(shared_client, "get", _get)
+    monkeypatch.setattr(http_pool, "http2_available", lambda: True)
+    urls = ["https://api.example.com/v1/", "http://127.0.0.1:1/v1/"]
+
+    await http_pool.warmup(urls, connections=3)
+
+    assert touched.count(urls[0]) == 1
+    assert touched.count(urls[1]) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_requests_leave_the_in_flight_count(shared_client):
+    started = asyncio.Event()
+
+    async def hang(reader, writer):
+        started.set()
+        await asyncio.sleep(1)
+        writer.close()
+
+    srv = await asyncio.start_server(hang, "127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    try:
+        call = asyncio.ensure_future(
+            shared_client.get(f"http://127.0.0.1:{port}/", timeout=0.2)
+        )
+        await started.wait()
+        assert http_pool.pool_stats()["in_flight_requests"] == 1
+        with pytest.raises(httpx.ReadTimeout):
+            await call
+    finally:
+        srv.close()
+
+    with pytest.raises(httpx.ConnectError):
+        await shared_client.get("http://127.0.0.1:1/")
+    assert http_pool.pool_stats()["in_flight_requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_fall_back_when_the_pool_internals_change(shared_client):
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(shared_client._transport, "_pool", object())
+        stats = http_pool.pool_stats()
+
+    assert stats["pool_details"] is False
+    assert "connections" not in stats
+    assert stats["in_flight_requests"] == 0
@@ -0,0 +1,123 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.adapters.llm.errors import LLMRateLimitedError, LLMUnavailableError
+from app.api.v1 import chat as chat_module
+from app.api.v1.chat import chat_router, get_chat_service
+from app.domains.chat import Message, TurnDelta
+
+
+class FakeChatService:
+    def check_llm_available(self):
+        raise LLMUnavailableError("gpt-4o-mini", retry_after=42)
+
+    async def handle_turn(self, user_id, session_id, user_text):
+        self.check_llm_available()
+
+
+@pytest.mark.anyio
+async def test_message_endpoints_return_503_while_llm_is_unavailable():
+    app = FastAPI()
+    app.include_router(chat_router)
+
+    async def _override_service():
+        return FakeChatService()
+
+    async def _fake_user_id():
+        return "user-1"
+
+    app.dependency_overrides[get_chat_service] = _override_service
+    app.dependency_overrides[chat_module.require_user_id] = _fake_user_id
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for path in ("/chat/sessions/s1/message", "/chat/sessions/s1/message/stream"):
+            resp = await ac.post(path, json={"message": "Open the gate"})
+            assert resp.status_code == 503, resp.text
+            assert resp.headers["retry-after"] == "42"
+
+
+class RateLimitedChatService(FakeChatService):
+    def check_llm_available(self):
+        return True
+
+    async def handle_turn(self, user_id, session_id, user_text):
+        raise LLMRateLimitedError("gpt-4o-mini", retry_after=7)
+
+
+@pytest.mark.anyio
+async def test_send_message_returns_429_when_rate_limited():
+    app = FastAPI()
+    app.include_router(chat_router)
+
+    async def _override_service():
+        return RateLimitedChatService()
+
+    async def _fake_user_id():
+        return "user-1"
+
+    app.dependency_overrides[get_chat_service] = _override_service
+    app.dependency_overrides[chat_module.require_user_id] = _fake_user_id
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/chat/sessions/s1/message", json={"message": "Hi"})
+
+    assert resp.status_code == 429, resp.text
+    assert resp.headers["retry-after"] == "7"
+
+
+class StreamingChatService(FakeChatService):
+    llm = None
+
+    def __init__(self, fail):
+        self.fail = fail
+
+    def check_llm_available(self):
+        return True
+
+    async def stream_turn(self, user_id, session_id, user_text):
+        yield TurnDelta(text="You brace")
+        yield TurnDelta(text="", reset=True)
+        yield TurnDelta(text="The gate")
+        if self.fail:
+            raise ValueError("Invalid DM response")
+        yield Message(
+            message_id=2,
+            role="assistant",
+            content="The gate groans open.",
+            created_at="2025-01-01T00:00:00+00:00",
+        )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("fail", [False, True])
+async def test_history_is_only_summarized_after_a_completed_stream_turn(
+    fail, monkeypatch
+):
+    summarized = []
+
+    async def _fake_summarizer(llm, user_id, session_id):
+        summarized.append((user_id, session_id))
+
+    monkeypatch.setattr(chat_module, "run_history_summarizer", _fake_summarizer)
+    app = FastAPI()
+    app.include_router(chat_router)
+
+    async def _override_service():
+        return StreamingChatService(fail)
+
+    async def _fake_user_id():
+        return "user-1"
+
+    app.dependency_overrides[get_chat_service] = _override_service
+    app.dependency_overrides[chat_module.require_user_id] = _fake_user_id
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/chat/sessions/s1/message/stream", json={"message": "Hi"})
+
+    assert "event: reset\ndata: {}\n\nevent: delta" in resp.text
+    assert ("event: error" in resp.text) is fail
+    assert summarized == ([] if fail else [("user-1", "s1")])
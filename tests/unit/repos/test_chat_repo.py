@@ -0,0 +1,154 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import NoResultFound
+
+from app.repos.chat_repo import ChatRepo
+
+from tests.helpers.sqlalchemy_fakes import FakeResult
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+SESSION_COLUMNS = {
+    "session_id": "session-1",
+    "character_id": "char-1",
+    "adventure_title": "Stormspire",
+    "story_brief": "Infiltrate the keep.",
+    "adventure_status": {"summary": "Outside", "location": "Gate", "combat_state": False},
+    "last_response_id": "resp_1",
+    "last_response_backend": "primary",
+    "response_chain_length": 3,
+    "rolling_summary": "Awin reached the keep.",
+    "summarized_through_message_id": None,
+    "created_at": NOW,
+    "updated_at": NOW,
+    "archived_at": None,
+    "char_id": "char-1",
+    "char_name": "Awin",
+    "char_race": "Elf",
+    "char_class_name": "Wizard",
+    "char_background": "Sage",
+    "char_level": 1,
+    "char_hp_current": 6,
+    "char_hp_max": 6,
+    "char_ac": 12,
+    "char_speed": 30,
+    "char_abilities": {"str": 8, "dex": 14, "con": 10, "int": 16, "wis": 10, "cha": 8},
+    "char_skills": [],
+    "char_features": [],
+    "char_inventory": [
+        {"id": "rope", "name": "Rope", "quantity": 1, "weight": 10.0, "description": ""}
+    ],
+    "char_spellcasting": None,
+}
+
+
+def _row(message_id, role, content, is_new=False):
+    return {
+        **SESSION_COLUMNS,
+        "message_id": message_id,
+        "message_role": role,
+        "message_content": content,
+        "message_created_at": NOW,
+        "is_new": is_new,
+    }
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_inserts_and_loads_in_one_statement():
+    session = AsyncMock()
+    session.execute.return_value = FakeResult(
+        [
+            _row(1, "assistant", "Welcome"),
+            _row(2, "user", "Open the gate", is_new=True),
+        ]
+    )
+
+    repo = ChatRepo(session)
+    context = await repo.load_turn_context(
+        "user-1", "session-1", user_text="Open the gate", history_limit=10
+    )
+
+    session.execute.assert_called_once()
+    sql = str(session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH inserted_message AS")
+    assert "INSERT INTO public.chat_messages" in sql
+
+    assert context.session.adventure_title == "Stormspire"
+    assert context.session.last_response_id == "resp_1"
+    assert context.session.response_chain_length == 3
+    assert context.session.rolling_summary == "Awin reached the keep."
+    assert context.character.name == "Awin"
+    assert context.character.inventory[0].name == "Rope"
+    assert [m.content for m in context.messages] == ["Welcome", "Open the gate"]
+    assert context.user_message.message_id == 2
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_statement_compiles_for_postgres():
+    session = AsyncMock()
+    session.execute.return_value = FakeResult([_row(2, "user", "hi", is_new=True)])
+    await ChatRepo(session).load_turn_context(
+        "user-1", "session-1", user_text="hi", history_limit=5
+    )
+
+    compiled = session.execute.call_args[0][0].compile(dialect=postgresql.dialect())
+    sql = " ".join(str(compiled).split())
+    inserted, loaded = sql.split(" RETURNING ", 1)
+
+    assert inserted.startswith(
+        "WITH inserted_message AS (INSERT INTO public.chat_messages "
+        "(session_id, role, content) SELECT public.chat_sessions.session_id"
+    )
+    assert "AS chat_role)" in inserted
+    assert (
+        "FROM public.chat_sessions JOIN characters "
+        "ON characters.id = public.chat_sessions.character_id "
+        "AND characters.user_id = public.chat_sessions.user_id "
+        "WHERE public.chat_sessions.session_id = %(session_id_1)s::UUID "
+        "AND public.chat_sessions.user_id = %(user_id_1)s::UUID"
+    ) in inserted
+    assert (
+        "FROM inserted_message UNION ALL SELECT recent_messages.message_id"
+    ) in loaded
+    assert "ORDER BY public.chat_messages.message_id DESC LIMIT" in loaded
+    assert "LEFT OUTER JOIN characters" in loaded
+    assert loaded.endswith("ORDER BY history.message_id ASC")
+    assert compiled.params["param_2"] == "hi"
+    assert compiled.params["param_3"] == 4
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_without_messages():
+    session = AsyncMock()
+    session.execute.return_value = FakeResult([_row(None, None, None)])
+
+    context = await ChatRepo(session).load_turn_context("user-1", "session-1")
+
+    sql = str(session.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert "INSERT" not in sql
+    assert context.messages == []
+    assert context.character.name == "Awin"
+    assert context.user_message is None
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_raises_when_the_character_is_missing():
+    session = AsyncMock()
+    row = _row(None, None, None)
+    row["char_id"] = None
+    session.execute.return_value = FakeResult([row])
+
+    with pytest.raises(NoResultFound):
+        await ChatRepo(session).load_turn_context("user-1", "session-1")
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_raises_for_unowned_session():
+    session = AsyncMock()
+    session.execute.return_value = FakeResult([])
+
+    with pytest.raises(NoResultFound):
+        await ChatRepo(session).load_turn_context("user-2", "session-1", user_text="hi")
@@ -0,0 +1,322 @@
+import pytest
+from sqlalchemy.exc import NoResultFound
+
+from app.adapters.memory_db import MemorySession, MemoryStore
+from app.domains.adventures import AdventureStatus
+from app.domains.character_common import AbilityScores, Item, Skill
+from app.domains.creator import CreateCharacterCommand
+from app.domains.usage import TokenUsage
+from app.repos.chat_repo import ChatRepo
+from app.repos.factory import chat_repo_for
+from app.repos.memory_repos import (
+    MemoryAdventureRepo,
+    MemoryCharacterRepo,
+    MemoryChatRepo,
+    MemoryCreatorRepo,
+    MemoryUsageRepo,
+)
+from app.services.character.create_character_service import CreateCharacterService
+from app.services.chat.chat_service import ChatService
+
+ABILITIES = {"str": 8, "dex": 14, "con": 12, "int": 16, "wis": 10, "cha": 8}
+ROPE = {"id": "rope", "name": "Rope", "quantity": 1, "weight": 10.0, "description": ""}
+
+
+def _store() -> MemoryStore:
+    store = MemoryStore()
+    store.seed(
+        {
+            "adventures": [
+                {
+                    "adventure_id": "adv-1",
+                    "title": "Stormspire",
+                    "story_brief": "Infiltrate the keep.",
+                    "starting_status": {
+                        "summary": "Outside the gates.",
+                        "location": "Gate",
+                        "combat_state": False,
+                    },
+                }
+            ],
+            "races": [
+                {
+                    "id": "race-1",
+                    "name": "Elf",
+                    "description": "Graceful",
+                    "size": "Medium",
+                    "speed": 30,
+                    "ability_bonuses": {"dex": 2},
+                    "features": [],
+                }
+            ],
+            "classes": [
+                {
+                    "id": "class-1",
+                    "name": "Wizard",
+                    "description": "Arcane scholar",
+                    "ac": 10,
+                    "hit_dice": {"name": "d6", "rolls": 1, "sides": 6},
+                    "features": [],
+                    "skill_choices": None,
+                    "weapon_choices": None,
+                    "spell_choices": None,
+                }
+            ],
+            "backgrounds": [
+                {
+                    "id": "bg-1",
+                    "class_id": "class-1",
+                    "name": "Sage",
+                    "description": "Scholar",
+                    "features": [],
+                    "skills": [],
+                    "inventory": [ROPE],
+                }
+            ],
+            "characters": [
+                {
+                    "id": "char-1",
+                    "user_id": "user-1",
+                    "name": "Awin",
+                    "race": "Elf",
+                    "class_name": "Wizard",
+                    "background": "Sage",
+                    "level": 1,
+                    "hp_current": 6,
+                    "hp_max": 6,
+                    "ac": 12,
+                    "speed": 30,
+                    "abilities": ABILITIES,
+                    "skills": [],
+                    "features": [],
+                    "inventory": [ROPE],
+                    "spellcasting": None,
+                }
+            ],
+        }
+    )
+    return store
+
+
+async def _session_with_messages(repo: MemoryChatRepo, count: int) -> str:
+    session = await repo.create_session(
+        "user-1",
+        "char-1",
+        "Stormspire",
+        "Infiltrate the keep.",
+        AdventureStatus(summary="Outside", location="Gate", combat_state=False),
+    )
+    for i in range(count):
+        await repo.insert_user_message_row(session.session_id, f"message {i}")
+    return session.session_id
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_inserts_the_user_message_last():
+    repo = MemoryChatRepo(_store().session())
+    session_id = await _session_with_messages(repo, 5)
+
+    context = await repo.load_turn_context(
+        "user-1", session_id, user_text="I open the gate.", history_limit=3
+    )
+
+    assert [m.content for m in context.messages] == [
+        "message 3",
+        "message 4",
+        "I open the gate.",
+    ]
+    assert context.user_message == context.messages[-1]
+    assert context.character.name == "Awin"
+    assert context.character.inventory[0].name == "Rope"
+    assert await repo.count_total_messages(session_id) == 6
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_rejects_other_users_without_inserting():
+    repo = MemoryChatRepo(_store().session())
+    session_id = await _session_with_messages(repo, 2)
+
+    with pytest.raises(NoResultFound):
+        await repo.load_turn_context("user-2", session_id, user_text="hi")
+    with pytest.raises(NoResultFound):
+        await repo.assert_owned_session("user-2", session_id)
+    assert await repo.count_total_messages(session_id) == 2
+
+
+@pytest.mark.asyncio
+async def test_load_turn_context_rejects_sessions_without_a_character():
+    store = _store()
+    repo = MemoryChatRepo(store.session())
+    session_id = await _session_with_messages(repo, 2)
+    del store.characters["char-1"]
+
+    with pytest.raises(NoResultFound):
+        await repo.load_turn_context("user-1", session_id, user_text="hi")
+    assert await repo.count_total_messages(session_id) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_messages_pages_like_the_sql_repo():
+    repo = MemoryChatRepo(_store().session())
+    session_id = await _session_with_messages(repo, 6)
+    ids = [m.message_id for m in await repo.list_messages(session_id, limit=50)]
+
+    latest = await repo.list_messages(session_id, limit=2)
+    after = await repo.list_messages(session_id, after=ids[1], limit=3)
+
+    assert [m.content for m in latest] == ["message 4", "message 5"]
+    assert [m.message_id for m in after] == ids[2:5]
+    assert await repo.list_messages(session_id, after=ids[-1]) == []
+
+
+@pytest.mark.asyncio
+async def test_list_messages_outside_window():
+    repo = MemoryChatRepo(_store().session())
+    session_id = await _session_with_messages(repo, 8)
+    ids = [m.message_id for m in await repo.list_messages(session_id, limit=50)]
+
+    oldest = await repo.list_messages_outside_window(
+        session_id, after=None, window=4, limit=3
+    )
+    rest = await repo.list_messages_outside_window(
+        session_id, after=ids[2], window=4, limit=3
+    )
+
+    assert [m.message_id for m in oldest] == ids[:3]
+    assert [m.message_id for m in rest] == [ids[3]]
+    assert (
+        await repo.list_messages_outside_window(session_id, None, window=0, limit=3)
+        == []
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_session_summary_is_compare_and_set():
+    repo = MemoryChatRepo(_store().session())
+    session_id = await _session_with_messages(repo, 1)
+
+    assert await repo.update_session_summary(session_id, "First.", 4, None)
+    assert not await repo.update_session_summary(session_id, "Stale.", 6, None)
+    assert await repo.update_session_summary(session_id, "Second.", 8, 4)
+
+    session = await repo.get_session_by_id(session_id)
+    assert session.rolling_summary == "Second."
+    assert session.summarized_through_message_id == 8
+
+
+@pytest.mark.asyncio
+async def test_rollback_undoes_writes_since_commit():
+    store = _store()
+    db_session = store.session()
+    repo = MemoryChatRepo(db_session)
+    session_id = await _session_with_messages(repo, 1)
+    await db_session.commit()
+
+    await repo.update_session_response_chain(session_id, "resp_1", 1)
+    await repo.insert_assistant_message_row(
+        session_id, "The gate creaks.", TokenUsage(input_tokens=10, output_tokens=5)
+    )
+    await MemoryCharacterRepo(db_session).update_character_inventory("char-1", [])
+    assert db_session.in_transaction()
+    await db_session.rollback()
+
+    session = await repo.get_session("user-1", session_id)
+    character = await MemoryCharacterRepo(db_session).get_character_by_session_id(
+        "user-1", session_id
+    )
+    assert session.last_response_id is None
+    assert await repo.count_total_messages(session_id) == 1
+    assert [item.id for item in character.inventory] == ["rope"]
+    # Like a sequence, the message id counter is not rolled back.
+    message = await repo.insert_user_message_row(session_id, "again")
+    assert message.message_id == 3
+
+
+@pytest.mark.asyncio
+async def test_character_lookups_are_owner_scoped():
+    db_session = _store().session()
+    repo = MemoryCharacterRepo(db_session)
+
+    torch = Item(id="torch", name="Torch", quantity=2, weight=1.0, description="")
+    await repo.update_character_inventory("char-1", [torch])
+
+    assert await repo.get_character_by_character_id("user-2", "char-1") is None
+    character = await repo.get_character_by_character_id("user-1", "char-1")
+    assert character.inventory[0].quantity == 2
+    assert [c.id for c in await repo.list_characters_for_user("user-1")] == ["char-1"]
+
+
+@pytest.mark.asyncio
+async def test_record_usage_accumulates_usage():
+    repo = MemoryUsageRepo(_store().session())
+    usage = TokenUsage(input_tokens=200, output_tokens=40, cached_tokens=128, llm_calls=2)
+
+    await repo.record_usage("user-1", "session-1", usage)
+    await repo.record_usage("user-1", "session-2", usage)
+
+    session_totals = await repo.get_session_usage("session-1")
+    user_totals = await repo.get_user_usage("user-1")
+    assert (session_totals.turns, session_totals.input_tokens) == (1, 200)
+    assert (user_totals.turns, user_totals.llm_calls) == (2, 4)
+    assert await repo.get_user_usage("user-2") is None
+
+
+@pytest.mark.asyncio
+async def test_initialize_session_starts_the_first_adventure():
+    db_session = _store().session()
+    chat_repo = MemoryChatRepo(db_session)
+    service = ChatService(
+        llm=None,
+        adventure_repo=MemoryAdventureRepo(db_session),
+        character_repo=MemoryCharacterRepo(db_session),
+        chat_repo=chat_repo,
+    )
+
+    session = await service.initialize_session("user-1", "char-1")
+
+    assert session.adventure_title == "Stormspire"
+    assert await service.initialize_session("user-1", "char-1") == session
+    messages = await chat_repo.list_messages(session.session_id)
+    assert len(messages) == 1
+    assert messages[0].role == "assistant"
+    assert messages[0].content.startswith("Greetings, Awin!")
+
+
+@pytest.mark.asyncio
+async def test_create_character_persists_for_the_user():
+    db_session = _store().session()
+    creator_repo = MemoryCreatorRepo(db_session)
+    command = CreateCharacterCommand(
+        name="Arannis",
+        class_id="class-1",
+        race_id="race-1",
+        background_id="bg-1",
+        skills=[Skill(key="arcana", proficient=True)],
+        weapons=[],
+        spells=[],
+        abilities=AbilityScores(**ABILITIES),
+    )
+
+    created = await CreateCharacterService(creator_repo).create_character(
+        "user-2", command
+    )
+
+    stored = await MemoryCharacterRepo(db_session).get_character_by_character_id(
+        "user-2", created.id
+    )
+    assert stored.name == "Arannis"
+    assert stored.hp_max == 7
+    assert [item.id for item in stored.inventory] == ["rope"]
+    with pytest.raises(NoResultFound):
+        await creator_repo.get_race("race-2")
+
+
+def test_repos_follow_the_session_backend():
+    assert isinstance(chat_repo_for(MemorySession(MemoryStore())), MemoryChatRepo)
+    assert isinstance(chat_repo_for(object()), ChatRepo)
+
+
+def test_seed_rejects_unknown_tables():
+    with pytest.raises(ValueError):
+        MemoryStore().seed({"spells": []})
+
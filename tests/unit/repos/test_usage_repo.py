@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.domains.usage import TokenUsage
+from app.repos.usage_repo import UsageRepo
+
+from tests.helpers.sqlalchemy_fakes import FakeResult
+
+
+def _sql(call):
+    return str(call.args[0].compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_record_usage_upserts_session_and_user_totals():
+    session = AsyncMock()
+    usage = TokenUsage(input_tokens=200, output_tokens=40, cached_tokens=128, llm_calls=2)
+
+    await UsageRepo(session).record_usage("user-1", "session-1", usage)
+
+    session_sql, user_sql = (_sql(c) for c in session.execute.call_args_list)
+    assert session_sql.startswith("INSERT INTO public.session_usage")
+    assert "ON CONFLICT (session_id) DO UPDATE" in session_sql
+    assert (
+        "input_tokens = (public.session_usage.input_tokens + excluded.input_tokens)"
+        in session_sql
+    )
+    assert user_sql.startswith("INSERT INTO public.user_usage")
+    assert "ON CONFLICT (user_id) DO UPDATE" in user_sql
+    assert "turns = (public.user_usage.turns + " in user_sql
+
+
+@pytest.mark.asyncio
+async def test_get_session_usage():
+    session = AsyncMock()
+    session.execute.return_value = FakeResult(
+        [
+            {
+                "session_id": "session-1",
+                "user_id": "user-1",
+                "input_tokens": 200,
+                "output_tokens": 40,
+                "cached_tokens": 128,
+                "llm_calls": 2,
+                "turns": 1,
+                "updated_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            }
+        ]
+    )
+
+    totals = await UsageRepo(session).get_session_usage("session-1")
+
+    assert totals.cached_tokens == 128
+    assert totals.turns == 1
+
+    session.execute.return_value = FakeResult([])
+    assert await UsageRepo(session).get_user_usage("user-2") is None
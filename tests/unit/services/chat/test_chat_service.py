@@ -0,0 +1,782 @@
+import asyncio
+import gc
+import json
+import warnings
+
+import pytest
+
+from app.adapters.llm.errors import LLMUnavailableError, ResponseChainExpired
+from app.adapters.llm.types import (
+    FunctionCallOutput,
+    LLMResult,
+    LLMStreamEvent,
+    ToolCall,
+)
+from app.domains.adventures import AdventureStatus
+from app.domains.character import Character
+from app.domains.character_common import AbilityScores
+from app.domains.chat import Message, Session, TurnContext, TurnDelta
+from app.domains.usage import TokenUsage
+from app.services.chat.chat_service import DEGRADED_NARRATION, ChatService
+from app.services.observability.metrics import metrics
+from app.services.orchestration.prompt_builder import REPAIR_PROMPT
+from app.settings import Settings
+
+
+DM_RESPONSE = {
+    "message_to_user": "The gate groans open.",
+    "update_adventure_status": {
+        "summary": "Entered the keep.",
+        "location": "Gatehouse",
+        "combat_state": False,
+    },
+    "add_items_to_inventory": None,
+    "remove_items_from_inventory": None,
+}
+
+
+class _DummySession:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.in_transaction = False
+
+    async def commit(self):
+        self.commits += 1
+        self.in_transaction = False
+
+    async def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+
+class FakeChatRepo:
+    def __init__(self):
+        self.db_session = _DummySession()
+        self.messages: list[Message] = []
+        self.adventure_status = None
+        self.last_response_id = None
+        self.last_response_backend = None
+        self.response_chain_length = 0
+        self.summarized_through_message_id = None
+        self.message_usage = {}
+
+    async def insert_user_message_row(self, session_id, content):
+        return self._insert("user", content)
+
+    async def insert_assistant_message_row(self, session_id, content, usage=None):
+        msg = self._insert("assistant", content)
+        self.message_usage[msg.message_id] = usage
+        return msg
+
+    async def get_session(self, user_id, session_id):
+        self.db_session.in_transaction = True
+        return Session(
+            session_id=session_id,
+            character_id="char-1",
+            adventure_title="Stormspire",
+            story_brief="Infiltrate the keep.",
+            adventure_status=AdventureStatus("Outside", "Gate", False),
+            created_at="2025-01-01T00:00:00+00:00",
+            updated_at="2025-01-01T00:00:00+00:00",
+            archived_at=None,
+            last_response_id=self.last_response_id,
+            last_response_backend=self.last_response_backend,
+            response_chain_length=self.response_chain_length,
+            summarized_through_message_id=self.summarized_through_message_id,
+        )
+
+    async def update_session_response_chain(
+        self, session_id, response_id, chain_length, backend=None
+    ):
+        self.db_session.in_transaction = True
+        self.last_response_id = response_id
+        self.last_response_backend = backend
+        self.response_chain_length = chain_length
+
+    async def list_messages(self, session_id, after=None, limit=10):
+        return self.messages[-limit:]
+
+    async def load_turn_context(self, user_id, session_id, user_text=None, history_limit=10):
+        user_message = None
+        if user_text is not None:
+            user_message = self._insert("user", user_text)
+        return TurnContext(
+            session=await self.get_session(user_id, session_id),
+            character=await FakeCharacterRepo().get_character_by_session_id(
+                user_id, session_id
+            ),
+            messages=self.messages[-history_limit:],
+            user_message=user_message,
+        )
+
+    async def update_session_adventure_status(self, session_id, adventure_status):
+        self.db_session.in_transaction = True
+        self.adventure_status = adventure_status
+
+    def _insert(self, role, content):
+        self.db_session.in_transaction = True
+        msg = Message(
+            message_id=len(self.messages) + 1,
+            role=role,
+            content=content,
+            created_at="2025-01-01T00:00:00+00:00",
+        )
+        self.messages.append(msg)
+        return msg
+
+
+class FakeUsageRepo:
+    def __init__(self, db_session):
+        self.db_session = db_session
+        self.turns = []
+        self.failed = []
+
+    async def record_usage(self, user_id, session_id, usage, turns=1):
+        (self.turns if turns else self.failed).append((user_id, session_id, usage))
+
+
+class FakeCharacterRepo:
+    async def get_character_by_session_id(self, user_id, session_id):
+        return Character(
+            id="char-1",
+            name="Awin",
+            race="Elf",
+            class_name="Wizard",
+            background="Sage",
+            level=1,
+            hp_current=6,
+            hp_max=6,
+            ac=12,
+            speed=30,
+            abilities=AbilityScores(8, 14, 10, 16, 10, 8),
+        )
+
+
+def ability_check_call(call_id="call-1"):
+    return ToolCall(
+        name="ability_check",
+        call_id=call_id,
+        arguments=json.dumps(
+            {"difficulty": 10, "ability": "strength", "skill": "athletics"}
+        ),
+    )
+
+
+def _usage():
+    return TokenUsage(input_tokens=100, output_tokens=20, cached_tokens=64, llm_calls=1)
+
+
+class FakeLLM:
+    def __init__(
+        self,
+        dm_response: str = json.dumps(DM_RESPONSE),
+        tool_calls=(),
+        expired_chains=(),
+    ):
+        self.dm_response = dm_response
+        self.tool_calls = list(tool_calls)
+        self.expired_chains = set(expired_chains)
+        self.unavailable_for = 0
+        self.unavailable_models = {}
+        self.backend = None
+        self.calls = []
+
+    def model(self):
+        return "fake-model"
+
+    def retry_after(self, model=None):
+        return self.unavailable_models.get(model, self.unavailable_for)
+
+    def _respond(self, prompt_payload, tools, output_schema):
+        if prompt_payload.previous_response_id in self.expired_chains:
+            raise ResponseChainExpired(prompt_payload.previous_response_id)
+        response_id = f"resp_{len(self.calls)}"
+        answered = any(
+            m.type == "function_call_output"
+            for m in prompt_payload.messages
+            if hasattr(m, "type")
+        )
+        if tools and self.tool_calls and not answered:
+            return LLMResult(
+                text="",
+                finish_reason="tool_calls",
+                response_id=response_id,
+                tool_calls=list(self.tool_calls),
+                usage=_usage(),
+            )
+        text = self.dm_response if output_schema else ""
+        return LLMResult(
+            text=text, response_id=response_id, backend=self.backend, usage=_usage()
+        )
+
+    def _record(self, prompt_payload, tools, output_schema, **extra):
+        self.calls.append(
+            {
+                "tools": tools,
+                "output_schema": output_schema,
+                "previous_response_id": prompt_payload.previous_response_id,
+                "previous_response_backend": prompt_payload.previous_response_backend,
+                "message_count": len(prompt_payload.messages),
+                **extra,
+            }
+        )
+
+    async def generate(self, prompt_payload, tools=None, output_schema=None, **options):
+        self._record(prompt_payload, tools, output_schema, **options)
+        return self._respond(prompt_payload, tools, output_schema)
+
+    async def stream(self, prompt_payload, tools=None, output_schema=None, **options):
+        self._record(prompt_payload, tools, output_schema, stream=True, **options)
+        response = self._respond(prompt_payload, tools, output_schema)
+        text = response.text
+        for i in range(0, len(text), 5):
+            yield LLMStreamEvent(type="text_delta", delta=text[i : i + 5])
+        for _ in response.tool_calls:
+            yield LLMStreamEvent(type="tool_call_started")
+        yield LLMStreamEvent(type="completed", result=response)
+
+
+def _service(llm=None, **settings):
+    chat_repo = FakeChatRepo()
+    service = ChatService(
+        llm=llm or FakeLLM(),
+        adventure_repo=None,
+        character_repo=FakeCharacterRepo(),
+        chat_repo=chat_repo,
+        usage_repo=FakeUsageRepo(chat_repo.db_session),
+        settings=Settings(database_url="postgresql+asyncpg://test", **settings),
+    )
+    return service, chat_repo
+
+
+@pytest.mark.asyncio
+async def test_handle_turn_persists_dm_message():
+    service, chat_repo = _service()
+
+    msg = await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert msg.content == "The gate groans open."
+    assert [m.role for m in chat_repo.messages] == ["user", "assistant"]
+    assert chat_repo.adventure_status.location == "Gatehouse"
+    assert chat_repo.db_session.commits == 2
+
+    usage = chat_repo.message_usage[msg.message_id]
+    assert (usage.input_tokens, usage.output_tokens, usage.cached_tokens) == (
+        200,
+        40,
+        128,
+    )
+    assert usage.llm_calls == 2
+    assert service.usage_repo.turns == [("user-1", "session-1", usage)]
+
+
+@pytest.mark.asyncio
+async def test_stream_turn_yields_deltas_then_persisted_message():
+    service, chat_repo = _service()
+
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Open the gate")]
+
+    deltas = [i.text for i in items if isinstance(i, TurnDelta)]
+    assert len(deltas) > 1
+    assert "".join(deltas) == "The gate groans open."
+    assert isinstance(items[-1], Message)
+    assert items[-1].role == "assistant"
+    assert chat_repo.db_session.commits == 2
+    assert chat_repo.message_usage[items[-1].message_id].llm_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_turn_rolls_back_when_final_response_is_invalid():
+    llm = FakeLLM('{"message_to_user": "The gate gro", "update_adventure_status": 4}')
+    service, chat_repo = _service(llm=llm)
+
+    deltas = []
+    with pytest.raises(Exception):
+        async for item in service.stream_turn("user-1", "session-1", "Open the gate"):
+            deltas.append(item)
+
+    assert "".join(d.text for d in deltas) == "The gate gro"
+    assert [m.role for m in chat_repo.messages] == ["user"]
+    assert chat_repo.db_session.rollbacks == 1
+    assert llm.calls[-1]["output_schema"] is not None  # the model was asked again
+    # The tokens of both rounds and the re-ask are still recorded, as no turn.
+    assert service.usage_repo.turns == []
+    [(_, _, usage)] = service.usage_repo.failed
+    assert usage.llm_calls == 3
+    assert chat_repo.db_session.commits == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_turn_records_the_usage_it_spent():
+    service, chat_repo = _service()
+
+    async def _fail(*args, **kwargs):
+        raise RuntimeError("inventory update failed")
+
+    service._handle_dm_response = _fail
+
+    with pytest.raises(RuntimeError):
+        await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert chat_repo.db_session.rollbacks == 1
+    assert service.usage_repo.turns == []
+    [(user_id, session_id, usage)] = service.usage_repo.failed
+    assert (user_id, session_id, usage.llm_calls) == ("user-1", "session-1", 2)
+
+
+@pytest.mark.asyncio
+async def test_truncated_response_is_repaired_without_another_llm_call():
+    metrics.reset()
+    llm = FakeLLM('{"message_to_user": "The gate gro')
+    service, chat_repo = _service(llm=llm)
+
+    msg = await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert msg.content == "The gate gro"
+    assert len(llm.calls) == 2
+    # The adventure status falls back to the session's current one.
+    assert chat_repo.adventure_status.location == "Gate"
+    assert metrics.counter("dm_response_repair", path="local_repair") == 1
+
+
+@pytest.mark.asyncio
+async def test_unrepairable_response_is_asked_for_again():
+    metrics.reset()
+    llm = FakeLLM("The gate groans open.")
+    service, chat_repo = _service(llm=llm, llm_chain_responses=True)
+    original = llm.generate
+
+    async def _fix_on_reask(prompt_payload, **kwargs):
+        result = await original(prompt_payload, **kwargs)
+        if prompt_payload.messages[-1].content == REPAIR_PROMPT:
+            result.text = json.dumps(DM_RESPONSE)
+        return result
+
+    llm.generate = _fix_on_reask
+
+    msg = await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert msg.content == "The gate groans open."
+    assert len(llm.calls) == 3
+    assert metrics.counter("dm_response_repair", path="reask") == 1
+    # The next turn chains from the re-ask, which holds the accepted response.
+    assert chat_repo.last_response_id == "resp_3"
+
+
+@pytest.mark.asyncio
+async def test_stream_turn_without_streaming_emits_single_delta():
+    llm = FakeLLM()
+    service, _ = _service(llm=llm, llm_streaming=False)
+
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Open the gate")]
+
+    assert [i.text for i in items if isinstance(i, TurnDelta)] == ["The gate groans open."]
+    assert not any(c.get("stream") for c in llm.calls)
+
+
+@pytest.mark.asyncio
+async def test_two_rounds_by_default():
+    llm = FakeLLM()
+    service, _ = _service(llm=llm)
+
+    await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert [(bool(c["tools"]), bool(c["output_schema"])) for c in llm.calls] == [
+        (True, False),
+        (False, True),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_each_phase_uses_its_own_model_and_limits():
+    llm = FakeLLM()
+    service, _ = _service(
+        llm=llm,
+        llm_temperature=0.9,
+        llm_max_output_tokens=800,
+        llm_tool_model="small-model",
+        llm_tool_temperature=0.0,
+        llm_tool_max_output_tokens=64,
+    )
+
+    await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    tool_call, narration_call = llm.calls
+    assert (
+        tool_call["model"],
+        tool_call["temperature"],
+        tool_call["max_tokens"],
+    ) == ("small-model", 0.0, 64)
+    assert (
+        narration_call["model"],
+        narration_call["temperature"],
+        narration_call["max_tokens"],
+    ) == (None, 0.9, 800)
+
+
+@pytest.mark.asyncio
+async def test_phase_latency_is_recorded():
+    metrics.reset()
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm)
+
+    await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    labels = {"model": "unknown"}
+    assert metrics.timing("turn_phase_latency_ms", phase="tool_decision", **labels)
+    assert metrics.timing("turn_phase_latency_ms", phase="narration", **labels)
+    assert metrics.timing("turn_phase_latency_ms", phase="tool_execution").count == 1
+
+
+@pytest.mark.asyncio
+async def test_single_round_turn_skips_follow_up_without_tool_calls():
+    llm = FakeLLM()
+    service, chat_repo = _service(llm=llm, llm_single_round_turns=True)
+
+    msg = await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert msg.content == "The gate groans open."
+    assert len(llm.calls) == 1
+    assert llm.calls[0]["tools"] and llm.calls[0]["output_schema"]
+
+
+@pytest.mark.asyncio
+async def test_single_round_turn_follows_up_after_tool_call():
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm, llm_single_round_turns=True)
+
+    msg = await service.handle_turn("user-1", "session-1", "Force the gate")
+
+    assert msg.content == "The gate groans open."
+    assert len(llm.calls) == 2
+    assert llm.calls[1]["tools"] is None
+
+
+@pytest.mark.asyncio
+async def test_single_round_stream_turn():
+    llm = FakeLLM()
+    service, _ = _service(llm=llm, llm_single_round_turns=True)
+
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Open the gate")]
+
+    assert "".join(i.text for i in items if isinstance(i, TurnDelta)) == DM_RESPONSE[
+        "message_to_user"
+    ]
+    assert len(llm.calls) == 1
+
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm, llm_single_round_turns=True)
+
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Force the gate")]
+
+    assert isinstance(items[-1], Message)
+    assert len(llm.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_round_stream_drops_narration_before_a_tool_call():
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm, llm_single_round_turns=True)
+    respond = llm._respond
+
+    def _narrate_then_call(prompt_payload, tools, output_schema):
+        result = respond(prompt_payload, tools, output_schema)
+        if result.tool_calls:
+            result.text = json.dumps({**DM_RESPONSE, "message_to_user": "You brace."})
+        return result
+
+    llm._respond = _narrate_then_call
+
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Force the gate")]
+
+    deltas = [i for i in items if isinstance(i, TurnDelta)]
+    resets = [n for n, d in enumerate(deltas) if d.reset]
+    assert len(resets) == 1
+    assert "".join(d.text for d in deltas[: resets[0]]) == "You brace."
+    narration = "".join(d.text for d in deltas[resets[0] + 1 :])
+    assert narration == DM_RESPONSE["message_to_user"]
+    assert items[-1].content == DM_RESPONSE["message_to_user"]
+
+
+@pytest.mark.asyncio
+async def test_single_round_stream_stops_forwarding_at_the_tool_call():
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm, llm_single_round_turns=True)
+    stream = llm.stream
+
+    async def _call_then_narrate(prompt_payload, tools=None, output_schema=None, **kw):
+        async for event in stream(prompt_payload, tools, output_schema, **kw):
+            if event.type == "completed" and event.result.tool_calls:
+                yield LLMStreamEvent(type="text_delta", delta='{"message_to_user": "x"')
+            yield event
+
+    llm.stream = _call_then_narrate
+
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Force the gate")]
+
+    deltas = [i for i in items if isinstance(i, TurnDelta)]
+    assert not any(d.reset for d in deltas)
+    assert "".join(d.text for d in deltas) == DM_RESPONSE["message_to_user"]
+
+
+@pytest.mark.asyncio
+async def test_all_tool_calls_are_fed_back_in_one_follow_up():
+    llm = FakeLLM(tool_calls=[ability_check_call("call-1"), ability_check_call("call-2")])
+    service, _ = _service(llm=llm)
+    payloads = []
+    original = llm.generate
+
+    async def _record(prompt_payload, **kwargs):
+        payloads.append(prompt_payload.model_copy(deep=True))
+        return await original(prompt_payload, **kwargs)
+
+    llm.generate = _record
+
+    await service.handle_turn("user-1", "session-1", "Climb and listen")
+
+    assert len(llm.calls) == 2
+    outputs = [m for m in payloads[1].messages if isinstance(m, FunctionCallOutput)]
+    assert [o.call_id for o in outputs] == ["call-1", "call-2"]
+
+
+@pytest.mark.asyncio
+async def test_speculative_narration_is_used_when_no_tool_is_called():
+    llm = FakeLLM()
+    service, chat_repo = _service(llm=llm, llm_speculative_narration=True)
+
+    msg = await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert msg.content == "The gate groans open."
+    assert sorted((bool(c["tools"]), bool(c["output_schema"])) for c in llm.calls) == [
+        (False, True),
+        (True, False),
+    ]
+    assert chat_repo.message_usage[msg.message_id].llm_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_speculative_narration_is_replaced_after_a_tool_call():
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm, llm_speculative_narration=True)
+    payloads = []
+    original = llm.generate
+
+    async def _record(prompt_payload, **kwargs):
+        payloads.append(prompt_payload.model_copy(deep=True))
+        await asyncio.sleep(0 if kwargs.get("tools") else 0.05)
+        return await original(prompt_payload, **kwargs)
+
+    llm.generate = _record
+
+    msg = await service.handle_turn("user-1", "session-1", "Climb the wall")
+
+    assert msg.content == "The gate groans open."
+    # The speculative narration was cancelled before the fake answered it.
+    assert [bool(c["output_schema"]) for c in llm.calls] == [False, True]
+    outputs = [m for m in payloads[-1].messages if isinstance(m, FunctionCallOutput)]
+    assert [o.call_id for o in outputs] == ["call-1"]
+    # Its prompt is still billed, so it is counted as a call with estimated input.
+    [(_, _, usage)] = service.usage_repo.turns
+    assert usage.llm_calls == 3
+    assert usage.input_tokens > 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream", [False, True])
+async def test_speculation_cancelled_before_it_starts_is_counted(stream):
+    # The fake answers the tool round without yielding, so the speculative
+    # narration is cancelled before its task first runs.
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm, llm_speculative_narration=True)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        if stream:
+            [i async for i in service.stream_turn("user-1", "session-1", "Climb")]
+        else:
+            await service.handle_turn("user-1", "session-1", "Climb")
+        gc.collect()
+
+    assert not [w for w in caught if "never awaited" in str(w.message)]
+    [(_, _, usage)] = service.usage_repo.turns
+    assert len(llm.calls) == 2
+    assert usage.llm_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_speculative_stream_turn_replays_buffered_narration():
+    llm = FakeLLM()
+    service, _ = _service(llm=llm, llm_speculative_narration=True)
+
+    items = [
+        item
+        async for item in service.stream_turn("user-1", "session-1", "Open the gate")
+    ]
+
+    deltas = [i.text for i in items if isinstance(i, TurnDelta)]
+    assert "".join(deltas) == "The gate groans open."
+    assert items[-1].content == "The gate groans open."
+    assert len(llm.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_speculative_stream_turn_narrates_again_after_a_tool_call():
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, _ = _service(llm=llm, llm_speculative_narration=True)
+
+    items = [
+        item
+        async for item in service.stream_turn("user-1", "session-1", "Climb the wall")
+    ]
+
+    assert "".join(i.text for i in items if isinstance(i, TurnDelta)) == (
+        "The gate groans open."
+    )
+    assert items[-1].content == "The gate groans open."
+    assert [c.get("stream", False) for c in llm.calls][-1] is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "enable_rolling_summary, summarized_through, expected",
+    [
+        (False, None, list(range(12, 16))),
+        # Messages 11 and 12 left the window but are not in the summary yet.
+        (True, 10, list(range(11, 16))),
+        (True, None, list(range(9, 16))),
+    ],
+)
+async def test_history_keeps_messages_the_summary_does_not_cover(
+    enable_rolling_summary, summarized_through, expected
+):
+    service, chat_repo = _service(
+        enable_rolling_summary=enable_rolling_summary,
+        llm_history_window=4,
+        llm_summary_batch_size=3,
+    )
+    for i in range(14):
+        chat_repo._insert("user", f"message {i}")
+    chat_repo.summarized_through_message_id = summarized_through
+
+    _, history, _ = await service._load_context("user-1", "session-1", "Hello")
+
+    assert [m.message_id for m in history] == expected
+
+
+@pytest.mark.asyncio
+async def test_no_transaction_is_open_while_waiting_on_the_llm():
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, chat_repo = _service(llm=llm)
+    open_during_calls = []
+    original = llm.generate
+
+    async def _record(prompt_payload, **kwargs):
+        open_during_calls.append(chat_repo.db_session.in_transaction)
+        return await original(prompt_payload, **kwargs)
+
+    llm.generate = _record
+
+    await service.handle_turn("user-1", "session-1", "Force the gate")
+
+    assert open_during_calls == [False, False]
+    assert chat_repo.db_session.commits == 2
+    assert not chat_repo.db_session.in_transaction
+
+
+@pytest.mark.asyncio
+async def test_chained_turn_sends_only_new_messages_and_stores_response_id():
+    llm = FakeLLM(tool_calls=[ability_check_call()])
+    service, chat_repo = _service(llm=llm, llm_chain_responses=True)
+    chat_repo.last_response_id = "resp_prev"
+    chat_repo.last_response_backend = "primary"
+    chat_repo.response_chain_length = 3
+    llm.backend = "primary"
+
+    await service.handle_turn("user-1", "session-1", "Force the gate")
+
+    assert [c["previous_response_id"] for c in llm.calls] == ["resp_prev", "resp_prev"]
+    assert {c["previous_response_backend"] for c in llm.calls} == {"primary"}
+    assert [c["message_count"] for c in llm.calls] == [1, 3]
+    assert chat_repo.last_response_id == "resp_2"
+    assert chat_repo.last_response_backend == "primary"
+    assert chat_repo.response_chain_length == 4
+
+
+@pytest.mark.asyncio
+async def test_chain_falls_back_to_full_prompt_when_expired():
+    llm = FakeLLM(expired_chains={"resp_gone"})
+    service, chat_repo = _service(llm=llm, llm_chain_responses=True)
+    chat_repo.last_response_id = "resp_gone"
+    chat_repo.response_chain_length = 3
+
+    msg = await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert msg.content == "The gate groans open."
+    assert llm.calls[-1]["previous_response_id"] is None
+    assert llm.calls[-1]["message_count"] > 1
+    assert chat_repo.response_chain_length == 1
+
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Wait")]
+    assert isinstance(items[-1], Message)
+    assert chat_repo.response_chain_length == 2
+
+
+@pytest.mark.asyncio
+async def test_chain_is_rebuilt_after_max_turns():
+    llm = FakeLLM()
+    service, chat_repo = _service(
+        llm=llm, llm_chain_responses=True, llm_chain_max_turns=3
+    )
+    chat_repo.last_response_id = "resp_prev"
+    chat_repo.response_chain_length = 3
+
+    await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert all(c["previous_response_id"] is None for c in llm.calls)
+    assert chat_repo.response_chain_length == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_before_touching_the_database():
+    llm = FakeLLM()
+    llm.unavailable_for = 30
+    service, chat_repo = _service(llm)
+
+    with pytest.raises(LLMUnavailableError) as exc:
+        await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert exc.value.retry_after == 30
+    assert chat_repo.messages == []
+    assert chat_repo.db_session.commits == 0
+    assert llm.calls == []
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_on_a_phase_model_fails_before_touching_the_database():
+    llm = FakeLLM()
+    llm.unavailable_models = {"tool-model": 45}
+    service, chat_repo = _service(llm, llm_tool_model="tool-model")
+
+    with pytest.raises(LLMUnavailableError) as exc:
+        await service.handle_turn("user-1", "session-1", "Open the gate")
+
+    assert (exc.value.model, exc.value.retry_after) == ("tool-model", 45)
+    assert chat_repo.messages == []
+    assert llm.calls == []
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_with_degraded_narration():
+    llm = FakeLLM()
+    llm.unavailable_for = 30
+    service, chat_repo = _service(llm, llm_degraded_narration=True)
+
+    msg = await service.handle_turn("user-1", "session-1", "Open the gate")
+    items = [i async for i in service.stream_turn("user-1", "session-1", "Hello")]
+
+    assert msg.content == DEGRADED_NARRATION
+    assert [type(i) for i in items] == [TurnDelta, Message]
+    assert items[0].text == DEGRADED_NARRATION
+    assert chat_repo.messages == []
+    assert chat_repo.db_session.commits == 0
@@ -0,0 +1,142 @@
+
+import pytest
+
+from app.adapters.llm.types import LLMResult
+from app.domains.adventures import AdventureStatus
+from app.domains.chat import Message, Session
+from app.domains.usage import TokenUsage
+from app.services.chat.history_summarizer import HistorySummarizer
+from app.settings import Settings
+
+
+class _DummySession:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+class FakeChatRepo:
+    def __init__(self, message_count, window, summary=None, through=None):
+        self.db_session = _DummySession()
+        self.messages = [
+            Message(
+                message_id=i,
+                role="user" if i % 2 else "assistant",
+                content=f"message {i}",
+                created_at="2025-01-01T00:00:00+00:00",
+            )
+            for i in range(1, message_count + 1)
+        ]
+        self.window = window
+        self.rolling_summary = summary
+        self.summarized_through_message_id = through
+
+    async def get_session_by_id(self, session_id):
+        return Session(
+            session_id=session_id,
+            character_id="char-1",
+            adventure_title="Stormspire",
+            story_brief="Infiltrate the keep.",
+            adventure_status=AdventureStatus("Outside", "Gate", False),
+            created_at="2025-01-01T00:00:00+00:00",
+            updated_at="2025-01-01T00:00:00+00:00",
+            archived_at=None,
+            rolling_summary=self.rolling_summary,
+            summarized_through_message_id=self.summarized_through_message_id,
+        )
+
+    async def list_messages_outside_window(self, session_id, after, window, limit):
+        outside = self.messages[:-window] if window else self.messages
+        return [m for m in outside if after is None or m.message_id > after][:limit]
+
+    async def update_session_summary(
+        self,
+        session_id,
+        rolling_summary,
+        summarized_through_message_id,
+        previous_through_message_id,
+    ):
+        if previous_through_message_id != self.summarized_through_message_id:
+            return False
+        self.rolling_summary = rolling_summary
+        self.summarized_through_message_id = summarized_through_message_id
+        return True
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = []
+
+    async def generate(self, prompt_payload, **kwargs):
+        self.calls.append(prompt_payload)
+        return LLMResult(
+            text=f"summary {len(self.calls)}\n",
+            usage=TokenUsage(input_tokens=80, output_tokens=5, llm_calls=1),
+        )
+
+
+def _summarizer(repo, llm):
+    settings = Settings(
+        database_url="postgresql+asyncpg://u:p@localhost/db",
+        llm_history_window=4,
+        llm_summary_batch_size=3,
+    )
+    return HistorySummarizer(llm, repo, settings)
+
+
+@pytest.mark.asyncio
+async def test_waits_for_a_full_batch_outside_the_window():
+    repo = FakeChatRepo(message_count=6, window=4)
+    llm = FakeLLM()
+
+    assert await _summarizer(repo, llm).summarize_session("s1") is False
+    assert llm.calls == []
+    assert repo.rolling_summary is None
+
+
+@pytest.mark.asyncio
+async def test_folds_the_next_batch_into_the_current_summary():
+    repo = FakeChatRepo(message_count=12, window=4, summary="Old news.", through=3)
+    llm = FakeLLM()
+
+    assert await _summarizer(repo, llm).summarize_session("s1") is True
+
+    prompt = llm.calls[0].messages[-1].content
+    assert "Old news." in prompt
+    assert "message 3" not in prompt
+    assert "message 4" in prompt and "message 6" in prompt
+    assert "message 7" not in prompt
+    assert repo.rolling_summary == "summary 1"
+    assert repo.summarized_through_message_id == 6
+    assert repo.db_session.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_adds_up_the_tokens_of_its_calls():
+    repo = FakeChatRepo(message_count=12, window=4)
+    llm = FakeLLM()
+    summarizer = _summarizer(repo, llm)
+
+    await summarizer.summarize_session("s1")
+
+    assert summarizer.usage.llm_calls == 1
+    assert summarizer.usage.output_tokens == 5
+
+
+@pytest.mark.asyncio
+async def test_does_not_overwrite_a_concurrent_update():
+    repo = FakeChatRepo(message_count=12, window=4)
+    llm = FakeLLM()
+    summarizer = _summarizer(repo, llm)
+
+    async def racing_generate(prompt_payload, **kwargs):
+        repo.summarized_through_message_id = 3
+        repo.rolling_summary = "from another worker"
+        return LLMResult(text="stale")
+
+    llm.generate = racing_generate
+
+    assert await summarizer.summarize_session("s1") is False
+    assert repo.rolling_summary == "from another worker"
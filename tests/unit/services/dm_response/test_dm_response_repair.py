@@ -0,0 +1,93 @@
+import json
+
+from app.services.dm_response.dm_response_repair import (
+    close_truncated_json,
+    repair_dm_response,
+)
+
+FULL = json.dumps(
+    {
+        "message_to_user": "The gate groans open.",
+        "update_adventure_status": {
+            "summary": "Entered the keep.",
+            "location": "Gatehouse",
+            "combat_state": False,
+        },
+        "add_items_to_inventory": {
+            "items": [
+                {
+                    "id": "key",
+                    "name": "Iron key",
+                    "quantity": 1,
+                    "weight": 0.1,
+                    "description": "A heavy key.",
+                },
+                {
+                    "id": "rope",
+                    "name": "Rope",
+                    "quantity": 1,
+                    "weight": 10,
+                    "description": "Fifty feet of hempen rope.",
+                },
+            ]
+        },
+        "remove_items_from_inventory": None,
+    }
+)
+
+STATUS = {
+    "update_adventure_status": {
+        "summary": "At the gate.",
+        "location": "Gate",
+        "combat_state": False,
+    }
+}
+
+
+def test_close_truncated_json_keeps_a_cut_off_string_value():
+    assert json.loads(close_truncated_json('{"a": ["x", {"b": "cut o')) == {
+        "a": ["x", {"b": "cut o"}]
+    }
+
+
+def test_close_truncated_json_drops_dangling_keys_and_literals():
+    assert json.loads(close_truncated_json('{"a": "x", "b": tr')) == {"a": "x"}
+    assert json.loads(close_truncated_json('{"a": "x", "b')) == {"a": "x"}
+    assert json.loads(close_truncated_json('{"a": 1, ')) == {"a": 1}
+    assert json.loads(close_truncated_json('{"a": "x\\u00')) == {"a": "x"}
+
+
+def test_valid_response_needs_no_fixes():
+    response, fixes = repair_dm_response(FULL)
+
+    assert response.message_to_user == "The gate groans open."
+    assert fixes == []
+
+
+def test_truncated_narration_falls_back_to_the_current_status():
+    response, fixes = repair_dm_response(FULL[:36], STATUS)
+
+    assert response.message_to_user == "The gate groans"
+    assert response.update_adventure_status.location == "Gate"
+    assert response.add_items_to_inventory is None
+    assert fixes == ["closed", "filled"]
+
+
+def test_incomplete_last_item_is_dropped():
+    cut = FULL.index('"description": "Fifty') + len('"descr')
+    response, _ = repair_dm_response(FULL[:cut], STATUS)
+
+    assert [i.id for i in response.add_items_to_inventory.items] == ["key"]
+    assert response.update_adventure_status.location == "Gatehouse"
+
+
+def test_text_around_the_json_is_stripped():
+    response, fixes = repair_dm_response(f"```json\n{FULL}\n```")
+
+    assert response.message_to_user == "The gate groans open."
+    assert fixes == ["extracted"]
+
+
+def test_unrepairable_response_returns_none():
+    assert repair_dm_response("The gate groans open.")[0] is None
+    assert repair_dm_response(FULL[:35])[0] is None
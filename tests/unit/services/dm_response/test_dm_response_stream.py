@@ -0,0 +1,53 @@
+import json
+
+from app.services.dm_response.dm_response_stream import MessageToUserExtractor
+
+
+DM_RESPONSE = {
+    "message_to_user": 'The door creaks open. "Who goes there?" a voice calls.\nÉlan waves 🐉.',
+    "update_adventure_status": {
+        "summary": "Entered the keep.",
+        "location": "Gatehouse",
+        "combat_state": False,
+    },
+    "add_items_to_inventory": None,
+    "remove_items_from_inventory": None,
+}
+
+
+def _feed_in_chunks(text: str, size: int) -> str:
+    extractor = MessageToUserExtractor()
+    out = [extractor.feed(text[i : i + size]) for i in range(0, len(text), size)]
+    assert extractor.done
+    return "".join(out)
+
+
+def test_extracts_message_across_every_chunk_size():
+    raw = json.dumps(DM_RESPONSE)
+    for size in (1, 2, 3, 5, 7, 64, len(raw)):
+        assert _feed_in_chunks(raw, size) == DM_RESPONSE["message_to_user"]
+
+
+def test_handles_unicode_escapes_split_across_chunks():
+    raw = json.dumps(DM_RESPONSE, ensure_ascii=True)
+    assert "\\ud83d" in raw
+    assert _feed_in_chunks(raw, 1) == DM_RESPONSE["message_to_user"]
+
+
+def test_ignores_nested_fields_with_the_same_name():
+    raw = json.dumps(
+        {
+            "update_adventure_status": {"message_to_user": "nested"},
+            "message_to_user": "top level",
+        }
+    )
+    assert _feed_in_chunks(raw, 4) == "top level"
+
+
+def test_emits_partial_text_before_the_object_completes():
+    extractor = MessageToUserExtractor()
+    assert extractor.feed('{"message_to_user": "The tor') == "The tor"
+    assert extractor.feed('ch flickers') == "ch flickers"
+    assert not extractor.done
+    assert extractor.feed('", "update_adventure_status": {') == ""
+    assert extractor.done
@@ -0,0 +1,26 @@
+from app.services.observability.metrics import Metrics
+
+
+def test_timings_are_kept_per_label_set():
+    metrics = Metrics(window=10)
+    for value in range(1, 101):
+        metrics.observe("latency_ms", value, phase="narration")
+    metrics.observe("latency_ms", 5, phase="tool_decision")
+
+    narration = metrics.timing("latency_ms", phase="narration")
+    assert narration.count == 100
+    assert narration.percentile(50) == 96
+    assert metrics.timing("latency_ms", phase="tool_decision").count == 1
+    assert metrics.timing("latency_ms", phase="unknown") is None
+
+
+def test_snapshot_renders_labels():
+    metrics = Metrics()
+    metrics.increment("repairs", path="closed_string")
+    metrics.increment("repairs", path="closed_string")
+    metrics.observe("latency_ms", 12.0, phase="narration", model="m")
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["counters"] == {"repairs{path=closed_string}": 2}
+    assert snapshot["timings"]["latency_ms{model=m,phase=narration}"]["p50"] == 12.0
@@ -1,10 +1,14 @@
 import pytest
 from datetime import datetime, timezone
 
+from app.domains.adventures import AdventureStatus
 from app.domains.character import Character, Spellcasting
 from app.domains.character_common import AbilityScores, Skill, Feature, Item, Spell
 from app.domains.chat import Message
-from app.services.orchestration.prompt_builder import PromptBuilder
+from app.services.orchestration.prompt_builder import (
+    STANDARD_RULES_PROMPT,
+    PromptBuilder,
+)
 from app.adapters.llm.types import PromptPayload
 
 
@@ -14,9 +18,8 @@ PYTHONPYCACHEPREFIX="$PWD/.pycache" pytest -q tests/unit/services/orchestration/
 """
 
 
-@pytest.mark.asyncio
-async def test_build_standard_prompt_minimal_domain_models():
-    character = Character(
+def _character(inventory=None) -> Character:
+    return Character(
         id="char-1",
         name="Awin",
         race="Elf",
@@ -30,7 +33,9 @@ async def test_build_standard_prompt_minimal_domain_models():
         abilities=AbilityScores(str=8, dex=14, con=10, int=16, wis=10, cha=8),
         skills=[Skill(key="arcana", proficient=True)],
         features=[Feature(id="f1", name="Darkvision", description="See in dark")],
-        inventory=[
+        inventory=inventory
+        if inventory is not None
+        else [
             Item(
                 id="rope",
                 name="Rope",
@@ -57,49 +62,112 @@ async def test_build_standard_prompt_minimal_domain_models():
         ),
     )
 
+
+def _messages(count: int) -> list[Message]:
     now = datetime.now(timezone.utc)
-    messages = [
-        Message(message_id=1, role="user", content="Hello", created_at=now),
+    contents = ["Hello", "Hi adventurer", "Open the door", "It creaks open", "Go in"]
+    return [
         Message(
-            message_id=2, role="assistant", content="Hi adventurer", created_at=now
-        ),
-        Message(message_id=3, role="user", content="Open the door", created_at=now),
+            message_id=i + 1,
+            role="user" if i % 2 == 0 else "assistant",
+            content=contents[i % len(contents)],
+            created_at=now,
+        )
+        for i in range(count)
     ]
 
-    builder = PromptBuilder()
-    payload = builder.build_standard_prompt(character=character, messages=messages)
+
+def _builder(messages, status_summary="Outside the keep", **kwargs) -> PromptBuilder:
+    return PromptBuilder(
+        story_brief="Infiltrate Stormspire Keep.",
+        character=_character(),
+        adventure_status=AdventureStatus(
+            summary=status_summary, location="Gate", combat_state=False
+        ),
+        chat_history=messages,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_build_standard_prompt_minimal_domain_models():
+    payload = _builder(_messages(3)).prompt_payload
 
     assert isinstance(payload, PromptPayload)
+    contents = [m.content for m in payload.messages]
+    roles = [m.role for m in payload.messages]
 
-    assert len(payload.system_messages) == 2
-    assert any("Dungeon Master" in sm for sm in payload.system_messages)
-    assert any("Output Schema" in sm for sm in payload.system_messages)
-
-    assert len(payload.user_messages) == 3
-    assert any("## Character Sheet" in um for um in payload.user_messages)
-    assert any("Name: Awin" in um for um in payload.user_messages)
-    assert any(
-        "Abilities: STRENGTH 8  DEXTERITY 14  CONSTITUTION 10  INTELLIGENCE 16  WISDOM 10  CHARISMA 8"
-        in um
-        for um in payload.user_messages
-    )
-    assert any("Skills: arcana" in um for um in payload.user_messages)
-    assert any(
-        "Features: Darkvision: See in dark" in um for um in payload.user_messages
-    )
-    sheet = next(um for um in payload.user_messages if "## Character Sheet" in um)
-    assert "Inventory: " in sheet and "Rope" in sheet and "Healing Potion x2" in sheet
-    assert any(
-        "Spellcasting: Ability: int | Spells: Magic Missile, Shield" in um
-        for um in payload.user_messages
+    assert contents[0] == STANDARD_RULES_PROMPT
+    assert "Dungeon Master" in contents[0]
+    assert contents[1] == "## Story Brief\nInfiltrate Stormspire Keep."
+    sheet = contents[2]
+    assert sheet.startswith("## Character Details")
+    assert "Name: Awin" in sheet
+    assert "Race: Elf | Class: Wizard | Background: Sage" in sheet
+    assert "name: Rope" in sheet and "name: Healing Potion - quantity: 2" in sheet
+
+    assert contents[3:6] == ["Hello", "Hi adventurer", "Open the door"]
+    assert roles[3:6] == ["user", "assistant", "user"]
+
+    assert roles[-1] == "system"
+    assert contents[-1].startswith("## Adventure Status")
+    assert "Summary: Outside the keep" in contents[-1]
+
+
+def test_prefix_stays_identical_across_turns_until_the_status():
+    first = _builder(_messages(3), status_summary="Outside").prompt_payload
+    second = _builder(_messages(5), status_summary="Inside").prompt_payload
+
+    shared = len(first.messages) - 1
+    assert first.messages[:shared] == second.messages[:shared]
+    assert first.messages[-1] != second.messages[-1]
+
+
+def test_cache_key_and_chained_prompt():
+    builder = _builder(
+        _messages(3), previous_response_id="resp_1", cache_key="merlin-session-s1"
     )
-    conv = next(um for um in payload.user_messages if "## Conversation" in um)
-    assert "USER: Hello" in conv
-    assert "ASSISTANT: Hi adventurer" in conv
-    assert "USER: Open the door" in conv
-    assert (
-        conv.index("USER: Hello")
-        < conv.index("ASSISTANT: Hi adventurer")
-        < conv.index("USER: Open the door")
+
+    payload = builder.prompt_payload
+    assert payload.prompt_cache_key == "merlin-session-s1"
+    assert payload.previous_response_id == "resp_1"
+    assert [m.content for m in payload.messages] == ["Open the door"]
+
+    builder.unchain()
+    assert builder.prompt_payload.previous_response_id is None
+    assert builder.prompt_payload.prompt_cache_key == "merlin-session-s1"
+    assert builder.prompt_payload.messages[0].content == STANDARD_RULES_PROMPT
+
+
+def test_sections_stay_aligned_with_messages():
+    builder = _builder(_messages(3))
+    builder.add_function_call_messages("c1", "ability_check", {"ability": "str"}, "12")
+
+    assert len(builder.sections) == len(builder.prompt_payload.messages)
+    assert builder.sections[:3] == ["rules", "brief", "character"]
+    assert builder.sections[3:] == [
+        "history",
+        "history",
+        "input",
+        "status",
+        "tool",
+        "tool",
+    ]
+
+    payload = builder.budgeted_payload(soft_limit=10, hard_limit=100_000)
+    assert [m.content for m in payload.messages[3:4]] == ["Open the door"]
+
+
+def test_rolling_summary_sits_between_character_and_history():
+    builder = _builder(_messages(3), rolling_summary="Awin bribed the guard.")
+
+    contents = [m.content for m in builder.prompt_payload.messages]
+    assert contents[3] == "## Earlier in the Adventure\nAwin bribed the guard."
+    assert contents[4] == "Hello"
+    assert builder.sections[3] == "summary"
+    assert len(builder.sections) == len(contents)
+
+    chained = _builder(
+        _messages(3), rolling_summary="Awin bribed the guard.", previous_response_id="r"
     )
-    assert any("Respond ONLY with a JSON object" in um for um in payload.user_messages)
+    assert [m.content for m in chained.prompt_payload.messages] == ["Open the door"]
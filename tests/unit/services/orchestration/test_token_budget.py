@@ -0,0 +1,122 @@
+import pytest
+
+from app.adapters.llm.types import FunctionCall, FunctionCallOutput, InputMessage
+from app.adapters.llm.types import PromptPayload
+from app.services.orchestration import token_budget
+from app.services.orchestration.token_budget import (
+    PromptBudgetExceeded,
+    apply_budget,
+    estimate_tokens,
+)
+
+
+"""
+To run the test:
+PYTHONPYCACHEPREFIX="$PWD/.pycache" pytest -q tests/unit/services/orchestration/test_token_budget.py
+"""
+
+
+def _msg(role: str, tokens: int, tag: str = "x") -> InputMessage:
+    # Each token is roughly four characters.
+    return InputMessage(role=role, content=(tag * tokens * 4)[: tokens * 4])
+
+
+def _payload():
+    messages = [
+        _msg("system", 100, "r"),
+        _msg("system", 100, "b"),
+        _msg("system", 100, "c"),
+        _msg("user", 100, "1"),
+        _msg("assistant", 100, "2"),
+        _msg("user", 100, "3"),
+        _msg("assistant", 100, "4"),
+        _msg("user", 50, "5"),
+        _msg("system", 50, "s"),
+    ]
+    sections = (
+        [token_budget.RULES, token_budget.BRIEF, token_budget.CHARACTER]
+        + [token_budget.HISTORY] * 4
+        + [token_budget.USER_INPUT, token_budget.STATUS]
+    )
+    return PromptPayload(messages=messages, prompt_cache_key="k"), sections
+
+
+def test_under_soft_limit_returns_same_payload():
+    payload, sections = _payload()
+
+    pruned, meta = apply_budget(
+        payload, soft_limit=10_000, hard_limit=20_000, sections=sections
+    )
+
+    assert pruned is payload
+    assert meta["applied"] is False
+    assert meta["estimate_tokens"] == estimate_tokens(payload)
+
+
+def test_drops_oldest_history_first():
+    payload, sections = _payload()
+    total = estimate_tokens(payload)
+
+    pruned, meta = apply_budget(
+        payload, soft_limit=total - 150, hard_limit=total, sections=sections
+    )
+
+    contents = [m.content[0] for m in pruned.messages]
+    assert contents == ["r", "b", "c", "3", "4", "5", "s"]
+    assert meta["strategy"] == ["drop_history_2"]
+    assert meta["estimate_tokens"] == estimate_tokens(pruned)
+    assert pruned.prompt_cache_key == "k"
+    assert len(payload.messages) == 9
+
+
+def test_trims_lowest_priority_sections_to_hard_limit():
+    payload, sections = _payload()
+
+    pruned, meta = apply_budget(
+        payload, soft_limit=300, hard_limit=350, sections=sections
+    )
+
+    assert estimate_tokens(pruned) <= 350
+    assert meta["estimate_tokens"] == estimate_tokens(pruned)
+    assert all(m.role != "assistant" for m in pruned.messages)
+    assert pruned.messages[0].content == payload.messages[0].content
+    assert pruned.messages[1].content.endswith(token_budget.TRIM_MARKER)
+    assert pruned.messages[-2].content == payload.messages[-2].content
+    assert "trim_brief" in meta["strategy"]
+
+
+def test_keeps_tool_calls_paired():
+    payload, sections = _payload()
+    payload.messages += [
+        FunctionCall(call_id="c1", name="ability_check", arguments='{"a": 1}'),
+        FunctionCallOutput(call_id="c1", output="17"),
+    ]
+    sections += [token_budget.TOOL, token_budget.TOOL]
+
+    pruned, _ = apply_budget(payload, soft_limit=100, hard_limit=200, sections=sections)
+
+    assert estimate_tokens(pruned) <= 200
+    assert isinstance(pruned.messages[-2], FunctionCall)
+    assert isinstance(pruned.messages[-1], FunctionCallOutput)
+
+
+def test_untagged_payload_keeps_latest_message():
+    payload, _ = _payload()
+
+    pruned, _ = apply_budget(payload, soft_limit=100, hard_limit=1000)
+
+    assert pruned.messages == payload.messages[-1:]
+
+
+def test_raises_when_the_hard_limit_cannot_be_met():
+    payload, sections = _payload()
+    payload.messages.append(
+        FunctionCallOutput(call_id="c1", output="x" * 4 * 400)
+    )
+    sections.append(token_budget.TOOL)
+
+    with pytest.raises(PromptBudgetExceeded) as exc:
+        apply_budget(payload, soft_limit=100, hard_limit=300, sections=sections)
+
+    assert exc.value.hard_limit == 300
+    assert exc.value.estimate_tokens > 300
@@ -0,0 +1,72 @@
+from app.services.reliability import circuit_breaker
+from app.services.reliability.circuit_breaker import CircuitBreaker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _breaker(monkeypatch, threshold=2, reset=10):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock.monotonic)
+    return CircuitBreaker(threshold, reset), clock
+
+
+def test_opens_after_consecutive_failures(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 10
+    clock.now += 4
+    assert breaker.retry_after() == 6
+
+
+def test_half_open_lets_a_single_probe_through(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 10
+
+    assert breaker.state == "half_open"
+    assert breaker.retry_after() == 0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 1
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_for_a_full_period(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.retry_after() == 10
+
+
+def test_released_probe_can_be_retried(monkeypatch):
+    breaker, clock = _breaker(monkeypatch)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+
+    breaker.release_probe()
+
+    assert breaker.allow_request()
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.services.reliability.hedging import HedgePolicy, LatencyTracker, hedged
+
+
+def _slow_then_fast(delays):
+    """Returns an fn whose n-th call sleeps delays[n] and returns n."""
+    state = {"calls": 0, "cancelled": []}
+
+    async def fn():
+        n = state["calls"]
+        state["calls"] += 1
+        try:
+            await asyncio.sleep(delays[n])
+        except asyncio.CancelledError:
+            state["cancelled"].append(n)
+            raise
+        return n
+
+    return fn, state
+
+
+def test_latency_percentiles_are_per_model():
+    tracker = LatencyTracker(window=100)
+    for i in range(1, 101):
+        tracker.record("gpt-a", i / 100)
+    tracker.record("gpt-b", 5.0)
+
+    assert tracker.percentile("gpt-a", 50) == pytest.approx(0.51)
+    assert tracker.percentile("gpt-a", 95) == pytest.approx(0.96)
+    assert tracker.percentile("gpt-b", 95) == 5.0
+    assert tracker.percentile("gpt-c", 95) is None
+
+
+def test_no_hedge_delay_without_enough_samples():
+    tracker = LatencyTracker()
+    policy = HedgePolicy(min_samples=3, min_delay_s=0.1)
+    tracker.record("m", 1.0)
+
+    assert policy.hedge_delay(tracker, "m") is None
+    tracker.record("m", 0.01)
+    tracker.record("m", 0.01)
+    assert policy.hedge_delay(tracker, "m") == 1.0
+
+
+def test_hedges_are_capped_per_minute():
+    policy = HedgePolicy(max_hedges_per_minute=2)
+
+    assert [policy.try_acquire() for _ in range(3)] == [True, True, False]
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    fn, state = _slow_then_fast([5, 0.01])
+    hedges = []
+
+    result = await hedged(
+        fn, delay_s=0.02, policy=HedgePolicy(), on_hedge=lambda: hedges.append(1)
+    )
+
+    assert result == 1
+    assert hedges == [1]
+    await asyncio.sleep(0)
+    assert state["cancelled"] == [0]
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    fn, state = _slow_then_fast([0.01, 0.01])
+
+    assert await hedged(fn, delay_s=0.5, policy=HedgePolicy()) == 0
+    assert state["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_once_the_cap_is_spent():
+    fn, state = _slow_then_fast([0.05, 0.01])
+
+    result = await hedged(
+        fn, delay_s=0.01, policy=HedgePolicy(max_hedges_per_minute=0)
+    )
+
+    assert result == 0
+    assert state["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_covers_a_failed_primary():
+    calls = {"n": 0}
+
+    async def fn():
+        calls["n"] += 1
+        if calls["n"] == 1:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("primary failed")
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    assert await hedged(fn, delay_s=0.01, policy=HedgePolicy()) == "hedge"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cancel_after_s", [0.01, 0.05])
+async def test_cancelling_the_caller_cancels_every_call(cancel_after_s):
+    # Cancelled during the hedge delay, then while both calls run.
+    fn, state = _slow_then_fast([5, 5])
+
+    caller = asyncio.create_task(hedged(fn, delay_s=0.03, policy=HedgePolicy()))
+    await asyncio.sleep(cancel_after_s)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    await asyncio.sleep(0)
+
+    assert sorted(state["cancelled"]) == list(range(state["calls"]))
+    assert state["calls"] == (1 if cancel_after_s < 0.03 else 2)
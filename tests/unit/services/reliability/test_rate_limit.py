@@ -0,0 +1,189 @@
+import asyncio
+import fcntl
+import multiprocessing
+import os
+
+import httpx
+import pytest
+
+from app.adapters.llm.errors import LLMRateLimitedError
+from app.services.reliability import rate_limit
+from app.services.reliability.rate_limit import (
+    BACKEND_HEADER,
+    MODEL_HEADER,
+    FileBucketStore,
+    RateLimitGovernor,
+    _duration_s,
+)
+
+HEADERS = {
+    "x-ratelimit-limit-requests": "60",
+    "x-ratelimit-limit-tokens": "6000",
+    "x-ratelimit-remaining-requests": "59",
+    "x-ratelimit-remaining-tokens": "1000",
+    "x-ratelimit-reset-requests": "1s",
+    "x-ratelimit-reset-tokens": "50s",
+}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+
+    async def _sleep(seconds):
+        clock.now += seconds
+
+    monkeypatch.setattr(asyncio, "sleep", _sleep)
+    return clock
+
+
+def test_parses_provider_durations():
+    assert _duration_s("20ms") == 0.02
+    assert _duration_s("6m0s") == 360.0
+    assert _duration_s("1h2m3.5s") == 3723.5
+    assert _duration_s("soon") is None
+
+
+@pytest.mark.asyncio
+async def test_calls_are_not_paced_before_limits_are_known(clock):
+    governor = RateLimitGovernor(clock=clock)
+
+    for _ in range(100):
+        await governor.acquire("gpt-4o-mini", 10_000)
+
+    assert clock.now == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_queues_until_tokens_refill(clock):
+    governor = RateLimitGovernor(max_wait_s=30, clock=clock)
+    await governor.observe("gpt-4o-mini", 200, HEADERS)
+
+    await governor.acquire("gpt-4o-mini", 1000)
+    assert clock.now == 1000.0
+
+    # 6000 tokens per minute refill at 100 per second.
+    await governor.acquire("gpt-4o-mini", 500)
+    assert clock.now == pytest.approx(1005.0)
+
+
+@pytest.mark.asyncio
+async def test_sheds_calls_that_would_wait_too_long(clock):
+    governor = RateLimitGovernor(max_wait_s=2, clock=clock)
+    await governor.observe("gpt-4o-mini", 200, HEADERS)
+    await governor.acquire("gpt-4o-mini", 1000)
+
+    with pytest.raises(LLMRateLimitedError) as exc:
+        await governor.acquire("gpt-4o-mini", 1000)
+    assert exc.value.retry_after == 10
+    assert clock.now == 1000.0
+
+
+@pytest.mark.asyncio
+async def test_a_429_blocks_the_model_until_retry_after(clock):
+    governor = RateLimitGovernor(max_wait_s=30, clock=clock)
+    await governor.observe("gpt-4o-mini", 429, {"retry-after": "3"})
+
+    await governor.acquire("gpt-4o-mini", 1)
+    assert clock.now == pytest.approx(1003.0)
+    await governor.acquire("gpt-4o", 1)
+    assert clock.now == pytest.approx(1003.0)
+
+
+@pytest.mark.asyncio
+async def test_a_429_from_one_backend_leaves_other_backends_alone(clock):
+    governor = RateLimitGovernor(max_wait_s=30, clock=clock)
+    await governor.observe("gpt-4o-mini", 429, {"retry-after": "3"}, backend="a")
+
+    await governor.acquire("gpt-4o-mini", 1, backend="b")
+    assert clock.now == 1000.0
+    await governor.acquire("gpt-4o-mini", 1, backend="a")
+    assert clock.now == pytest.approx(1003.0)
+
+
+def _reserve_in_child(path, results):
+    governor = RateLimitGovernor(FileBucketStore(path), max_wait_s=0)
+    try:
+        asyncio.run(governor.acquire("gpt-4o-mini", 400))
+        results.put(True)
+    except LLMRateLimitedError:
+        results.put(False)
+
+
+def test_file_store_shares_buckets_across_processes(tmp_path):
+    path = str(tmp_path / "rate-limit")
+    governor = RateLimitGovernor(FileBucketStore(path))
+    asyncio.run(governor.observe("gpt-4o-mini", 200, HEADERS))
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    workers = [
+        ctx.Process(target=_reserve_in_child, args=(path, results)) for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    # 1000 tokens remain, so only two workers get their 400.
+    assert sorted(results.get() for _ in workers) == [False, False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_file_store_waits_for_the_lock_without_blocking_the_loop(tmp_path):
+    path = str(tmp_path / "rate-limit")
+    store = FileBucketStore(path)
+    other_worker = os.open(path, os.O_RDWR)
+    fcntl.flock(other_worker, fcntl.LOCK_EX)
+
+    transaction = asyncio.ensure_future(
+        store.transact("gpt-4o-mini", lambda s: s.setdefault("seen", True))
+    )
+    await asyncio.sleep(0.01)
+    # The loop kept running while the transaction waited for the lock.
+    assert not transaction.done()
+
+    fcntl.flock(other_worker, fcntl.LOCK_UN)
+    assert await asyncio.wait_for(transaction, 1) is True
+    os.close(other_worker)
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_response_hook_reads_the_model_the_request_was_tagged_with(monkeypatch):
+    governor = RateLimitGovernor(max_wait_s=0)
+    monkeypatch.setattr(rate_limit, "_governor", governor)
+    sent_headers = []
+
+    def provider(request):
+        sent_headers.append(dict(request.headers))
+        return httpx.Response(200, headers=HEADERS)
+
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(provider),
+        event_hooks={
+            "request": [rate_limit.tag_request_model],
+            "response": [rate_limit.observe_response],
+        },
+    ) as client:
+        await client.post(
+            "https://api.openai.com/v1/responses",
+            content=b"not json",
+            headers={MODEL_HEADER: "gpt-4o-mini", BACKEND_HEADER: "a"},
+        )
+
+    assert MODEL_HEADER not in sent_headers[0]
+    assert BACKEND_HEADER not in sent_headers[0]
+    await governor.acquire("gpt-4o-mini", 1000, backend="b")
+    await governor.acquire("gpt-4o-mini", 1000, backend="b")
+    await governor.acquire("gpt-4o-mini", 1000, backend="a")
+    with pytest.raises(LLMRateLimitedError):
+        await governor.acquire("gpt-4o-mini", 1000, backend="a")
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.domains.character import Character
+from app.domains.character_common import AbilityScores
+from app.services.tools import tool_executor
+from app.services.tools.tool_executor import execute_tool_calls
+
+
+CHARACTER = Character(
+    id="char-1",
+    name="Awin",
+    race="Elf",
+    class_name="Wizard",
+    background="Sage",
+    level=1,
+    hp_current=6,
+    hp_max=6,
+    ac=12,
+    speed=30,
+    abilities=AbilityScores(8, 14, 10, 16, 10, 8),
+)
+
+
+def _call(call_id, name, **arguments):
+    return SimpleNamespace(
+        type="function_call",
+        call_id=call_id,
+        name=name,
+        arguments=json.dumps(arguments),
+    )
+
+
+async def _slow_lookup(character, delay):
+    await asyncio.sleep(delay)
+    return f"found after {delay}"
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    monkeypatch.setattr(
+        tool_executor,
+        "TOOLS_TO_FUNCTIONS",
+        {**tool_executor.TOOLS_TO_FUNCTIONS, "slow_lookup": _slow_lookup},
+    )
+
+
+@pytest.mark.asyncio
+async def test_io_tools_run_concurrently(tools):
+    calls = [_call(f"call-{i}", "slow_lookup", delay=0.1) for i in range(5)]
+
+    started = time.perf_counter()
+    results = await execute_tool_calls(calls, CHARACTER, timeout_s=1)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.3
+    assert [r.call_id for r in results] == [f"call-{i}" for i in range(5)]
+    assert all(r.output == "found after 0.1" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_each_call_has_its_own_timeout(tools):
+    calls = [
+        _call("fast", "slow_lookup", delay=0.01),
+        _call("slow", "slow_lookup", delay=5),
+    ]
+
+    results = await execute_tool_calls(calls, CHARACTER, timeout_s=0.1)
+
+    assert results[0].output == "found after 0.01"
+    assert results[1].output == "The slow_lookup tool timed out."
+
+
+@pytest.mark.asyncio
+async def test_multiple_ability_checks_and_unknown_tools():
+    calls = [
+        _call("a", "ability_check", difficulty=-10, ability="strength", skill="athletics"),
+        _call("b", "ability_check", difficulty=99, ability="wisdom", skill="none"),
+        _call("c", "cast_fireball"),
+    ]
+
+    results = await execute_tool_calls(calls, CHARACTER, timeout_s=1)
+
+    assert results[0].output == "The action was successful."
+    assert results[1].output == "The action was not successful."
+    assert results[1].arguments["ability"] == "wisdom"
+    assert results[2].output == "Unknown tool: cast_fireball."